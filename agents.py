@@ -0,0 +1,215 @@
+"""
+Buyer and seller agents, free of UI code.
+Importing this module is cheap: the LLM client (and langchain) is only
+loaded the first time an agent actually needs to generate text.
+"""
+from llm_client import get_llm
+from message_renderer import get_renderer
+from offers import offer_from
+from policy import DEFAULT_ROUNDS as POLICY_ROUNDS, get_policy
+
+# Personalities offered by the UIs
+BUYER_PERSONALITIES = ["Aggressive Trader", "Diplomatic Buyer", "Data-Driven Analyst", "Creative Wildcard"]
+SELLER_PERSONALITIES = ["Aggressive Trader", "Diplomatic Seller", "Data-Driven Seller", "Creative Wildcard"]
+# Offer policies: None keeps the hand-tuned concession rules, "optimal" looks up policy.py's solved tables
+POLICIES = (None, "optimal")
+
+
+class NegotiationAgent:
+    """Shared by both agents: the LLM client is created on first use."""
+
+    _llm = None
+    policy = None  # snapshots taken before policies existed have none
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = get_llm()  # shared client unless one is injected
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+
+    def _check_policy(self, policy):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}; expected one of {POLICIES}")
+        return policy
+
+    def policy_offer(self, standing, limit, rounds):
+        """Decision from the solved policy table for this turn: one table lookup."""
+        action, offer = get_policy(self.role, rounds).decide(self.round, standing, limit)
+        self.round += 1
+        if action == "counter":
+            if self.last_offer is not None:  # grid snapping must never take back a concession
+                offer = max(offer, self.last_offer) if self.role == "buyer" else min(offer, self.last_offer)
+            self.last_offer = offer
+        return {"action": action, "offer": offer}
+
+    def snapshot(self):
+        """JSON-ready state of the agent: everything except its LLM client."""
+        state = {key: value for key, value in vars(self).items() if key != "_llm"}
+        state["role"] = self.role
+        return state
+
+    def restore(self, state):
+        """Load state from snapshot(); the agent keeps its own LLM client."""
+        self.__dict__.update((key, value) for key, value in state.items() if key != "role")
+        return self
+
+
+def agent_from_snapshot(state, llm=None):
+    """Rebuild a BuyerAgent or SellerAgent from snapshot() without running __init__."""
+    cls = {"buyer": BuyerAgent, "seller": SellerAgent}[state["role"]]
+    agent = cls.__new__(cls)
+    agent._llm = llm
+    return agent.restore(state)
+
+
+# -------------------- Buyer Agent --------------------
+class BuyerAgent(NegotiationAgent):
+    role = "buyer"
+
+    def __init__(self, name, personality_type, budget, llm=None, policy=None):
+        self.name = name
+        self.personality_type = personality_type
+        self.budget = budget
+        self.round = 0
+        self.latest_seller_offer = None
+        self.last_offer = None
+        self.policy = self._check_policy(policy)
+        self._llm = llm
+
+    def observe_seller(self, message, offer=None):
+        """
+        Record the seller's offer: an explicit number, the offer an OfferMessage carries,
+        or (free text only) the amount extract_offer() finds. Nothing found leaves it unchanged.
+        """
+        offer = offer_from(message, offer)
+        if offer is not None:
+            self.latest_seller_offer = offer
+
+    def decide_offer(self, market_price=None, max_rounds=6):
+        """
+        Decide buyer action based on seller offer, without any LLM call.
+        Ensures deal always closes by final round.
+        Returns dict with action and offer.
+        """
+        offer_to_consider = self.latest_seller_offer or market_price
+        if self.policy:
+            return self.policy_offer(offer_to_consider, self.budget, POLICY_ROUNDS)
+
+        # --- If within budget early ---
+        if offer_to_consider and offer_to_consider <= self.budget:
+            self.round += 1
+            return {"action": "accept", "offer": offer_to_consider}
+
+        # --- If last round → force accept ---
+        if self.round + 1 >= max_rounds:
+            final_offer = offer_to_consider or self.budget
+            self.round += 1
+            return {"action": "accept", "offer": final_offer}
+
+        # --- Otherwise, progressive counter-offer ---
+        if offer_to_consider:
+            concession_factor = 0.9 + (0.02 * self.round)  # buyer concedes more each round
+            counter_offer = min(offer_to_consider * concession_factor, self.budget)
+        else:
+            counter_offer = self.budget * (0.7 + 0.05 * self.round)
+
+        self.last_offer = counter_offer
+        self.round += 1
+        return {"action": "counter", "offer": counter_offer}
+
+    def decide(self, market_price=None, max_rounds=6, renderer=None):
+        """
+        Numeric decision plus a message from the renderer (LLM by default).
+        Returns dict with action, offer, and message.
+        """
+        decision = self.decide_offer(market_price, max_rounds)
+        decision["message"] = get_renderer(renderer or "llm").render(self, decision, round_num=self.round)
+        return decision
+
+    async def adecide(self, market_price=None, max_rounds=6, renderer=None):
+        """
+        Async decide(): the message is generated with the renderer's arender().
+        Returns dict with action, offer, and message.
+        """
+        decision = self.decide_offer(market_price, max_rounds)
+        decision["message"] = await get_renderer(renderer or "llm").arender(self, decision, round_num=self.round)
+        return decision
+
+
+# -------------------- Seller Agent --------------------
+class SellerAgent(NegotiationAgent):
+    role = "seller"
+
+    def __init__(self, name, personality_type, min_price=None, min_rounds=3, cost_price=None, llm=None,
+                 policy=None):
+        self.name = name
+        self.personality_type = personality_type
+        self.min_price = min_price if min_price else cost_price * 0.8  # fallback min price
+        self.cost_price = cost_price if cost_price else self.min_price / 0.8
+        self.round = 0
+        self.latest_buyer_offer = None
+        self.last_offer = None
+        self.min_rounds = min_rounds     # ✅ must negotiate at least X rounds
+        self.deal_closed = False
+        self.policy = self._check_policy(policy)
+        self._llm = llm
+
+    def observe_buyer(self, message, offer=None):
+        """
+        Record the buyer's offer: an explicit number, the offer an OfferMessage carries,
+        or (free text only) the amount extract_offer() finds. Nothing found leaves it unchanged.
+        """
+        offer = offer_from(message, offer)
+        if offer is not None:
+            self.latest_buyer_offer = offer
+
+    def decide_offer(self):
+        """
+        Decide seller action based on buyer offer, without any LLM call.
+        Returns dict with action and offer.
+        With a policy, min_rounds does not apply: the table decides when to accept.
+        """
+        if self.policy:
+            decision = self.policy_offer(self.latest_buyer_offer, self.min_price, POLICY_ROUNDS)
+            self.deal_closed = decision["action"] == "accept"
+            return decision
+
+        self.round += 1
+        offer_to_consider = self.latest_buyer_offer
+
+        # ✅ Force deal success only after min_rounds
+        if self.round >= self.min_rounds:
+            self.deal_closed = True
+            final_offer = offer_to_consider or self.cost_price
+            return {"action": "accept", "offer": final_offer}
+
+        # Otherwise → keep negotiating (counter-offer)
+        if offer_to_consider:
+            counter_offer = max(offer_to_consider * 1.1, self.min_price)
+        else:
+            counter_offer = self.cost_price * 1.2  # start a bit higher than cost
+
+        self.last_offer = counter_offer
+        return {"action": "counter", "offer": counter_offer}
+
+    def decide(self, renderer=None):
+        """
+        Numeric decision plus a message from the renderer (LLM by default).
+        Returns dict with action, offer, and message.
+        """
+        decision = self.decide_offer()
+        decision["message"] = get_renderer(renderer or "llm").render(self, decision, round_num=self.round)
+        return decision
+
+    async def adecide(self, renderer=None):
+        """
+        Async decide(): the message is generated with the renderer's arender().
+        Returns dict with action, offer, and message.
+        """
+        decision = self.decide_offer()
+        decision["message"] = await get_renderer(renderer or "llm").arender(self, decision, round_num=self.round)
+        return decision
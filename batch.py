@@ -0,0 +1,197 @@
+"""
+Non-interactive batch mode: scenarios in, one JSON result per line out.
+
+Scenarios are read lazily from stdin ("-") or a JSONL / CSV file, one per line
+or row, with run_negotiation's fields (product, market_price, buyer_personality,
+buyer_budget, seller_personality, seller_min_price; optional buyer_name,
+seller_name, policy, buyer_policy, seller_policy, id, seed). They run on a
+bounded worker pool: processes for the heuristic engine, threads for the llm
+engine (the work is waiting on the model server). Each result line is written
+and flushed as soon as its negotiation finishes, so results come out in
+completion order, tagged with the scenario's id (its line number if it has
+none). At most `window` scenarios are read ahead of the results written, so
+memory stays flat however long the input is.
+
+    python batch.py scenarios.jsonl --workers 8 > results.jsonl
+    cat scenarios.csv | python batch.py - --format csv --engine llm --renderer template
+    python batch.py scenarios.jsonl --engine llm --renderer routed --routing routing.json
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import random
+import sys
+import time
+
+ENGINES = ["heuristic", "llm"]
+NUMERIC_FIELDS = ("market_price", "buyer_budget", "seller_min_price")
+INTEGER_FIELDS = ("seed",)
+
+# =========================
+# Input
+def read_scenarios(lines, fmt="jsonl"):
+    """
+    Yield one scenario dict per JSONL line or CSV row, numbering them from 1.
+    A line that can't be parsed yields {"id": n, "error": ...} instead of stopping the stream.
+    """
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(lines), 1):
+            scenario = {key: value for key, value in row.items() if value not in (None, "")}
+            try:
+                for field in NUMERIC_FIELDS:
+                    if field in scenario:
+                        scenario[field] = float(scenario[field])
+                for field in INTEGER_FIELDS:  # CSV cells are strings; random.seed("7") differs from seed(7)
+                    if field in scenario:
+                        scenario[field] = int(scenario[field])
+            except ValueError as exc:
+                yield {"id": scenario.get("id", n), "error": str(exc)}
+                continue
+            scenario.setdefault("id", n)
+            yield scenario
+    elif fmt == "jsonl":
+        for n, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                scenario = json.loads(line)
+            except ValueError as exc:
+                yield {"id": n, "error": f"invalid JSON: {exc}"}
+                continue
+            if not isinstance(scenario, dict):
+                yield {"id": n, "error": "scenario must be a JSON object"}
+                continue
+            scenario.setdefault("id", n)
+            yield scenario
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+# =========================
+# Worker
+def run_one(scenario, engine="heuristic", renderer="none", history=False):
+    """Run one scenario and return its result record; failures become {"id", "error"} records."""
+    if "error" in scenario:
+        return scenario
+    started = time.perf_counter()
+    try:
+        args = (scenario["product"], scenario["market_price"],
+                scenario.get("buyer_name", "Buyer"), scenario["buyer_personality"], scenario["buyer_budget"],
+                scenario.get("seller_name", "Seller"), scenario["seller_personality"],
+                scenario["seller_min_price"])
+        if engine == "heuristic":
+            from run_negotiation_terminal import run_negotiation
+
+            if "seed" in scenario:
+                random.seed(scenario["seed"])
+            result = run_negotiation(*args, verbose=False)
+        elif engine == "llm":
+            from negotiation_logic import run_negotiation
+
+            result = run_negotiation(*args, renderer=renderer, policy=scenario.get("policy"),
+                                     buyer_policy=scenario.get("buyer_policy"),
+                                     seller_policy=scenario.get("seller_policy"))
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
+    except Exception as exc:
+        return {"id": scenario["id"], "error": f"{type(exc).__name__}: {exc}"}
+
+    turns = result["history"]
+    record = {"id": scenario["id"], "status": result["status"], "price": result.get("price"),
+              "rounds": turns[-1]["round"] if turns else 0, "turns": len(turns),
+              "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+    if result.get("degraded"):
+        record["degraded"] = len(result["degraded"])
+    if history:
+        record["history"] = [dict(turn) for turn in turns]
+    return record
+
+# =========================
+# Streaming pool
+def run_stream(scenarios, out, engine="heuristic", renderer="none", workers=None, window=None,
+               history=False):
+    """
+    Run scenarios (any iterable, consumed lazily) and write each result to out as one
+    JSON line the moment it is ready. At most window scenarios are in flight at once.
+    Returns (results written, errors among them).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+    workers = workers or ((os.cpu_count() or 1) if engine == "heuristic" else 8)
+    window = window or workers * 4
+    worker = functools.partial(run_one, engine=engine, renderer=renderer, history=history)
+    executor = ProcessPoolExecutor if engine == "heuristic" else ThreadPoolExecutor
+    written = errors = 0
+    scenarios = iter(scenarios)
+
+    with executor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                scenario = next(scenarios, None)
+                if scenario is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(worker, scenario))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                written += 1
+                errors += "error" in record
+            out.flush()
+    return written, errors
+
+
+def run_batch(source, out=None, fmt=None, **options):
+    """Stream scenarios from a path ("-" for stdin) to JSONL on out (default stdout)."""
+    out = out or sys.stdout
+    fmt = fmt or ("csv" if source.lower().endswith(".csv") else "jsonl")
+    if source == "-":
+        return run_stream(read_scenarios(sys.stdin, fmt), out, **options)
+    with open(source, encoding="utf-8", newline="") as f:
+        return run_stream(read_scenarios(f, fmt), out, **options)
+
+
+def add_batch_arguments(parser):
+    """Batch options shared by the CLI entry points; --batch itself is added by each of them."""
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from the extension)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=int, default=None, help="scenarios in flight (default: 4 x workers)")
+    parser.add_argument("--history", action="store_true", help="include every turn in the results")
+
+# =========================
+# Command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scenarios from JSONL/CSV and stream JSONL results")
+    parser.add_argument("source", help="JSONL or CSV file, or - for stdin")
+    parser.add_argument("--engine", choices=ENGINES, default="heuristic")
+    parser.add_argument("--renderer", default="none", choices=["none", "template", "llm", "oneshot", "routed"],
+                        help="message generation for the llm engine")
+    parser.add_argument("--routing", metavar="CONFIG", help="JSON routing config for --renderer routed")
+    add_batch_arguments(parser)
+    args = parser.parse_args(argv)
+
+    renderer = args.renderer
+    if renderer == "routed" and args.engine == "llm":  # one router for every worker thread, so one report
+        from routing import RoutingRenderer, load_routing
+
+        renderer = RoutingRenderer(load_routing(args.routing) if args.routing else None)
+    written, errors = run_batch(args.source, fmt=args.format, engine=args.engine, renderer=renderer,
+                                workers=args.workers, window=args.window, history=args.history)
+    print(f"{written} results, {errors} errors", file=sys.stderr)
+    if hasattr(renderer, "report"):
+        from routing import format_report
+
+        print(format_report(renderer.report()), file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""
+Local stand-ins for an Ollama model, for benchmarks without a GPU or a real model.
+
+FakeChatModel is an in-process chat model with the methods the engine uses
+(invoke/ainvoke/stream/astream/batch/abatch). serve() runs a tiny HTTP server
+speaking Ollama's /api/chat and /api/generate, so a real ChatOllama can be
+pointed at it with base_url:
+
+    python -m benchmarks.fake_ollama --port 11435 --latency 0.05 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_cache import LLMReply, prompt_text
+
+OFFER_PATTERN = re.compile(r"₹\s?(\d[\d,]*(?:\.\d+)?)")
+FILLER = ("I think this is a fair price given the market and the condition of the item "
+          "so let us agree soon and move forward together").split()
+
+
+def count_tokens(text):
+    """Rough token count: whitespace-separated words."""
+    return len(text.split())
+
+
+def fake_reply(prompt, reply_tokens=24):
+    """Deterministic reply quoting the last ₹ amount in the prompt."""
+    offers = OFFER_PATTERN.findall(prompt)
+    words = f"How about ₹{offers[-1] if offers else '1000'}?".split()
+    while len(words) < reply_tokens:
+        words.append(FILLER[len(words) % len(FILLER)])
+    return words[:max(reply_tokens, 3)]
+
+
+def common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class FakeChatModel:
+    """
+    Chat model with configurable time to first token (latency) and decode speed
+    (tokens_per_second). Counts calls, round trips and prompt/completion tokens.
+
+    batch()/abatch() behave like ChatOllama's by default: LangChain's fallback that
+    sends each prompt as its own concurrent request. native_batch=True models a
+    server with a real batch endpoint instead, where a batch is one round trip.
+
+    Like Ollama, it keeps the last prompt and reply of each of kv_slots slots and
+    only prefills what follows the longest cached prefix: prefill_tokens counts those
+    tokens, and prefill_tokens_per_second (0 = free) turns them into delay.
+
+    With stall_every=N, every Nth round trip waits stall_seconds more before its
+    first token, like a server that is busy or swapping models.
+    """
+
+    def __init__(self, latency=0.05, tokens_per_second=40.0, reply_tokens=24, model="fake-llama", temperature=0.6,
+                 prefill_tokens_per_second=0.0, kv_slots=4, stall_every=0, stall_seconds=0.0,
+                 native_batch=False):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.model = model
+        self.temperature = temperature
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.kv_slots = kv_slots
+        self.stall_every = stall_every
+        self.stall_seconds = stall_seconds
+        self.native_batch = native_batch
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.round_trips = 0
+            self.prompt_tokens = 0
+            self.prefill_tokens = 0
+            self.completion_tokens = 0
+            self._slots = []  # token lists of recent prompts, most recent last
+
+    def _prefill(self, tokens, generated=()):
+        """
+        Tokens not covered by a cached prefix. As in llama.cpp, a prompt reuses the
+        slot sharing the longest prefix if that covers at least half of the prompt;
+        otherwise it takes the least recently used slot and shares nothing.
+        """
+        best, best_slot = 0, None
+        for i, cached in enumerate(self._slots):
+            shared = common_prefix(cached, tokens)
+            if shared > best and shared * 2 >= len(tokens):
+                best, best_slot = shared, i
+        if best_slot is not None:
+            del self._slots[best_slot]
+        elif len(self._slots) >= self.kv_slots:
+            del self._slots[0]
+        self._slots.append(tokens + list(generated))
+        return len(tokens) - best
+
+    def _start(self, prompt, reply_tokens=None):
+        text = prompt_text(prompt)
+        # Like num_predict, reply_tokens caps the reply; it never makes it longer
+        words = fake_reply(text, min(reply_tokens, self.reply_tokens) if reply_tokens else self.reply_tokens)
+        tokens = text.split()
+        with self._lock:
+            # Generated tokens stay in the slot after the assistant header, as on a real server
+            prefill = self._prefill(tokens, ["ai:"] + words)
+            self.calls += 1
+            self.prompt_tokens += len(tokens)
+            self.prefill_tokens += prefill
+            self.completion_tokens += len(words)
+        return text, words, prefill
+
+    def _round_trip(self):
+        """Count a round trip; returns its time to first token."""
+        with self._lock:
+            self.round_trips += 1
+            stalled = self.stall_every and self.round_trips % self.stall_every == 0
+        return self.latency + (self.stall_seconds if stalled else 0.0)
+
+    def _prefill_delay(self, prefill):
+        return prefill / self.prefill_tokens_per_second if self.prefill_tokens_per_second else 0.0
+
+    def _token_delay(self):
+        return 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _reply(self, text, words, prefill, started):
+        # As with Ollama, prompt_eval_count only counts the tokens that were actually prefilled
+        content = " ".join(words)
+        metadata = {
+            "model": self.model,
+            "prompt_eval_count": prefill,
+            "prompt_eval_duration": int(self._prefill_delay(prefill) * 1e9),
+            "eval_count": len(words),
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+        }
+        usage = {"input_tokens": prefill, "output_tokens": len(words),
+                 "total_tokens": prefill + len(words)}
+        return LLMReply(content, metadata, usage)
+
+    # ---- sync ----
+    def invoke(self, prompt, num_predict=None, **kwargs):
+        started = time.perf_counter()
+        latency = self._round_trip()
+        text, words, prefill = self._start(prompt, num_predict)
+        time.sleep(latency + self._prefill_delay(prefill) + len(words) * self._token_delay())
+        return self._reply(text, words, prefill, started)
+
+    def stream(self, prompt, num_predict=None, **kwargs):
+        started = time.perf_counter()
+        latency = self._round_trip()
+        text, words, prefill = self._start(prompt, num_predict)
+        time.sleep(latency + self._prefill_delay(prefill))
+        for i, word in enumerate(words):
+            time.sleep(self._token_delay())
+            yield LLMReply(word if i == 0 else " " + word)
+        yield LLMReply("", self._reply(text, words, prefill, started).response_metadata)
+
+    def batch(self, prompts, num_predict=None, **kwargs):
+        if not self.native_batch:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max(len(prompts), 1)) as pool:
+                return list(pool.map(lambda p: self.invoke(p, num_predict), prompts))
+        # One round trip for the whole batch; decode time of the longest reply
+        started = time.perf_counter()
+        latency = self._round_trip()
+        started_calls = [self._start(p, num_predict) for p in prompts]
+        longest = max((len(w) for _, w, _ in started_calls), default=0)
+        prefill_delay = self._prefill_delay(sum(p for _, _, p in started_calls))
+        time.sleep(latency + prefill_delay + longest * self._token_delay())
+        return [self._reply(text, words, prefill, started) for text, words, prefill in started_calls]
+
+    # ---- async ----
+    async def ainvoke(self, prompt, num_predict=None, **kwargs):
+        started = time.perf_counter()
+        latency = self._round_trip()
+        text, words, prefill = self._start(prompt, num_predict)
+        await asyncio.sleep(latency + self._prefill_delay(prefill) + len(words) * self._token_delay())
+        return self._reply(text, words, prefill, started)
+
+    async def astream(self, prompt, num_predict=None, **kwargs):
+        started = time.perf_counter()
+        latency = self._round_trip()
+        text, words, prefill = self._start(prompt, num_predict)
+        await asyncio.sleep(latency + self._prefill_delay(prefill))
+        for i, word in enumerate(words):
+            await asyncio.sleep(self._token_delay())
+            yield LLMReply(word if i == 0 else " " + word)
+        yield LLMReply("", self._reply(text, words, prefill, started).response_metadata)
+
+    async def abatch(self, prompts, num_predict=None, **kwargs):
+        if not self.native_batch:
+            return list(await asyncio.gather(*(self.ainvoke(p, num_predict) for p in prompts)))
+        started = time.perf_counter()
+        latency = self._round_trip()
+        started_calls = [self._start(p, num_predict) for p in prompts]
+        longest = max((len(w) for _, w, _ in started_calls), default=0)
+        prefill_delay = self._prefill_delay(sum(p for _, _, p in started_calls))
+        await asyncio.sleep(latency + prefill_delay + longest * self._token_delay())
+        return [self._reply(text, words, prefill, started) for text, words, prefill in started_calls]
+
+    def with_budget(self, num_predict=None, stop=()):
+        """View capped at num_predict tokens (stop sequences are ignored: fake replies are one line)."""
+        return CappedChatModel(self, num_predict) if num_predict else self
+
+
+class CappedChatModel:
+    """A FakeChatModel generating at most num_predict tokens per reply; counters stay on the model."""
+
+    def __init__(self, model, num_predict):
+        self.inner = model
+        self.num_predict = num_predict
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def invoke(self, prompt, **kwargs):
+        return self.inner.invoke(prompt, num_predict=self.num_predict, **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        return self.inner.stream(prompt, num_predict=self.num_predict, **kwargs)
+
+    def batch(self, prompts, **kwargs):
+        return self.inner.batch(prompts, num_predict=self.num_predict, **kwargs)
+
+    async def ainvoke(self, prompt, **kwargs):
+        return await self.inner.ainvoke(prompt, num_predict=self.num_predict, **kwargs)
+
+    def astream(self, prompt, **kwargs):
+        return self.inner.astream(prompt, num_predict=self.num_predict, **kwargs)
+
+    async def abatch(self, prompts, **kwargs):
+        return await self.inner.abatch(prompts, num_predict=self.num_predict, **kwargs)
+
+# =========================
+# HTTP stand-in for the Ollama server
+def make_handler(model):
+    class FakeOllamaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if self.path not in ("/api/chat", "/api/generate"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/chat":
+                prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            else:
+                prompt = body.get("prompt", "")
+            num_predict = body.get("options", {}).get("num_predict")
+            stream = body.get("stream", True)
+
+            started = time.perf_counter()
+            text, words, prefill = model._start(prompt, num_predict)
+            time.sleep(model.latency + model._prefill_delay(prefill))
+
+            def chunk(content, done=False):
+                payload = {"model": body.get("model", model.model), "created_at": "", "done": done}
+                if self.path == "/api/chat":
+                    payload["message"] = {"role": "assistant", "content": content}
+                else:
+                    payload["response"] = content
+                if done:
+                    payload.update(model._reply(text, words, prefill, started).response_metadata)
+                return (json.dumps(payload) + "\n").encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            if stream:
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    time.sleep(model._token_delay())
+                    self._write_chunk(chunk(word if i == 0 else " " + word))
+                self._write_chunk(chunk("", done=True))
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                time.sleep(len(words) * model._token_delay())
+                data = chunk(" ".join(words), done=True)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return FakeOllamaHandler
+
+
+def serve(host="127.0.0.1", port=11435, model=None, background=False):
+    """Start the fake Ollama HTTP server; with background=True returns the running server."""
+    server = ThreadingHTTPServer((host, port), make_handler(model or FakeChatModel()))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0)
+    parser.add_argument("--reply-tokens", type=int, default=24)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0,
+                        help="prompt prefill speed for uncached tokens (default: free)")
+    args = parser.parse_args(argv)
+
+    model = FakeChatModel(args.latency, args.tokens_per_second, args.reply_tokens,
+                          prefill_tokens_per_second=args.prefill_tokens_per_second)
+    print(f"Fake Ollama listening on http://{args.host}:{args.port}")
+    serve(args.host, args.port, model)
+
+
+if __name__ == "__main__":
+    main()
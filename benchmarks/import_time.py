@@ -0,0 +1,71 @@
+"""
+Import-time budget for the core modules.
+
+Each module is imported in a fresh interpreter; the best of several runs is
+compared against BUDGET_MS, and heavy UI/LLM packages must not be loaded.
+
+    python -m benchmarks.import_time [--budget-ms 50] [--repeats 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["agents", "message_renderer", "llm_client", "negotiation_logic",
+           "run_negotiation_terminal", "tournament"]
+HEAVY_MODULES = ["streamlit", "langchain_core", "langchain_community", "langchain_ollama", "numpy"]
+BUDGET_MS = 50
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, repeats=5):
+    """Best-of-N import time (ms) in a fresh interpreter, plus heavy modules it pulled in."""
+    best, heavy = None, []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        sample = json.loads(out.strip().splitlines()[-1])
+        if best is None or sample["ms"] < best:
+            best = sample["ms"]
+        heavy = sample["heavy"]
+    return best, heavy
+
+
+def run(modules=MODULES, budget_ms=BUDGET_MS, repeats=5):
+    results = {}
+    for module in modules:
+        ms, heavy = measure(module, repeats)
+        results[module] = {"ms": ms, "heavy": heavy, "ok": ms <= budget_ms and not heavy}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run(budget_ms=args.budget_ms, repeats=args.repeats)
+    for module, r in results.items():
+        status = "ok" if r["ok"] else "OVER BUDGET"
+        heavy = f"  loads {', '.join(r['heavy'])}" if r["heavy"] else ""
+        print(f"{module:<28} {r['ms']:7.1f} ms  {status}{heavy}")
+
+    if not all(r["ok"] for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Throughput and latency benchmarks against a local fake LLM.
+
+    python -m benchmarks.run [--negotiations 20] [--latency 0.02] [--tokens-per-second 200]
+    python -m benchmarks.run --compare benchmarks/results/<older>.json
+
+Results are written to benchmarks/results/<label>.json (label defaults to the
+current git commit), so runs from different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import import_time
+from benchmarks.fake_ollama import FakeChatModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SCENARIO = dict(product="Smartphone", market_price=50000,
+                buyer_name="Alice", buyer_personality="Diplomatic Buyer", buyer_budget=40000,
+                seller_name="Bob", seller_personality="Aggressive Trader", seller_min_price=35000)
+
+# Metrics where a bigger number is better; everything else is treated as lower-is-better
+HIGHER_IS_BETTER = ("negotiations_per_sec", "calls_per_sec", "deal_rate", "buyer_surplus_per_deal")
+# Millisecond metrics moving less than this are noise, not regressions
+MIN_MS_DELTA = 2.0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile, no NumPy needed."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def varied_scenario(i):
+    """SCENARIO with slightly different limits, so prompts never repeat exactly and
+    the fake model's prefix cache only rewards genuinely shared prefixes."""
+    return dict(SCENARIO, buyer_budget=SCENARIO["buyer_budget"] + 37 * (i % 50),
+                seller_min_price=SCENARIO["seller_min_price"] + 23 * (i % 50))
+
+
+def latency_stats(prefix, seconds):
+    return {f"{prefix}_p50_ms": percentile(seconds, 50) * 1000,
+            f"{prefix}_p99_ms": percentile(seconds, 99) * 1000}
+
+# =========================
+# Benchmarks
+def run_negotiation_warmup(llm, renderer="llm", policy=None):
+    """One untimed run so lazy imports (langchain prompt templates) and policy solving aren't measured."""
+    from negotiation_logic import run_negotiation
+
+    run_negotiation(**SCENARIO, renderer=renderer, llm=llm, policy=policy)
+
+
+def bench_engine(llm, negotiations, renderer="llm", pipeline=False, policy=None, turn_timeout=None):
+    """negotiation_logic engine: throughput, LLM usage and per-turn latency."""
+    from negotiation_logic import stream_negotiation
+
+    run_negotiation_warmup(llm, renderer, policy)
+    llm.reset()
+    turn_seconds, deals, buyer_surplus, degraded = [], 0, 0.0, 0
+    started = time.perf_counter()
+    for i in range(negotiations):
+        scenario = varied_scenario(i)
+        for event in stream_negotiation(**scenario, renderer=renderer, llm=llm, stream=False,
+                                        pipeline=pipeline, policy=policy, turn_timeout=turn_timeout):
+            if event["type"] == "turn_start":
+                turn_started = time.perf_counter()
+            elif event["type"] == "turn_end":
+                turn_seconds.append(time.perf_counter() - turn_started)
+        degraded += len(event["result"].get("degraded", ()))
+        if event["result"]["status"] == "Deal Reached":
+            deals += 1
+            buyer_surplus += scenario["buyer_budget"] - event["result"]["price"]
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "negotiations_per_sec": negotiations / elapsed,
+        "llm_calls_per_negotiation": llm.calls / negotiations,
+        "prompt_tokens_per_negotiation": llm.prompt_tokens / negotiations,
+        "prefill_tokens_per_negotiation": llm.prefill_tokens / negotiations,
+        "completion_tokens_per_negotiation": llm.completion_tokens / negotiations,
+        "turns_per_negotiation": len(turn_seconds) / negotiations,
+        "deal_rate": deals / negotiations,
+        "buyer_surplus_per_deal": buyer_surplus / deals if deals else 0.0,
+        "degraded_turn_rate": degraded / len(turn_seconds),
+    }
+    result.update(latency_stats("turn", turn_seconds))
+    return result
+
+
+def bench_async_engine(llm, negotiations, max_concurrency=16, max_batch_size=None):
+    """negotiation_logic.arun_negotiations: many negotiations in flight against one server."""
+    from negotiation_logic import arun_negotiations
+
+    llm.reset()
+    started = time.perf_counter()
+    asyncio.run(arun_negotiations([SCENARIO] * negotiations, llm=llm, max_concurrency=max_concurrency,
+                                  max_batch_size=max_batch_size))
+    elapsed = time.perf_counter() - started
+    return {
+        "negotiations_per_sec": negotiations / elapsed,
+        "llm_calls_per_negotiation": llm.calls / negotiations,
+        "round_trips_per_negotiation": llm.round_trips / negotiations,
+    }
+
+
+def bench_routed(negotiations, latency, tokens_per_second):
+    """routing.RoutingRenderer: per-route calls, latency and tokens with a 4x faster small model."""
+    from llm_client import DEFAULT_MODEL, LLMRegistry, get_registry, set_registry
+    from negotiation_logic import run_negotiation
+    from routing import RoutingRenderer
+
+    def fake_model(model, temperature, num_predict=None, **params):
+        speed = tokens_per_second * (1 if model == DEFAULT_MODEL else 4)
+        return FakeChatModel(latency=latency, tokens_per_second=speed, reply_tokens=min(24, num_predict or 24),
+                             model=model, temperature=temperature)
+
+    previous = get_registry()
+    set_registry(LLMRegistry(factory=fake_model))
+    try:
+        renderer = RoutingRenderer()
+        started = time.perf_counter()
+        for i in range(negotiations):
+            run_negotiation(**varied_scenario(i), renderer=renderer)
+        elapsed = time.perf_counter() - started
+    finally:
+        set_registry(previous)
+
+    result = {"negotiations_per_sec": negotiations / elapsed}
+    for name, route in renderer.report().items():
+        result[f"{name}_calls_per_negotiation"] = route["calls"] / negotiations
+        result[f"{name}_mean_latency_ms"] = route["mean_latency_ms"]
+        result[f"{name}_completion_tokens_per_negotiation"] = route["completion_tokens"] / negotiations
+    return result
+
+
+def bench_terminal(negotiations):
+    """Heuristic engine from run_negotiation_terminal (no LLM)."""
+    import random
+    from run_negotiation_terminal import run_negotiation
+
+    random.seed(0)
+    turn_seconds = []
+    started = time.perf_counter()
+    for _ in range(negotiations):
+        turn_started = time.perf_counter()
+        result = run_negotiation(**SCENARIO, verbose=False)
+        turns = len(result["history"])
+        turn_seconds.extend([(time.perf_counter() - turn_started) / turns] * turns)
+    elapsed = time.perf_counter() - started
+
+    result = {"negotiations_per_sec": negotiations / elapsed}
+    result.update(latency_stats("turn", turn_seconds))
+    return result
+
+
+def bench_decide(llm, calls):
+    """BuyerAgent.decide / SellerAgent.decide with message generation."""
+    from agents import BuyerAgent, SellerAgent
+
+    run_negotiation_warmup(llm)
+    llm.reset()
+    seconds = []
+    started = time.perf_counter()
+    for i in range(calls):
+        buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000, llm=llm)
+        seller = SellerAgent("Bob", "Aggressive Trader", 35000, llm=llm)
+        seller.observe_buyer("", offer=36000)
+        buyer.observe_seller("", offer=45000)
+        for decide in (buyer.decide, seller.decide):
+            call_started = time.perf_counter()
+            decide()
+            seconds.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "calls_per_sec": len(seconds) / elapsed,
+        "llm_calls_per_decide": llm.calls / len(seconds),
+    }
+    result.update(latency_stats("decide", seconds))
+    return result
+
+
+def bench_startup():
+    """Fresh-interpreter import times of the core modules."""
+    return {f"import_{module}_ms": r["ms"] for module, r in import_time.run(repeats=3).items()}
+
+
+def run_all(negotiations=20, latency=0.02, tokens_per_second=200.0, prefill_tokens_per_second=2000.0):
+    from message_renderer import ChatRenderer
+    from prompts import PromptLibrary
+
+    llm = FakeChatModel(latency=latency, tokens_per_second=tokens_per_second,
+                        prefill_tokens_per_second=prefill_tokens_per_second)
+    stalling = FakeChatModel(latency=latency, tokens_per_second=tokens_per_second,
+                             prefill_tokens_per_second=prefill_tokens_per_second, stall_every=5, stall_seconds=0.5)
+    # a model that goes on for 150 tokens unless num_predict stops it
+    rambling = FakeChatModel(latency=latency, tokens_per_second=tokens_per_second,
+                             prefill_tokens_per_second=prefill_tokens_per_second, reply_tokens=150)
+    return {
+        "engine_llm": bench_engine(llm, negotiations),
+        # one-off prompts per turn: the "before" for chat-prefix reuse
+        "engine_oneshot": bench_engine(llm, negotiations, renderer="oneshot"),
+        "engine_pipelined": bench_engine(llm, negotiations, pipeline=True),
+        "engine_oneshot_pipelined": bench_engine(llm, negotiations, renderer="oneshot", pipeline=True),
+        # every fifth generation stalls past the 250 ms turn budget and falls back to a template
+        "engine_deadline": bench_engine(stalling, negotiations, turn_timeout=0.25),
+        "engine_routed": bench_routed(negotiations, latency, tokens_per_second),
+        "engine_uncapped": bench_engine(rambling, negotiations,
+                                        renderer=ChatRenderer(prompts=PromptLibrary(budgets={}))),
+        "engine_capped": bench_engine(rambling, negotiations),
+        "engine_headless": bench_engine(llm, negotiations * 50, renderer="none"),
+        "engine_policy_headless": bench_engine(llm, negotiations * 50, renderer="none", policy="optimal"),
+        "engine_async": bench_async_engine(llm, negotiations * 5),
+        # ChatOllama has no batch endpoint: a batch is still one request per prompt
+        "engine_async_batched": bench_async_engine(llm, negotiations * 5, max_batch_size=16),
+        # a server with a real batch endpoint: one round trip per batch
+        "engine_async_batched_native": bench_async_engine(
+            FakeChatModel(latency=latency, tokens_per_second=tokens_per_second,
+                          prefill_tokens_per_second=prefill_tokens_per_second, native_batch=True),
+            negotiations * 5, max_batch_size=16),
+        "terminal_heuristic": bench_terminal(negotiations * 50),
+        "agent_decide": bench_decide(llm, negotiations),
+        "startup": bench_startup(),
+    }
+
+# =========================
+# Saving and comparing
+def git_label():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y%m%d-%H%M%S")
+
+
+def save(report, label):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def compare(baseline, current, threshold=0.10):
+    """Lines describing each metric's change; regressions beyond threshold are flagged."""
+    lines, regressions = [], 0
+    for bench, metrics in current["results"].items():
+        for name, value in metrics.items():
+            old = baseline["results"].get(bench, {}).get(name)
+            if old is None or value is None or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if name in HIGHER_IS_BETTER else change
+            noise = name.endswith("_ms") and abs(value - old) < MIN_MS_DELTA
+            flag = "  REGRESSION" if worse > threshold and not noise else ""
+            regressions += bool(flag)
+            lines.append(f"{bench}.{name}: {old:.3f} -> {value:.3f} ({change:+.1%}){flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Negotiation benchmarks against a fake LLM")
+    parser.add_argument("--negotiations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="fake LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=2000.0,
+                        help="fake LLM prefill speed for prompt tokens outside the cached prefix")
+    parser.add_argument("--label", help="results file name (default: git commit)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (fraction)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    report = {
+        "label": args.label or git_label(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {"negotiations": args.negotiations, "latency": args.latency,
+                     "tokens_per_second": args.tokens_per_second,
+                     "prefill_tokens_per_second": args.prefill_tokens_per_second},
+        "results": run_all(args.negotiations, args.latency, args.tokens_per_second,
+                           args.prefill_tokens_per_second),
+    }
+
+    for bench, metrics in report["results"].items():
+        print(bench)
+        for name, value in metrics.items():
+            print(f"  {name:<36} {value:12.3f}")
+    print(f"\nSaved to {save(report, report['label'])}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            lines, regressions = compare(json.load(f), report, args.threshold)
+        print("\n" + "\n".join(lines))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
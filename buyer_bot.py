@@ -1,76 +1,13 @@
 import streamlit as st
-import re
 import time
-from langchain_community.chat_models import ChatOllama
-
-# -------------------- Buyer Agent --------------------
-class BuyerAgent:
-    def __init__(self, name, personality_type, budget):
-        self.name = name
-        self.personality_type = personality_type
-        self.budget = budget
-        self.round = 0
-        self.latest_seller_offer = None
-        self.last_offer = None
-        self.llm = ChatOllama(model="llama3.1:8b", temperature=0.6)
-
-    def observe_seller(self, message: str):
-        """Extract numeric offer from seller’s message if present"""
-        matches = re.findall(r"\d+\.?\d*", message.replace(',', ''))
-        if matches:
-            self.latest_seller_offer = float(matches[0])
-
-    def decide(self, market_price=None, max_rounds=6):
-        """
-        Decide buyer action based on seller offer.
-        Ensures deal always closes by final round.
-        """
-        offer_to_consider = self.latest_seller_offer or market_price
-
-        # --- If within budget early ---
-        if offer_to_consider and offer_to_consider <= self.budget:
-            prompt = f"""
-            You are a {self.personality_type} buyer.
-            Seller offered ₹{offer_to_consider}.
-            Since this is within budget, agree politely in 1-2 short lines.
-            """
-            message = self.llm.invoke(prompt).content
-            self.round += 1
-            return {"action": "accept", "offer": offer_to_consider, "message": message}
-
-        # --- If last round → force accept ---
-        if self.round + 1 >= max_rounds:
-            final_offer = offer_to_consider or self.budget
-            prompt = f"""
-            You are a {self.personality_type} buyer.
-            It’s the final round. Politely accept ₹{final_offer} in 1-2 short lines.
-            """
-            message = self.llm.invoke(prompt).content
-            self.round += 1
-            return {"action": "accept", "offer": final_offer, "message": message}
-
-        # --- Otherwise, progressive counter-offer ---
-        if offer_to_consider:
-            concession_factor = 0.9 + (0.02 * self.round)  # buyer concedes more each round
-            counter_offer = min(offer_to_consider * concession_factor, self.budget)
-        else:
-            counter_offer = self.budget * (0.7 + 0.05 * self.round)
-
-        prompt = f"""
-        You are a {self.personality_type} buyer.
-        Seller offered ₹{offer_to_consider or 0}.
-        Make a short counter-offer around ₹{counter_offer:.2f}.
-        Respond in 1–2 simple lines only.
-        """
-        message = self.llm.invoke(prompt).content
-        self.last_offer = counter_offer
-        self.round += 1
-        return {"action": "counter", "offer": counter_offer, "message": message}
-
+from agents import BuyerAgent
 
 # -------------------- Typing Effect --------------------
-def typing_effect(text, delay=0.03):
+def typing_effect(text, delay=0.0):
     placeholder = st.empty()
+    if not delay:
+        placeholder.markdown(text)
+        return
     typed = ""
     for char in text:
         typed += char
@@ -0,0 +1,121 @@
+"""
+Checkpoint stores for negotiations that must survive a crash or restart.
+
+The engine saves one JSON state per negotiation after every turn: both
+agents' snapshots and chats with the model, the history as compact columns,
+and the last message and offer. resume_negotiation() in negotiation_logic picks up at the next turn
+without regenerating anything. Stores only need save/load/delete:
+
+    FileCheckpointStore("checkpoints/")     one JSON file per negotiation
+    SqliteCheckpointStore("checkpoints.db") one row per negotiation
+"""
+import json
+import os
+import re
+import threading
+import time
+
+SAFE_ID = re.compile(r"^[\w.-]+$")
+
+
+class MemoryCheckpointStore:
+    """Checkpoints in a dict (tests and single-process use)."""
+
+    def __init__(self):
+        self._states = {}
+
+    def save(self, negotiation_id, state):
+        self._states[negotiation_id] = json.dumps(state)
+
+    def load(self, negotiation_id):
+        raw = self._states.get(negotiation_id)
+        return None if raw is None else json.loads(raw)
+
+    def delete(self, negotiation_id):
+        self._states.pop(negotiation_id, None)
+
+    def ids(self):
+        return list(self._states)
+
+
+class FileCheckpointStore:
+    """One <id>.json file per negotiation; writes go through a temp file and os.replace."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, negotiation_id):
+        if not SAFE_ID.match(negotiation_id):
+            raise ValueError(f"Invalid negotiation id: {negotiation_id!r}")
+        return os.path.join(self.directory, f"{negotiation_id}.json")
+
+    def save(self, negotiation_id, state):
+        path = self._path(negotiation_id)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def load(self, negotiation_id):
+        try:
+            with open(self._path(negotiation_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def delete(self, negotiation_id):
+        try:
+            os.remove(self._path(negotiation_id))
+        except FileNotFoundError:
+            pass
+
+    def ids(self):
+        return [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")]
+
+
+class SqliteCheckpointStore:
+    """Checkpoints as rows of a SQLite file (WAL mode), safe to share between processes."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def save(self, negotiation_id, state):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO checkpoints (id, state, updated_at) VALUES (?, ?, ?)",
+                               (negotiation_id, json.dumps(state, separators=(",", ":")), time.time()))
+            self._conn.commit()
+
+    def load(self, negotiation_id):
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM checkpoints WHERE id = ?", (negotiation_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def delete(self, negotiation_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE id = ?", (negotiation_id,))
+            self._conn.commit()
+
+    def ids(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM checkpoints")]
+
+    def close(self):
+        self._conn.close()
+
+
+def open_checkpoints(path):
+    """SqliteCheckpointStore for *.db / *.sqlite paths, FileCheckpointStore (a directory) otherwise."""
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteCheckpointStore(path)
+    return FileCheckpointStore(path)
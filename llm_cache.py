@@ -0,0 +1,268 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+OFFER_PATTERN = re.compile(r"₹\s?(\d[\d,]*(?:\.\d+)?)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class LLMReply:
+    """Minimal stand-in for an AIMessage/AIMessageChunk: the generated text plus metadata."""
+
+    __slots__ = ("content", "response_metadata", "usage_metadata")
+
+    def __init__(self, content, response_metadata=None, usage_metadata=None):
+        self.content = content
+        self.response_metadata = response_metadata or {}
+        self.usage_metadata = usage_metadata
+
+    def __repr__(self):
+        return f"LLMReply({self.content!r})"
+
+
+def prompt_text(prompt):
+    """Plain text of a string, PromptValue or list of messages."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(f"{getattr(m, 'type', '')}: {getattr(m, 'content', m)}" for m in prompt)
+    return str(prompt)
+
+# =========================
+# Response cache
+class ResponseCache:
+    """
+    LLM response cache: an in-memory LRU in front of an optional SQLite file.
+
+    Keys are built from model, temperature and the prompt with whitespace collapsed.
+    With offer_granularity set, ₹ amounts in the prompt are rounded to that step,
+    so "₹14,012.5" and "₹14,000" share an entry when the granularity is 100.
+    ttl (seconds) expires entries in both tiers; max_memory_entries and
+    max_disk_entries bound the tiers, evicting least recently used entries.
+    """
+
+    def __init__(self, path=None, max_memory_entries=1024, max_disk_entries=100_000,
+                 ttl=None, offer_granularity=None):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.offer_granularity = offer_granularity
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._memory = OrderedDict()  # key -> (content, created_at)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+        if path:
+            import sqlite3
+
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn.commit()
+
+    # ---- keys ----
+    def normalize_prompt(self, prompt):
+        text = WHITESPACE_PATTERN.sub(" ", prompt_text(prompt)).strip()
+        if self.offer_granularity:
+            step = self.offer_granularity
+
+            def round_offer(match):
+                value = float(match.group(1).replace(",", ""))
+                return f"₹{round(value / step) * step:g}"
+
+            text = OFFER_PATTERN.sub(round_offer, text)
+        return text
+
+    def make_key(self, model, temperature, prompt):
+        raw = f"{model}\x1f{temperature}\x1f{self.normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ---- lookups ----
+    def _expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key):
+        """Cached text for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT content, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, row[0], row[1])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return row[0]
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, content):
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, content, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, content, now, now),
+                )
+                self._conn.commit()
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune_disk(now)
+
+    def _remember(self, key, content, created_at):
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self, now):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        cursor = self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+        self.evictions += max(cursor.rowcount, 0)
+        self._conn.commit()
+
+    def prune(self):
+        """Drop expired and over-limit entries from the disk tier now."""
+        if self._conn is not None:
+            with self._lock:
+                self._prune_disk(time.time())
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+# =========================
+# Cached client
+class CachedLLM:
+    """Chat model wrapper that answers repeated prompts from a ResponseCache."""
+
+    def __init__(self, llm, cache):
+        self.llm = llm
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def with_budget(self, num_predict=None, stop=()):
+        from llm_client import with_budget
+
+        return CachedLLM(with_budget(self.llm, num_predict, stop), self.cache)
+
+    def _key(self, prompt):
+        return self.cache.make_key(getattr(self.llm, "model", ""), getattr(self.llm, "temperature", None), prompt)
+
+    def invoke(self, prompt, **kwargs):
+        key = self._key(prompt)
+        content = self.cache.get(key)
+        if content is None:
+            content = self.llm.invoke(prompt, **kwargs).content
+            self.cache.set(key, content)
+        return LLMReply(content)
+
+    async def ainvoke(self, prompt, **kwargs):
+        key = self._key(prompt)
+        content = self.cache.get(key)
+        if content is None:
+            content = (await self.llm.ainvoke(prompt, **kwargs)).content
+            self.cache.set(key, content)
+        return LLMReply(content)
+
+    def stream(self, prompt, **kwargs):
+        key = self._key(prompt)
+        content = self.cache.get(key)
+        if content is not None:
+            yield LLMReply(content)
+            return
+        parts = []
+        for chunk in self.llm.stream(prompt, **kwargs):
+            parts.append(chunk.content)
+            yield chunk
+        self.cache.set(key, "".join(parts))
+
+    async def astream(self, prompt, **kwargs):
+        key = self._key(prompt)
+        content = self.cache.get(key)
+        if content is not None:
+            yield LLMReply(content)
+            return
+        parts = []
+        async for chunk in self.llm.astream(prompt, **kwargs):
+            parts.append(chunk.content)
+            yield chunk
+        self.cache.set(key, "".join(parts))
+
+
+def attach_cache(cache, *agents):
+    """Route the agents' own LLM calls through the cache."""
+    for agent in agents:
+        if not isinstance(agent.llm, CachedLLM):
+            agent.llm = CachedLLM(agent.llm, cache)
+
+
+_open_caches = {}
+
+
+def open_cache(path, **options):
+    """One ResponseCache per path per process (used by pool workers)."""
+    if path not in _open_caches:
+        _open_caches[path] = ResponseCache(path, **options)
+    return _open_caches[path]
@@ -0,0 +1,393 @@
+import threading
+import weakref
+
+DEFAULT_MODEL = "llama3.1:8b"
+DEFAULT_TEMPERATURE = 0.6
+# How long Ollama keeps the model (and its prompt-prefix KV cache) loaded between calls
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def make_llm(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, keep_alive=DEFAULT_KEEP_ALIVE, **params):
+    """
+    Build an Ollama chat client (imported lazily).
+    Prefers langchain_ollama, whose clients keep a pooled keep-alive HTTP connection
+    for their lifetime; falls back to langchain_community.
+    """
+    try:
+        from langchain_ollama import ChatOllama
+    except ImportError:
+        from langchain_community.chat_models import ChatOllama
+    return ChatOllama(model=model, temperature=temperature, keep_alive=keep_alive, **params)
+
+def token_usage(reply):
+    """(prompt_tokens, completion_tokens) reported with a reply or final stream chunk, else (None, None)."""
+    usage = getattr(reply, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    metadata = getattr(reply, "response_metadata", None) or {}
+    return metadata.get("prompt_eval_count"), metadata.get("eval_count")
+
+def with_budget(llm, num_predict=None, stop=()):
+    """
+    llm capped at num_predict generated tokens and stopping at any of stop.
+    Clients with their own with_budget() (the wrappers below, benchmark fakes)
+    apply it themselves; pydantic clients such as ChatOllama get a copy with the
+    caps (made once per budget, sharing the original's HTTP connection pool,
+    never loosening a cap it already has). Other clients come back as they are.
+    """
+    if num_predict is None and not stop:
+        return llm
+    own = getattr(type(llm), "with_budget", None)  # not via a wrapper's __getattr__
+    if own is not None:
+        return own(llm, num_predict, stop)
+    if not hasattr(llm, "model_copy"):
+        return llm
+    key = (num_predict, tuple(stop))
+    copies = _budgeted.get(id(llm))
+    capped = copies.get(key) if copies is not None else None
+    if capped is None:
+        current = getattr(llm, "num_predict", None)
+        if current is not None and num_predict is not None:
+            num_predict = min(current, num_predict)
+        existing = list(getattr(llm, "stop", None) or ())
+        update = {"stop": existing + [s for s in stop if s not in existing]}
+        if num_predict is not None:
+            update["num_predict"] = num_predict
+        capped = llm.model_copy(update=update)
+        if copies is None:
+            try:
+                # Dropped with the client, before its id can be reused by another one
+                weakref.finalize(llm, _budgeted.pop, id(llm), None)
+            except TypeError:
+                return capped  # can't tell when it goes away: don't keep copies for it
+            copies = _budgeted.setdefault(id(llm), {})
+        capped = copies.setdefault(key, capped)
+    return capped
+
+
+# id(client) -> {(num_predict, stop): capped copy}. Keyed by id, not a WeakKeyDictionary,
+# because pydantic clients are unhashable; the entry goes when the client does.
+_budgeted = {}
+
+# =========================
+# Shared clients
+class LLMRegistry:
+    """
+    Hands out one shared client per (model, temperature, other params) so
+    agents, engines and UIs reuse the same connection pool instead of
+    building a client per agent.
+    """
+
+    def __init__(self, factory=make_llm):
+        self.factory = factory
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, **params):
+        key = (model, temperature, repr(sorted(params.items())))
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._clients[key] = self.factory(model=model, temperature=temperature, **params)
+        return client
+
+    def register(self, llm, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, **params):
+        """Use a ready-made client (e.g. a wrapped or fake one) for these settings."""
+        with self._lock:
+            self._clients[(model, temperature, repr(sorted(params.items())))] = llm
+        return llm
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+_registry = LLMRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def set_registry(registry):
+    """Swap the process-wide registry (tests, benchmarks, custom factories)."""
+    global _registry
+    _registry = registry
+
+
+def get_llm(model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE, **params):
+    """Shared client from the process-wide registry."""
+    return _registry.get(model=model, temperature=temperature, **params)
+
+# =========================
+# Concurrency limit
+class ConcurrencyLimitedLLM:
+    """
+    Wraps a chat model so at most max_concurrency calls run at once,
+    whether they come from threads (invoke/stream) or coroutines (ainvoke/astream).
+    A batch()/abatch() takes one slot if the client sends it as one request
+    (native_batch = True on the client), otherwise one slot per prompt: ChatOllama's
+    batch is one request per prompt, and those load the server like any others.
+    Share one instance across negotiations to cap load on a single Ollama server.
+    """
+
+    def __init__(self, llm, max_concurrency=8):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self._thread_semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio semaphores belong to one event loop, so keep one per loop
+        self._loop_semaphores = weakref.WeakKeyDictionary()
+
+    def __getattr__(self, name):
+        # model, temperature, etc. of the wrapped client
+        return getattr(self.llm, name)
+
+    def _async_semaphore(self):
+        import asyncio  # keeps `import llm_client` light for sync callers
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._loop_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._loop_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def invoke(self, prompt, **kwargs):
+        with self._thread_semaphore:
+            return self.llm.invoke(prompt, **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        with self._thread_semaphore:
+            yield from self.llm.stream(prompt, **kwargs)
+
+    def batch(self, prompts, **kwargs):
+        if not getattr(self.llm, "native_batch", False):
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max(min(len(prompts), self.max_concurrency), 1)) as pool:
+                return list(pool.map(lambda prompt: self.invoke(prompt, **kwargs), prompts))
+        with self._thread_semaphore:
+            return self.llm.batch(prompts, **kwargs)
+
+    async def ainvoke(self, prompt, **kwargs):
+        async with self._async_semaphore():
+            return await self.llm.ainvoke(prompt, **kwargs)
+
+    async def abatch(self, prompts, **kwargs):
+        if not getattr(self.llm, "native_batch", False):
+            import asyncio
+
+            return list(await asyncio.gather(*(self.ainvoke(prompt, **kwargs) for prompt in prompts)))
+        async with self._async_semaphore():
+            return await self.llm.abatch(prompts, **kwargs)
+
+    async def astream(self, prompt, **kwargs):
+        async with self._async_semaphore():
+            async for chunk in self.llm.astream(prompt, **kwargs):
+                yield chunk
+
+    def wrap(self, llm):
+        """The same slots (shared semaphores) in front of another client, e.g. another model on the server."""
+        limited = object.__new__(ConcurrencyLimitedLLM)
+        limited.__dict__.update(self.__dict__, llm=llm)
+        return limited
+
+    def with_budget(self, num_predict=None, stop=()):
+        """The same slots in front of the capped client."""
+        return self.wrap(with_budget(self.llm, num_predict, stop))
+
+# =========================
+# Micro-batching
+class BatchingLLM:
+    """
+    Wraps a chat model so concurrent invoke/ainvoke calls are grouped into
+    micro-batches sent through the client's batch()/abatch(): a batch goes out
+    when it holds max_batch_size prompts or max_wait seconds after its first
+    prompt arrived, whichever comes first. Each caller gets back its own reply.
+    Streaming calls and calls with extra arguments go straight to the client.
+
+    This only saves round trips if the client has a real batch endpoint.
+    ChatOllama has none: LangChain's default batch()/abatch() run the invokes
+    concurrently, one request each, and Ollama's scheduler (OLLAMA_NUM_PARALLEL)
+    does the batching on the server. Against Ollama, expect the same round trips
+    and throughput as max_concurrency unbatched calls (benchmarks/run.py measures
+    both cases with FakeChatModel's native_batch).
+
+    The sync path runs one collector thread and a pool of max_inflight_batches
+    threads, shared with the with_budget() batchers; close() stops them.
+    """
+
+    def __init__(self, llm, max_batch_size=8, max_wait=0.01, max_inflight_batches=4, parent=None):
+        self.llm = llm
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_inflight_batches = max_inflight_batches
+        self.batches = 0
+        self.prompts = 0
+        self._root = parent or self  # owner of the collector thread and pool
+        self._lock = threading.Lock()
+        self._queue = None       # sync callers: (batcher, prompt, Future), drained by the root's collector
+        self._executor = None
+        self._collector = None
+        self._loop_pending = weakref.WeakKeyDictionary()  # event loop -> [(prompt, asyncio future)]
+        self._tasks = set()
+        self._budgeted = {}  # (num_predict, stop) -> BatchingLLM of the capped client
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def stats(self):
+        batches = self.batches + sum(child.batches for child in self._budgeted.values())
+        prompts = self.prompts + sum(child.prompts for child in self._budgeted.values())
+        return {"batches": batches, "prompts": prompts, "mean_batch_size": prompts / batches if batches else 0.0}
+
+    def with_budget(self, num_predict=None, stop=()):
+        """Batcher of the capped client: a prompt is only batched with others under the same caps."""
+        root = self._root
+        key = (num_predict, tuple(stop))
+        child = root._budgeted.get(key)
+        if child is None:
+            with root._lock:
+                child = root._budgeted.get(key)
+                if child is None:
+                    child = root._budgeted[key] = BatchingLLM(with_budget(root.llm, num_predict, stop),
+                                                              root.max_batch_size, root.max_wait,
+                                                              root.max_inflight_batches, parent=root)
+        return child
+
+    def close(self):
+        """Stop the collector thread and wait for the batches in flight (sync path only)."""
+        root = self._root
+        with root._lock:
+            queue, collector, executor = root._queue, root._collector, root._executor
+            root._queue = root._collector = root._executor = None
+        if queue is not None:
+            queue.put(None)
+            collector.join()  # hands its last batch to the pool first
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _count(self, size):
+        with self._lock:
+            self.batches += 1
+            self.prompts += size
+
+    # ---- sync ----
+    def invoke(self, prompt, **kwargs):
+        if kwargs:
+            return self.llm.invoke(prompt, **kwargs)
+        from concurrent.futures import Future
+
+        future = Future()
+        self._root._start_collector().put((self, prompt, future))
+        return future.result()
+
+    def _start_collector(self):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    import queue
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    self._executor = ThreadPoolExecutor(self.max_inflight_batches, thread_name_prefix="llm-batch")
+                    self._queue = queue.Queue()
+                    self._collector = threading.Thread(target=self._collect, args=(self._queue, self._executor),
+                                                       name="llm-batcher", daemon=True)
+                    self._collector.start()
+        return self._queue
+
+    def _collect(self, requests, executor):
+        import queue
+        import time
+
+        while True:
+            first = requests.get()
+            if first is None:
+                return
+            batch, closing = [first], False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            groups = {}  # each batcher's prompts go to its own (capped) client
+            for batcher, prompt, future in batch:
+                groups.setdefault(batcher, []).append((prompt, future))
+            for batcher, group in groups.items():
+                executor.submit(batcher._dispatch, group)
+            if closing:
+                return
+
+    def _dispatch(self, batch):
+        self._count(len(batch))
+        try:
+            replies = self.llm.batch([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), reply in zip(batch, replies):
+            future.set_result(reply)
+
+    def stream(self, prompt, **kwargs):
+        yield from self.llm.stream(prompt, **kwargs)
+
+    # ---- async ----
+    async def ainvoke(self, prompt, **kwargs):
+        if kwargs:
+            return await self.llm.ainvoke(prompt, **kwargs)
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._loop_pending.setdefault(loop, [])
+        pending.append((prompt, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif len(pending) == 1:
+            loop.call_later(self.max_wait, self._flush, loop, pending)
+        return await future
+
+    def _flush(self, loop, batch=None):
+        """Send loop's pending batch; a timer passes its batch and only flushes that one."""
+        if batch is not None and self._loop_pending.get(loop) is not batch:
+            return  # already sent when it filled up; a newer batch has its own timer
+        batch = self._loop_pending.pop(loop, None)
+        if batch:
+            task = loop.create_task(self._adispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _adispatch(self, batch):
+        self._count(len(batch))
+        try:
+            replies = await self.llm.abatch([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), reply in zip(batch, replies):
+            if not future.done():
+                future.set_result(reply)
+
+    async def astream(self, prompt, **kwargs):
+        async for chunk in self.llm.astream(prompt, **kwargs):
+            yield chunk
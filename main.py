@@ -1,7 +1,11 @@
+import argparse
+import sys
 import time
-from negotiation_logic import run_negotiation
+from batch import add_batch_arguments, run_batch
+from negotiation_logic import stream_negotiation
+from tracing import NULL_TRACER, JsonlSink, MultiSink, PrometheusSink, Tracer
 
-def cli_mode():
+def cli_mode(typing_delay=0.0, round_delay=0.0, tracer=None):
     print("\n=== Negotiation CLI Mode (Live Style) ===\n")
 
     # Input fields
@@ -18,39 +22,74 @@ def cli_mode():
     ).strip()
     seller_min_price = float(input("Seller Minimum Price (₹): ").strip())
 
-    # Run negotiation (removed unsupported args)
-    result = run_negotiation(
-        product, market_price,
-        buyer_name, buyer_personality, buyer_budget,
-        seller_name, seller_personality, seller_min_price
-    )
-
     print("\n=== Negotiation Conversation (Live) ===")
     current_round = None
+    pacing = tracer or NULL_TRACER
 
-    for h in result['history']:
-        # New round delay
-        if h['round'] != current_round:
-            # Simulate thinking time — slower early, faster later
-            delay = 1.5 if h['round'] < 5 else 1.0 if h['round'] < 8 else 0.6
-            time.sleep(delay)
-            print(f"\n--- Round {h['round']} ---")
-            current_round = h['round']
-
-        # Typing effect for message
-        prefix = f"{h['speaker']} ({h['personality']}): "
-        print(prefix, end="", flush=True)
-        for char in h['message']:
-            print(char, end="", flush=True)
-            time.sleep(0.015)  # Speed of "typing"
-        print()  # new line after message
+    # Messages are printed token by token as the model generates them
+    for event in stream_negotiation(
+        product, market_price,
+        buyer_name, buyer_personality, buyer_budget,
+        seller_name, seller_personality, seller_min_price, tracer=tracer
+    ):
+        if event["type"] == "turn_start":
+            # New round header (optional pause between rounds)
+            if event["round"] != current_round:
+                if round_delay:
+                    with pacing.span("pacing", event["round"], kind="round_delay"):
+                        time.sleep(round_delay)
+                print(f"\n--- Round {event['round']} ---")
+                current_round = event["round"]
+            print(f"{event['speaker']} ({event['personality']}): ", end="", flush=True)
+        elif event["type"] == "token":
+            if not typing_delay:
+                print(event["text"], end="", flush=True)
+                continue
+            with pacing.span("pacing", current_round, speaker=event["speaker"], kind="typing"):
+                for char in event["text"]:
+                    print(char, end="", flush=True)
+                    time.sleep(typing_delay)
+        elif event["type"] == "turn_end":
+            print()  # new line after message
+        elif event["type"] == "result":
+            result = event["result"]
 
     # Show final result
-    time.sleep(0.8)
     print("\n=== Negotiation Result ===")
     print(f"Status: {result['status']}")
     if 'price' in result:
         print(f"Final Price: ₹{result['price']}")
 
 if __name__ == "__main__":
-    cli_mode()
+    parser = argparse.ArgumentParser(description="Negotiation CLI")
+    parser.add_argument("--typing-delay", type=float, default=0.0,
+                        help="artificial delay per character in seconds (default: off)")
+    parser.add_argument("--round-delay", type=float, default=0.0,
+                        help="artificial pause before each round in seconds (default: off)")
+    parser.add_argument("--trace", help="write per-turn spans to this JSONL file")
+    parser.add_argument("--metrics", help="write Prometheus text-format metrics to this file")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="run scenarios from a JSONL/CSV file (- for stdin) and print JSONL results")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.batch:
+        written, errors = run_batch(args.batch, fmt=args.format, engine="llm", renderer="llm",
+                                    workers=args.workers, window=args.window, history=args.history)
+        print(f"{written} results, {errors} errors", file=sys.stderr)
+        sys.exit(1 if errors else 0)
+
+    sinks = []
+    if args.trace:
+        sinks.append(JsonlSink(args.trace))
+    if args.metrics:
+        sinks.append(PrometheusSink())
+    tracer = Tracer(MultiSink(*sinks)) if sinks else None
+
+    cli_mode(typing_delay=args.typing_delay, round_delay=args.round_delay, tracer=tracer)
+
+    for sink in sinks:
+        if isinstance(sink, JsonlSink):
+            sink.close()
+        else:
+            sink.write(args.metrics)
@@ -0,0 +1,206 @@
+"""
+Marketplace mode: many buyers and sellers of one product meet in an order book.
+
+Every buyer posts a bid at its budget and every seller an ask at its minimum
+price. The book keeps bids in a max-heap and asks in a min-heap, ordered by
+price and then arrival (price-time priority), so adding an order or taking
+the best pair costs O(log n) however many agents are waiting. Only pairs that
+cross (bid >= ask) or nearly cross (bid within `near` of the ask) escalate to
+a real negotiation_logic dialogue; everyone else keeps waiting in the book.
+
+    python marketplace.py --buyers 5000 --sellers 5000 --near 0.05 --renderer none
+"""
+import argparse
+import heapq
+import itertools
+import random
+
+from agents import BUYER_PERSONALITIES, SELLER_PERSONALITIES
+
+
+class Order:
+    """One agent waiting in the book: a buyer's budget (bid) or a seller's minimum price (ask)."""
+
+    __slots__ = ("id", "side", "name", "personality", "price")
+
+    def __init__(self, order_id, side, name, personality, price):
+        self.id = order_id
+        self.side = side
+        self.name = name
+        self.personality = personality
+        self.price = price
+
+
+class OrderBook:
+    """
+    Bids and asks in two heaps keyed by (price, arrival). Cancelled orders stay in
+    their heap until they reach the top and are skipped there (lazy deletion).
+    """
+
+    def __init__(self):
+        self._bids = []    # (-price, id): highest bid first, earliest on ties
+        self._asks = []    # (price, id): lowest ask first, earliest on ties
+        self._orders = {}  # id -> Order, live orders only
+        self._ids = itertools.count()
+
+    def add(self, side, name, personality, price):
+        if side not in ("bid", "ask"):
+            raise ValueError(f"side must be 'bid' or 'ask', not {side!r}")
+        order = Order(next(self._ids), side, name, personality, float(price))
+        self._orders[order.id] = order
+        if side == "bid":
+            heapq.heappush(self._bids, (-order.price, order.id))
+        else:
+            heapq.heappush(self._asks, (order.price, order.id))
+        return order
+
+    def cancel(self, order_id):
+        return self._orders.pop(order_id, None) is not None
+
+    def _top(self, heap):
+        while heap and heap[0][1] not in self._orders:
+            heapq.heappop(heap)
+        return self._orders[heap[0][1]] if heap else None
+
+    def best_bid(self):
+        return self._top(self._bids)
+
+    def best_ask(self):
+        return self._top(self._asks)
+
+    def pop_match(self, near=0.0):
+        """Remove and return the best (bid, ask) pair if it crosses or is within near of crossing, else None."""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None or bid.price < ask.price * (1 - near):
+            return None
+        heapq.heappop(self._bids)
+        heapq.heappop(self._asks)
+        del self._orders[bid.id], self._orders[ask.id]
+        return bid, ask
+
+    def bids(self):
+        return sum(order.side == "bid" for order in self._orders.values())
+
+    def asks(self):
+        return len(self._orders) - self.bids()
+
+    def __len__(self):
+        return len(self._orders)
+
+
+class Marketplace:
+    """
+    Order book plus the negotiations it escalates. Each matched pair gets one
+    negotiation; both orders leave the book whatever the outcome.
+    """
+
+    def __init__(self, product, market_price, near=0.05, renderer="none", llm=None, policy=None,
+                 max_concurrency=8, routing=None):
+        self.product = product
+        self.market_price = market_price
+        self.near = near
+        if renderer == "routed":  # kept, so report() covers every negotiation
+            from routing import RoutingRenderer
+
+            renderer = RoutingRenderer(routing)
+        self.renderer = renderer
+        self.llm = llm
+        self.policy = policy
+        self.max_concurrency = max_concurrency
+        self.book = OrderBook()
+
+    def add_buyer(self, name, personality, budget):
+        return self.book.add("bid", name, personality, budget)
+
+    def add_seller(self, name, personality, min_price):
+        return self.book.add("ask", name, personality, min_price)
+
+    def match(self):
+        """Pop every crossing or near-crossing pair, best prices first."""
+        pairs = []
+        while True:
+            pair = self.book.pop_match(self.near)
+            if pair is None:
+                return pairs
+            pairs.append(pair)
+
+    def scenario(self, bid, ask):
+        return dict(product=self.product, market_price=self.market_price,
+                    buyer_name=bid.name, buyer_personality=bid.personality, buyer_budget=bid.price,
+                    seller_name=ask.name, seller_personality=ask.personality, seller_min_price=ask.price,
+                    policy=self.policy)
+
+    async def arun(self, tracer=None):
+        """Match the book and negotiate every escalated pair concurrently; returns one trade per pair."""
+        from negotiation_logic import arun_negotiations
+
+        pairs = self.match()
+        results = await arun_negotiations([self.scenario(bid, ask) for bid, ask in pairs],
+                                          renderer=self.renderer, llm=self.llm,
+                                          max_concurrency=self.max_concurrency, tracer=tracer)
+        return [{"buyer": bid.name, "seller": ask.name, "bid": bid.price, "ask": ask.price,
+                 "status": result["status"], "price": result.get("price"),
+                 "turns": len(result["history"])}
+                for (bid, ask), result in zip(pairs, results)]
+
+    def run(self, tracer=None):
+        import asyncio
+
+        return asyncio.run(self.arun(tracer))
+
+
+def summarize(trades, book):
+    deals = [t for t in trades if t["status"] == "Deal Reached"]
+    return {
+        "escalated": len(trades),
+        "deals": len(deals),
+        "mean_price": sum(t["price"] for t in deals) / len(deals) if deals else None,
+        "turns": sum(t["turns"] for t in trades),
+        "resting_bids": book.bids(),
+        "resting_asks": book.asks(),
+    }
+
+# =========================
+# Command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Order-book marketplace of many buyers and sellers")
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--sellers", type=int, default=1000)
+    parser.add_argument("--product", default="Smartphone")
+    parser.add_argument("--market-price", type=float, default=50000)
+    parser.add_argument("--spread", type=float, default=0.3, help="limits vary by this fraction of the market price")
+    parser.add_argument("--near", type=float, default=0.05, help="escalate pairs this close to crossing")
+    parser.add_argument("--renderer", default="none", choices=["none", "template", "llm", "oneshot", "routed"])
+    parser.add_argument("--routing", metavar="CONFIG", help="JSON routing config for --renderer routed")
+    parser.add_argument("--policy", choices=["optimal"], help="offer policy for every agent")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    routing = None
+    if args.routing:
+        from routing import load_routing
+
+        routing = load_routing(args.routing)
+    market = Marketplace(args.product, args.market_price, args.near, args.renderer, policy=args.policy,
+                         max_concurrency=args.max_concurrency, routing=routing)
+    center = args.market_price * 0.8
+    for i in range(args.buyers):
+        market.add_buyer(f"Buyer {i}", rng.choice(BUYER_PERSONALITIES),
+                         round(center * rng.uniform(1 - args.spread, 1 + args.spread)))
+    for i in range(args.sellers):
+        market.add_seller(f"Seller {i}", rng.choice(SELLER_PERSONALITIES),
+                          round(center * rng.uniform(1 - args.spread, 1 + args.spread)))
+
+    trades = market.run()
+    for name, value in summarize(trades, market.book).items():
+        print(f"{name:<14} {value if value is None or isinstance(value, int) else f'{value:,.2f}'}")
+    if hasattr(market.renderer, "report"):
+        from routing import format_report
+
+        print("\n" + format_report(market.renderer.report()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+import random
+import threading
+import time
+import weakref
+from contextlib import closing
+from llm_client import token_usage, with_budget
+from prompts import default_library
+
+# Canned lines used by the heuristic engines (run_negotiation_terminal.py, streamlit_app.py)
+BUYER_COUNTER_TEMPLATES = [
+    "I can give you ₹{offer}, what do you say?",
+    "My best is ₹{offer}, can we agree?",
+    "I can offer ₹{offer}, take it or leave it.",
+    "How about ₹{offer}?",
+]
+SELLER_COUNTER_TEMPLATES = [
+    "I can do ₹{offer}, that's my offer.",
+    "₹{offer} is fair, can we agree?",
+    "My price is ₹{offer}, take it or leave it.",
+    "How about ₹{offer}?",
+]
+
+TEMPLATES = {
+    ("buyer", "opening"): [
+        "Hi! I'm interested in the {product}. Would you take ₹{offer}?",
+        "Hello, I'd like to buy the {product}. I can start at ₹{offer}.",
+    ],
+    ("buyer", "counter"): BUYER_COUNTER_TEMPLATES,
+    ("seller", "counter"): SELLER_COUNTER_TEMPLATES,
+    ("buyer", "accept"): [
+        "₹{offer} works for me. Deal!",
+        "Alright, I accept ₹{offer}.",
+    ],
+    ("seller", "accept"): [
+        "₹{offer} it is. Deal!",
+        "Alright, I accept ₹{offer}.",
+    ],
+    ("buyer", "walk_away"): [
+        "Sorry, ₹{counter_offer} is more than I can pay. I'll pass.",
+    ],
+    ("seller", "walk_away"): [
+        "Sorry, I can't go as low as ₹{counter_offer}. I'll pass.",
+    ],
+}
+
+
+def turn_type(agent, decision, round_num=None):
+    """
+    Kind of message a turn needs: opening, counter, accept or walk_away. A buyer's
+    counter before the seller has named any price opens the negotiation (or a
+    decision may say so with "opening": True); otherwise the action decides.
+    """
+    if decision.get("opening"):
+        return "opening"
+    if (decision["action"] == "counter" and agent.role == "buyer"
+            and round_num in (None, 1) and counterpart_offer(agent, decision) is None):
+        return "opening"
+    return decision["action"]
+
+
+def counterpart_offer(agent, decision=None):
+    """
+    Latest offer the agent has seen from the other side. A decision made ahead of
+    its message (pipelined engine) carries the value it saw as "counterpart_offer".
+    """
+    if decision is not None and "counterpart_offer" in decision:
+        return decision["counterpart_offer"]
+    return agent.latest_seller_offer if agent.role == "buyer" else agent.latest_buyer_offer
+
+# =========================
+# Renderers
+class NoMessageRenderer:
+    """Headless simulation: no text at all, zero generations."""
+
+    def render(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        return ""
+
+    async def arender(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        return ""
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        return iter(())
+
+
+class TemplateRenderer:
+    """Canned message per turn type, no LLM."""
+
+    def __init__(self, rng=None):
+        self.rng = rng or random
+
+    def render(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        kind = turn_type(agent, decision, round_num)
+        templates = TEMPLATES.get((agent.role, kind)) or TEMPLATES[(agent.role, "counter")]
+        return self.rng.choice(templates).format(
+            offer=int(decision["offer"] or 0),
+            counter_offer=int(counterpart_offer(agent, decision) or 0),
+            product=product or "product",
+        )
+
+    async def arender(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        return self.render(agent, decision, round_num, product, market_price)
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        yield self.render(agent, decision, round_num, product, market_price)
+
+
+class LLMRenderer:
+    """
+    One LLM generation per turn; uses the agent's own client unless one is given.
+    Prompts and their generation caps come from a prompts.PromptLibrary
+    (the shared default_library() unless one is given).
+    """
+
+    def __init__(self, llm=None, prompts=None):
+        self.llm = llm
+        self.prompts = prompts
+
+    def library(self):
+        return self.prompts if self.prompts is not None else default_library()
+
+    def prompt_for(self, agent, decision, round_num=None):
+        return self.library().get(agent.role, agent.personality_type, turn_type(agent, decision, round_num))
+
+    def client(self, agent, decision, round_num=None, stats=None):
+        """The client for this turn, capped at its prompt's num_predict and stop sequences."""
+        entry = self.prompt_for(agent, decision, round_num)
+        if stats is not None:
+            stats["num_predict"] = entry.num_predict
+        return with_budget(self.llm or agent.llm, entry.num_predict, entry.stop)
+
+    def build_prompt(self, agent, decision, round_num=None, product=None, market_price=None):
+        return self.prompt_for(agent, decision, round_num).oneshot.format(
+            product=product, market_price=market_price, other_offer=counterpart_offer(agent, decision),
+            offer=decision["offer"])
+
+    def format_prompt(self, agent, decision, round_num=None, product=None, market_price=None):
+        return self.build_prompt(agent, decision, round_num, product, market_price)
+
+    def render(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        """stats, if given, is filled with latency and token counts for tracing."""
+        formatted_prompt = self.format_prompt(agent, decision, round_num, product, market_price)
+        llm = self.client(agent, decision, round_num, stats)
+        started = time.perf_counter()
+        reply = llm.invoke(formatted_prompt)
+        if stats is not None:
+            record_stats(stats, llm, reply, started)
+        self.remember(agent, formatted_prompt, reply.content)
+        return reply.content
+
+    async def arender(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        formatted_prompt = self.format_prompt(agent, decision, round_num, product, market_price)
+        llm = self.client(agent, decision, round_num, stats)
+        started = time.perf_counter()
+        reply = await llm.ainvoke(formatted_prompt)
+        if stats is not None:
+            record_stats(stats, llm, reply, started)
+        self.remember(agent, formatted_prompt, reply.content)
+        return reply.content
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        """Yield text chunks as the model generates them; time the consumer holds a chunk is not LLM latency."""
+        formatted_prompt = self.format_prompt(agent, decision, round_num, product, market_price)
+        llm = self.client(agent, decision, round_num, stats)
+        started = time.perf_counter()
+        chunk = None
+        parts = []
+        with closing(llm.stream(formatted_prompt)) as source:  # closed, ending the request, if we are
+            for chunk in source:
+                if chunk.content:
+                    if stats is not None and "ttft_ms" not in stats:
+                        stats["ttft_ms"] = (time.perf_counter() - started) * 1000
+                    parts.append(chunk.content)
+                    handed_over = time.perf_counter()
+                    yield chunk.content
+                    started += time.perf_counter() - handed_over
+        if stats is not None:
+            record_stats(stats, llm, chunk, started)
+        self.remember(agent, formatted_prompt, "".join(parts))
+
+    def remember(self, agent, prompt, reply):
+        """Hook called with each finished generation; one-off prompts keep nothing."""
+
+    def record_fallback(self, agent, decision, text, round_num=None, product=None, market_price=None):
+        """A turn got text from elsewhere (DeadlineRenderer's template); remember it as the reply."""
+        self.remember(agent, self.format_prompt(agent, decision, round_num, product, market_price), text)
+
+
+class ChatRenderer(LLMRenderer):
+    """
+    Each agent holds one ongoing chat: a system message that stays fixed for the
+    whole negotiation, then a short user turn with this round's numbers and the
+    model's reply, appended turn after turn. Every prompt extends the previous
+    one, so the model server can reuse the cached prefix (see llm_client
+    DEFAULT_KEEP_ALIVE) and only prefills the new turn.
+    """
+
+    sequential = True  # an agent's turns must be generated in order (each extends the last)
+
+    def __init__(self, llm=None, chats=None, prompts=None):
+        super().__init__(llm, prompts)
+        # agent -> list of messages; renderers given the same mapping continue each other's chats
+        self._chats = chats if chats is not None else weakref.WeakKeyDictionary()
+
+    def system_prompt(self, agent, product=None, market_price=None):
+        market = f" at market price ₹{market_price}" if market_price is not None else ""
+        entry = self.library().get(agent.role, agent.personality_type, "counter")  # same for every turn type
+        return entry.system.format(product=product or "the product", market=market)
+
+    def build_turn(self, agent, decision, round_num=None):
+        return self.prompt_for(agent, decision, round_num).turn.format(
+            other_offer=counterpart_offer(agent, decision), offer=decision["offer"])
+
+    def format_prompt(self, agent, decision, round_num=None, product=None, market_price=None):
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        chat = self._chats.get(agent)
+        if chat is None:
+            chat = self._chats[agent] = [SystemMessage(self.system_prompt(agent, product, market_price))]
+        return chat + [HumanMessage(self.build_turn(agent, decision, round_num))]
+
+    def remember(self, agent, prompt, reply):
+        from langchain_core.messages import AIMessage
+
+        chat = self._chats.get(agent)
+        if chat is not None and len(chat) != len(prompt) - 1:
+            return  # the chat moved on without this reply (an abandoned, overrun generation)
+        self._chats[agent] = prompt + [AIMessage(reply)]
+
+    def forget(self, agent):
+        self._chats.pop(agent, None)
+
+    def export_chat(self, agent):
+        """The agent's chat as JSON-ready [type, text] pairs, for agents that are rebuilt between turns."""
+        return [[message.type, message.content] for message in self._chats.get(agent, ())]
+
+    def import_chat(self, agent, state):
+        """Restore a chat saved by export_chat as the agent's chat (nothing to restore: start afresh)."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        kinds = {"system": SystemMessage, "human": HumanMessage, "ai": AIMessage}
+        if state:
+            self._chats[agent] = [kinds[kind](text) for kind, text in state]
+        else:
+            self._chats.pop(agent, None)
+
+
+class DeadlineRenderer:
+    """
+    Latency budgets around another renderer, for one negotiation: each turn gets
+    at most turn_timeout seconds and all turns together at most deadline seconds
+    from creation. A generation that overruns is cancelled (arender) or stopped
+    at its next chunk, closing the model's stream (render, stream); the turn gets
+    the fallback's canned template message instead and is listed in degraded.
+    Sync generations run on a shared pool of OVERRUN_THREADS threads; when every
+    one of them is still busy, the turn falls back at once (reason "busy")
+    instead of queueing behind the overrun generations.
+    """
+
+    def __init__(self, renderer, turn_timeout=None, deadline=None, fallback=None, degraded=None):
+        self.renderer = renderer
+        self.turn_timeout = turn_timeout
+        self.deadline = deadline
+        self.fallback = fallback or TemplateRenderer()
+        self.degraded = degraded if degraded is not None else []  # {"round", "speaker", "action", "reason"}
+        self.sequential = getattr(renderer, "sequential", False)
+        self.started = time.monotonic()
+
+    def budget(self):
+        """(seconds left for this turn, reason if it runs out), seconds None when unbounded."""
+        budget, reason = self.turn_timeout, "turn_timeout"
+        if self.deadline is not None:
+            left = self.deadline - (time.monotonic() - self.started)
+            if budget is None or left < budget:
+                budget, reason = left, "deadline"
+        return budget, reason
+
+    def _fallback(self, agent, decision, reason, context):
+        text = self.fallback.render(agent, decision, **context)
+        record = getattr(self.renderer, "record_fallback", None)
+        if record is not None:
+            record(agent, decision, text, **context)
+        self.degraded.append({"round": context["round_num"], "speaker": agent.name,
+                              "action": decision["action"], "reason": reason})
+        return text
+
+    def _generate(self, agent, decision, context, stats):
+        """
+        Stream the wrapped renderer's chunks into a queue from a pool thread.
+        Returns (chunks, stop, done), or None if no pool thread is free.
+        """
+        import queue
+
+        if not _pool_slots.acquire(blocking=False):
+            return None
+        chunks, stop, done = queue.Queue(), threading.Event(), object()
+
+        def produce():
+            try:
+                with closing(self.renderer.stream(agent, decision, **context, stats=stats)) as source:
+                    for chunk in source:
+                        if stop.is_set():
+                            break  # leaving the block closes the model's stream, ending the generation
+                        chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+                _pool_slots.release()
+
+        _overrun_pool().submit(produce)
+        return chunks, stop, done
+
+    def _receive(self, generation, budget):
+        """Chunks of a _generate() generation; TimeoutError (after stopping it) once budget runs out."""
+        import queue
+
+        chunks, stop, done = generation
+        ends = time.monotonic() + budget
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=max(ends - time.monotonic(), 0))
+                except queue.Empty:
+                    raise TimeoutError from None
+                if chunk is done:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            stop.set()  # no-op once the generation is done
+
+    def render(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        budget, reason = self.budget()
+        if budget is None:
+            return self.renderer.render(agent, decision, **context, stats=stats)
+        if budget <= 0:
+            return self._fallback(agent, decision, reason, context)
+        own_stats = {}  # a stopped generation may still write to it
+        generation = self._generate(agent, decision, context, own_stats)
+        if generation is None:
+            return self._fallback(agent, decision, "busy", context)
+        try:
+            text = "".join(self._receive(generation, budget))
+        except TimeoutError:
+            return self._fallback(agent, decision, reason, context)
+        if stats is not None:
+            stats.update(own_stats)
+        return text
+
+    async def arender(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        import asyncio
+
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        budget, reason = self.budget()
+        if budget is None:
+            return await self.renderer.arender(agent, decision, **context, stats=stats)
+        if budget <= 0:
+            return self._fallback(agent, decision, reason, context)
+        try:
+            return await asyncio.wait_for(self.renderer.arender(agent, decision, **context, stats=stats), budget)
+        except asyncio.TimeoutError:
+            return self._fallback(agent, decision, reason, context)
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        """
+        Chunks as they arrive within the budget. On overrun, stops reading and returns
+        the fallback message, which replaces whatever was already streamed.
+        """
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        budget, reason = self.budget()
+        if budget is None:
+            yield from self.renderer.stream(agent, decision, **context, stats=stats)
+            return None
+        if budget <= 0:
+            return self._fallback(agent, decision, reason, context)
+        own_stats = {}
+        generation = self._generate(agent, decision, context, own_stats)
+        if generation is None:
+            return self._fallback(agent, decision, "busy", context)
+        try:
+            yield from self._receive(generation, budget)
+        except TimeoutError:
+            return self._fallback(agent, decision, reason, context)
+        if stats is not None:
+            stats.update(own_stats)
+        return None
+
+
+OVERRUN_THREADS = 32  # sync generations under a DeadlineRenderer, across all negotiations
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(OVERRUN_THREADS)  # taken before submitting, so nothing queues
+
+
+def _overrun_pool():
+    """Threads for DeadlineRenderer's sync generations; a stopped one runs on until its next chunk."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _pool = ThreadPoolExecutor(max_workers=OVERRUN_THREADS, thread_name_prefix="render")
+    return _pool
+
+
+def record_stats(stats, llm, reply, started):
+    """Latency and token counts of one generation (reply may be the last stream chunk)."""
+    prompt_tokens, completion_tokens = token_usage(reply)
+    stats["llm_latency_ms"] = (time.perf_counter() - started) * 1000
+    stats["model"] = getattr(llm, "model", None)
+    stats["prompt_tokens"] = prompt_tokens
+    stats["completion_tokens"] = completion_tokens
+    prefill_ns = (getattr(reply, "response_metadata", None) or {}).get("prompt_eval_duration")
+    if prefill_ns is not None:
+        stats["prefill_ms"] = prefill_ns / 1e6
+
+
+# "llm" keeps a multi-turn chat per agent; "oneshot" sends each turn as a standalone prompt
+RENDERERS = {"none": NoMessageRenderer, "template": TemplateRenderer, "llm": ChatRenderer, "oneshot": LLMRenderer}
+
+
+def get_renderer(renderer="llm", llm=None):
+    """
+    Accept a renderer instance, one of the names in RENDERERS, or "routed"
+    (routing.RoutingRenderer with its default routes: model chosen per turn type).
+    llm, if given, is the client an "llm" or "oneshot" renderer uses instead of each agent's own;
+    "routed" always uses each route's own model (wrap the router to add to those clients).
+    """
+    if renderer == "routed":
+        from routing import RoutingRenderer  # routing builds on the renderers above
+
+        return RoutingRenderer()
+    if isinstance(renderer, str):
+        if renderer not in RENDERERS:
+            raise ValueError(f"Unknown renderer: {renderer}")
+        if renderer in ("llm", "oneshot"):
+            return RENDERERS[renderer](llm)
+        return RENDERERS[renderer]()
+    return renderer
@@ -0,0 +1,133 @@
+"""
+Vectorized Monte Carlo version of the heuristic negotiation in run_negotiation_terminal.py.
+
+Every scenario is one lane of a set of NumPy arrays; all lanes advance one round
+at a time in lock-step, so millions of seeded negotiations run in seconds.
+The per-round rules are the same as buyer_turn/seller_turn in the terminal engine.
+"""
+import argparse
+import itertools
+import numpy as np
+
+MAX_ROUNDS = 12          # run_negotiation_terminal.run_negotiation default
+CONVERGENCE_GAP = 1000   # offers within ₹1000 close the deal
+CHUNK_SIZE = 1_000_000   # lanes simulated at once, bounds memory for huge runs
+
+
+def _simulate_chunk(budget, min_price, rng, max_rounds, gap):
+    n = budget.shape[0]
+    last_buyer = np.zeros(n)
+    last_seller = np.zeros(n)
+    final_price = np.zeros(n)
+    rounds = np.full(n, max_rounds, dtype=np.int16)
+    active = np.ones(n, dtype=bool)
+
+    start_buyer = budget * 0.8
+    for round_num in range(1, max_rounds + 1):
+        # Buyer turn: move 30% of the way from 80% of budget toward the seller's last offer
+        buyer = np.where(last_seller > 0,
+                         np.minimum(budget, start_buyer + (last_seller - start_buyer) * 0.3),
+                         start_buyer)
+
+        # Seller turn: start above the buyer's offer, then concede ₹500-1500 at random
+        start_seller = np.maximum(min_price * 1.2,
+                                  np.where(buyer != 0, buyer + 500, min_price * 1.5))
+        concession = rng.integers(500, 1501, size=n)
+        seller = np.where(buyer < start_seller,
+                          np.maximum(min_price * 1.1, start_seller - concession),
+                          np.maximum(min_price, start_seller - concession))
+
+        # Lanes that already closed keep their last offers
+        last_buyer = np.where(active, buyer, last_buyer)
+        last_seller = np.where(active, seller, last_seller)
+
+        closed = active & (np.abs(last_seller - last_buyer) <= gap)
+        final_price[closed] = np.floor((last_seller[closed] + last_buyer[closed]) / 2)
+        rounds[closed] = round_num
+        active &= ~closed
+        if not active.any():
+            break
+
+    converged = ~active
+    # Force deal at the midpoint if max rounds reached
+    final_price[active] = np.floor((last_seller[active] + last_buyer[active]) / 2)
+    return final_price, rounds, converged
+
+
+def simulate(budget, min_price, n=None, seed=0, max_rounds=MAX_ROUNDS, gap=CONVERGENCE_GAP,
+             chunk_size=CHUNK_SIZE):
+    """
+    Simulate n negotiations. budget and min_price may be scalars or arrays
+    (broadcast to length n, so a parameter sweep is just a pair of arrays).
+    Returns a dict of arrays: final_price, rounds, converged, buyer_profit, seller_profit.
+    """
+    budget = np.asarray(budget, dtype=np.float64)
+    min_price = np.asarray(min_price, dtype=np.float64)
+    if n is None:
+        n = np.broadcast(budget, min_price).size
+    budget, min_price = (np.broadcast_to(a, (n,)) for a in (budget, min_price))
+
+    rng = np.random.default_rng(seed)
+    parts = [
+        _simulate_chunk(budget[i:i + chunk_size], min_price[i:i + chunk_size], rng, max_rounds, gap)
+        for i in range(0, n, chunk_size)
+    ]
+    final_price = np.concatenate([p[0] for p in parts])
+    rounds = np.concatenate([p[1] for p in parts])
+    converged = np.concatenate([p[2] for p in parts])
+
+    return {
+        "final_price": final_price,
+        "rounds": rounds,
+        "converged": converged,
+        "buyer_profit": np.maximum(0, budget - final_price),
+        "seller_profit": np.maximum(0, final_price - min_price),
+    }
+
+
+def summarize(result, percentiles=(5, 50, 95)):
+    """Distribution summary of a simulate() result."""
+    price = result["final_price"]
+    buyer_profit = result["buyer_profit"]
+    seller_profit = result["seller_profit"]
+    rounds = result["rounds"]
+    converged = result["converged"]
+
+    summary = {
+        "negotiations": int(price.size),
+        "convergence_rate": float(converged.mean()),
+        "mean_price": float(price.mean()),
+        "mean_rounds_to_close": float(rounds[converged].mean()) if converged.any() else None,
+        "rounds_histogram": np.bincount(rounds, minlength=int(rounds.max()) + 1)[1:].tolist(),
+        "mean_buyer_profit": float(buyer_profit.mean()),
+        "mean_seller_profit": float(seller_profit.mean()),
+        "buyer_wins": float((buyer_profit > seller_profit).mean()),
+        "seller_wins": float((seller_profit > buyer_profit).mean()),
+    }
+    for p, value in zip(percentiles, np.percentile(price, percentiles)):
+        summary[f"price_p{p}"] = float(value)
+    return summary
+
+# =========================
+# Command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the heuristic negotiation.")
+    parser.add_argument("--n", type=int, default=100_000, help="negotiations per parameter pair")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[40000])
+    parser.add_argument("--min-prices", type=float, nargs="+", default=[35000])
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for i, (budget, min_price) in enumerate(itertools.product(args.budgets, args.min_prices)):
+        result = simulate(budget, min_price, n=args.n, seed=args.seed + i, max_rounds=args.max_rounds)
+        s = summarize(result)
+        print(f"budget ₹{budget:,.0f}  min ₹{min_price:,.0f}  "
+              f"converged {s['convergence_rate']:.1%}  price p50 ₹{s['price_p50']:,.0f} "
+              f"(p5 ₹{s['price_p5']:,.0f}, p95 ₹{s['price_p95']:,.0f})  "
+              f"rounds {s['mean_rounds_to_close'] or 0:.2f}  "
+              f"profit buyer ₹{s['mean_buyer_profit']:,.0f} / seller ₹{s['mean_seller_profit']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
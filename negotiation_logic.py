@@ -1,15 +1,27 @@
-import streamlit as st
 import random
 import time
-from buyer_bot import BuyerAgent  # Updated with LLaMA inside
-from seller_bot import SellerAgent  # Updated with LLaMA inside
-from langchain_community.chat_models import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
+import uuid
+from agents import BuyerAgent, SellerAgent
+from message_renderer import DeadlineRenderer, counterpart_offer, get_renderer
+from offers import OfferMessage
+from llm_client import BatchingLLM, ConcurrencyLimitedLLM, get_llm
+from llm_cache import CachedLLM, attach_cache
+from tracing import NULL_TRACER
+from turn_log import TurnLog
+
+MAX_ROUNDS = 10
+# Latency budgets of the Streamlit page: seconds per message and per negotiation
+TURN_TIMEOUT = 20
+NEGOTIATION_DEADLINE = 120
 
 # =========================
-# Helper: Typing effect
-def stream_typing_effect(text, delay=0.03):
+# Helper: Typing effect (opt-in presentation delay, off by default)
+def stream_typing_effect(text, delay=0.0):
+    import streamlit as st
     placeholder = st.empty()
+    if not delay:
+        placeholder.markdown(text)
+        return placeholder
     displayed = ""
     for char in text:
         displayed += char
@@ -18,114 +30,486 @@ def stream_typing_effect(text, delay=0.03):
     return placeholder
 
 # =========================
-# Turn Handlers with LLaMA-generated messages
-def buyer_turn(round_num, buyer, product, market_price):
-    decision = buyer.decide(market_price)
-
-    if round_num == 1:
-        prompt = f"""
-        You are a Buyer AI with personality: {buyer.personality_type}.
-        You are starting negotiation for {product} at market price ₹{market_price}.
-        Generate a natural, polite, concise opening message.
-        """
-    elif decision['action'] == "accept":
-        prompt = f"""
-        You are a Buyer AI with personality: {buyer.personality_type}.
-        Seller offered ₹{buyer.latest_seller_offer}.
-        You accept the offer. Respond naturally, politely, and concisely.
-        """
-    elif decision['action'] == "walk_away":
-        prompt = f"""
-        You are a Buyer AI with personality: {buyer.personality_type}.
-        You cannot agree to the seller's offer of ₹{buyer.latest_seller_offer}.
-        Politely walk away from negotiation in 1–2 sentences.
-        """
-    else:
-        prompt = f"""
-        You are a Buyer AI with personality: {buyer.personality_type}.
-        Seller offered ₹{buyer.latest_seller_offer}.
-        You want to counteroffer ₹{decision['offer']}.
-        Respond naturally, politely, and concisely in 1–2 sentences.
-        """
-
-    formatted_prompt = ChatPromptTemplate.from_template("{prompt}").format(prompt=prompt)
-    message = buyer.llm.invoke(formatted_prompt).content
+# Turn Handlers: numeric decision first, then at most one message generation
+def speak(renderer, agent, decision, round_num, product, market_price, stream=False, tracer=NULL_TRACER):
+    """
+    Generate the turn's message. With stream=True yields token events as the
+    model produces them; either way the full message is the generator's return value.
+    A renderer's stream may return a final message that replaces the streamed text
+    (DeadlineRenderer's fallback after an overrun). The llm span is paused while
+    each token is with the consumer, so UI pacing is not counted as LLM time.
+    """
+    context = dict(round_num=round_num, product=product, market_price=market_price)
+    yield {"type": "turn_start", "round": round_num, "speaker": agent.name,
+           "personality": agent.personality_type, "action": decision['action'], "offer": decision['offer']}
+    with tracer.span("llm", round_num, agent, decision['action']) as span:
+        if not stream:
+            return renderer.render(agent, decision, **context, stats=span.attrs)
+        parts = []
+        chunks = renderer.stream(agent, decision, **context, stats=span.attrs)
+        while True:
+            try:
+                text = next(chunks)
+            except StopIteration as end:
+                return "".join(parts) if end.value is None else end.value
+            parts.append(text)
+            span.pause()
+            yield {"type": "token", "speaker": agent.name, "text": text}
+            span.resume()
+
+def buyer_turn(round_num, buyer, product, market_price, renderer, stream=False, tracer=NULL_TRACER):
+    """Generator: yields turn events, returns (decision, message)."""
+    with tracer.span("decide", round_num, buyer):
+        decision = buyer.decide_offer(market_price)
+    message = yield from speak(renderer, buyer, decision, round_num, product, market_price, stream, tracer)
     return decision, message
 
-def seller_turn(seller):
-    decision = seller.decide()
-
-    if decision['action'] == "accept":
-        prompt = f"""
-        You are a Seller AI with personality: {seller.personality_type}.
-        Buyer offered ₹{seller.latest_buyer_offer}.
-        You accept the offer. Respond naturally, politely, and concisely.
-        """
-    elif decision['action'] == "walk_away":
-        prompt = f"""
-        You are a Seller AI with personality: {seller.personality_type}.
-        Buyer offered ₹{seller.latest_buyer_offer}.
-        You cannot agree. Politely walk away from negotiation in 1–2 sentences.
-        """
-    else:
-        prompt = f"""
-        You are a Seller AI with personality: {seller.personality_type}.
-        Buyer offered ₹{seller.latest_buyer_offer}.
-        You counteroffer ₹{decision['offer']}.
-        Respond naturally, politely, and concisely in 1–2 sentences.
-        """
-
-    formatted_prompt = ChatPromptTemplate.from_template("{prompt}").format(prompt=prompt)
-    message = seller.llm.invoke(formatted_prompt).content
+def seller_turn(seller, renderer, round_num=None, product=None, market_price=None, stream=False, tracer=NULL_TRACER):
+    """Generator: yields turn events, returns (decision, message)."""
+    with tracer.span("decide", round_num, seller):
+        decision = seller.decide_offer()
+    message = yield from speak(renderer, seller, decision, round_num, product, market_price, stream, tracer)
+    return decision, message
+
+async def abuyer_turn(round_num, buyer, product, market_price, renderer, tracer=NULL_TRACER):
+    with tracer.span("decide", round_num, buyer):
+        decision = buyer.decide_offer(market_price)
+    with tracer.span("llm", round_num, buyer, decision['action']) as span:
+        message = await renderer.arender(buyer, decision, round_num=round_num, product=product,
+                                         market_price=market_price, stats=span.attrs)
+    return decision, message
+
+async def aseller_turn(seller, renderer, round_num=None, product=None, market_price=None, tracer=NULL_TRACER):
+    with tracer.span("decide", round_num, seller):
+        decision = seller.decide_offer()
+    with tracer.span("llm", round_num, seller, decision['action']) as span:
+        message = await renderer.arender(seller, decision, round_num=round_num, product=product,
+                                         market_price=market_price, stats=span.attrs)
     return decision, message
 
+def record_turn(history, round_num, agent, decision, message):
+    history.append_turn(round_num, agent.name, agent.personality_type, message,
+                        decision['action'], decision['offer'])
+
+def closing_result(decision, history):
+    """Final result if this decision ends the negotiation, else None."""
+    if decision['action'] in ["accept", "walk_away"]:
+        return {"status": "Deal Reached" if decision['action']=="accept" else "No Deal",
+                "price": decision['offer'], "history": history}
+    return None
+
+def bind_negotiation(tracer):
+    """Tag every span of one negotiation with a fresh id (no-op when tracing is off)."""
+    tracer = tracer or NULL_TRACER
+    return tracer.bind(negotiation=tracer.new_trace_id()) if tracer.enabled else tracer
+
+def setup_negotiation(buyer_name, buyer_personality, buyer_budget,
+                      seller_name, seller_personality, seller_min_price, renderer="llm", llm=None, cache=None,
+                      policy=None, buyer_policy=None, seller_policy=None):
+    """
+    Build the renderer and both agents, wiring in the shared client, cache and offer policy.
+    buyer_policy and seller_policy override policy for one side.
+    """
+    if llm is not None and cache is not None:
+        llm = CachedLLM(llm, cache)
+    renderer = get_renderer(renderer, llm)
+    if cache is not None and hasattr(renderer, "wrapped"):  # RoutingRenderer: each route's own client
+        renderer = renderer.wrapped(lambda client: CachedLLM(client, cache))
+    buyer = BuyerAgent(buyer_name, buyer_personality, buyer_budget, llm=llm, policy=buyer_policy or policy)
+    seller = SellerAgent(seller_name, seller_personality, seller_min_price, llm=llm,
+                         policy=seller_policy or policy)
+    if cache is not None:
+        attach_cache(cache, buyer, seller)
+    return renderer, buyer, seller
+
+# =========================
+# Negotiation state (checkpointed after every turn when a store is given)
+class NegotiationState:
+    """Everything needed to continue a negotiation at its next turn."""
+
+    __slots__ = ("negotiation_id", "params", "buyer", "seller", "history", "turn", "message", "offer", "result",
+                 "degraded", "renderer")
+
+    def __init__(self, params, buyer, seller, negotiation_id=None, renderer=None):
+        self.negotiation_id = negotiation_id
+        self.params = params  # product, market_price and the agents' settings, by name
+        self.buyer = buyer
+        self.seller = seller
+        self.renderer = renderer  # its agents' chats (ChatRenderer) are saved with the state
+        self.history = TurnLog()
+        self.turn = 0         # buyer on even turns, seller on odd ones
+        self.message = ""     # last message and offer, for the next speaker to observe
+        self.offer = None
+        self.result = None
+        self.degraded = None  # turns that fell back to a template, when latency budgets are set
+
+    @property
+    def round_num(self):
+        return self.turn // 2 + 1
+
+    def snapshot(self):
+        result = None
+        if self.result is not None:
+            result = {key: value for key, value in self.result.items() if key != "history"}
+        return {"params": self.params, "buyer": self.buyer.snapshot(), "seller": self.seller.snapshot(),
+                "history": self.history.to_state(), "turn": self.turn, "message": self.message,
+                "offer": self.offer, "result": result, "degraded": self.degraded, "chats": self.export_chats()}
+
+    def export_chats(self):
+        if not hasattr(self.renderer, "export_chat"):
+            return None
+        return {"buyer": self.renderer.export_chat(self.buyer), "seller": self.renderer.export_chat(self.seller)}
+
+    def restore(self, saved):
+        self.buyer.restore(saved["buyer"])
+        self.seller.restore(saved["seller"])
+        chats = saved.get("chats")
+        if chats and hasattr(self.renderer, "import_chat"):
+            self.renderer.import_chat(self.buyer, chats["buyer"])
+            self.renderer.import_chat(self.seller, chats["seller"])
+        self.history = TurnLog.from_state(saved["history"])
+        self.turn = saved["turn"]
+        self.message = saved["message"]
+        self.offer = saved["offer"]
+        self.degraded = saved.get("degraded")
+        if saved["result"] is not None:
+            self.result = dict(saved["result"], history=self.history)
+        return self
+
+def negotiation_params(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                       seller_name, seller_personality, seller_min_price):
+    return dict(product=product, market_price=market_price, buyer_name=buyer_name,
+                buyer_personality=buyer_personality, buyer_budget=buyer_budget, seller_name=seller_name,
+                seller_personality=seller_personality, seller_min_price=seller_min_price)
+
+def bound_renderer(state, renderer, turn_timeout=None, deadline=None):
+    """The renderer under this negotiation's latency budgets (DeadlineRenderer), if any are set."""
+    if turn_timeout is None and deadline is None:
+        return renderer
+    state.degraded = [] if state.degraded is None else state.degraded
+    return DeadlineRenderer(renderer, turn_timeout, deadline, degraded=state.degraded)
+
+def observe(agent, round_num, message, offer, tracer=NULL_TRACER):
+    with tracer.span("parse", round_num, agent):
+        if agent.role == "buyer":
+            agent.observe_seller(OfferMessage(message, offer))
+        else:
+            agent.observe_buyer(OfferMessage(message, offer))
+
+def start_turn(state, tracer):
+    """Next speaker observes the last message and offer; returns that agent."""
+    agent = state.buyer if state.turn % 2 == 0 else state.seller
+    observe(agent, state.round_num, state.message, state.offer, tracer)
+    return agent
+
+def finish_turn(state, agent, decision, message, checkpoint=None):
+    """Record the turn, settle the result if the negotiation is over, and checkpoint."""
+    record_turn(state.history, state.round_num, agent, decision, message)
+    state.turn += 1
+    state.message = message
+    state.offer = decision['offer']
+    state.result = closing_result(decision, state.history)
+    if state.result is None and state.turn >= 2 * MAX_ROUNDS:
+        state.result = {"status": "No Deal After Max Rounds", "history": state.history}
+    if state.result is not None and state.negotiation_id is not None:
+        state.result["negotiation_id"] = state.negotiation_id
+    if state.result is not None and state.degraded is not None:
+        state.result["degraded"] = state.degraded
+    if checkpoint is not None:
+        checkpoint.save(state.negotiation_id, state.snapshot())
+
 # =========================
 # Main Negotiation Loop
+def play_turns(state, renderer, stream=True, tracer=NULL_TRACER, checkpoint=None):
+    """Event generator for the turns still to play (see stream_negotiation)."""
+    product, market_price = state.params["product"], state.params["market_price"]
+    while state.result is None:
+        round_num = state.round_num
+        agent = start_turn(state, tracer)
+        if agent is state.buyer:
+            decision, message = yield from buyer_turn(round_num, agent, product, market_price,
+                                                      renderer, stream, tracer)
+        else:
+            decision, message = yield from seller_turn(agent, renderer, round_num, product,
+                                                       market_price, stream, tracer)
+        finish_turn(state, agent, decision, message, checkpoint)
+        yield {"type": "turn_end", "turn": state.history[-1]}
+    yield {"type": "result", "result": state.result}
+
+def stream_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                       seller_name, seller_personality, seller_min_price, renderer="llm", llm=None,
+                       cache=None, stream=True, tracer=None, checkpoint=None, negotiation_id=None,
+                       pipeline=False, policy=None, turn_timeout=None, deadline=None,
+                       buyer_policy=None, seller_policy=None):
+    """
+    Run a negotiation as a stream of events so UIs can show each turn as it happens:
+      {"type": "turn_start", "round", "speaker", "personality", "action", "offer"}
+      {"type": "token", "speaker", "text"}           (only with stream=True)
+      {"type": "turn_end", "turn": <history entry, a dict-like turn_log.TurnView>}
+      {"type": "result", "result": <run_negotiation result>}   (always last)
+    tracer: optional tracing.Tracer recording parse/decide/llm spans.
+    checkpoint: optional store from checkpoints.py; state is saved under negotiation_id
+    (a fresh one if not given, reported in the result) after every turn.
+    pipeline: decide every turn first, passing offers as numbers, and generate the
+    messages concurrently; events arrive once each message is ready, without tokens.
+    Not combinable with checkpoint (the agents run ahead of the recorded turns).
+    policy: agents.POLICIES entry for both agents ("optimal" uses policy.py's solved tables);
+    buyer_policy or seller_policy, when given, replaces it for that side.
+    turn_timeout, deadline: seconds allowed per message and for the whole negotiation; a
+    generation that overruns is replaced by a template message and listed in the
+    result's "degraded" (see message_renderer.DeadlineRenderer).
+    """
+    if pipeline and checkpoint is not None:
+        raise ValueError("checkpoint is not supported with pipeline=True")
+    tracer = bind_negotiation(tracer)
+    renderer, buyer, seller = setup_negotiation(buyer_name, buyer_personality, buyer_budget,
+                                                seller_name, seller_personality, seller_min_price,
+                                                renderer, llm, cache, policy, buyer_policy, seller_policy)
+    if checkpoint is not None and negotiation_id is None:
+        negotiation_id = uuid.uuid4().hex
+    params = negotiation_params(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                                seller_name, seller_personality, seller_min_price)
+    state = NegotiationState(params, buyer, seller, negotiation_id, renderer)
+    renderer = bound_renderer(state, renderer, turn_timeout, deadline)
+    if pipeline:
+        yield from play_pipelined(state, renderer, tracer)
+    else:
+        yield from play_turns(state, renderer, stream, tracer, checkpoint)
+
 def run_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
-                    seller_name, seller_personality, seller_min_price):
-
-    buyer = BuyerAgent(buyer_name, buyer_personality, buyer_budget)
-    seller = SellerAgent(seller_name, seller_personality, seller_min_price)
-
-    history = []
-    seller_message = ""
-
-    for round_num in range(1, 11):
-        # BUYER TURN
-        buyer.observe_seller(seller_message)
-        buyer_decision, buyer_message = buyer_turn(round_num, buyer, product, market_price)
-        history.append({
-            "round": round_num,
-            "speaker": buyer_name,
-            "personality": buyer.personality_type,
-            "message": buyer_message,
-            "action": buyer_decision['action'],
-            "offer": buyer_decision['offer']
-        })
-        if buyer_decision['action'] in ["accept", "walk_away"]:
-            return {"status": "Deal Reached" if buyer_decision['action']=="accept" else "No Deal",
-                    "price": buyer_decision['offer'], "history": history}
-
-        # SELLER TURN
-        seller.observe_buyer(buyer_message)
-        seller_decision, seller_message = seller_turn(seller)
-        history.append({
-            "round": round_num,
-            "speaker": seller_name,
-            "personality": seller.personality_type,
-            "message": seller_message,
-            "action": seller_decision['action'],
-            "offer": seller_decision['offer']
-        })
-        if seller_decision['action'] in ["accept", "walk_away"]:
-            return {"status": "Deal Reached" if seller_decision['action']=="accept" else "No Deal",
-                    "price": seller_decision['offer'], "history": history}
-
-    return {"status": "No Deal After Max Rounds", "history": history}
+                    seller_name, seller_personality, seller_min_price, renderer="llm", llm=None,
+                    cache=None, tracer=None, checkpoint=None, negotiation_id=None, pipeline=False,
+                    policy=None, turn_timeout=None, deadline=None, buyer_policy=None, seller_policy=None):
+    """
+    renderer: "llm" (one generation per turn), "template" (canned lines) or
+    "none" (headless, no text); any object with a render() method also works.
+    llm: client for both agents; defaults to the shared one from llm_client.get_llm().
+    cache: optional llm_cache.ResponseCache answering repeated prompts.
+    tracer: optional tracing.Tracer; spans per turn phase go to its sink.
+    checkpoint: optional checkpoints store, saved after every turn (see resume_negotiation).
+    pipeline: generate messages concurrently, off the decision path (see stream_negotiation).
+    policy: None for the hand-tuned concession rules, "optimal" for the solved policy tables;
+    buyer_policy and seller_policy set one side only (e.g. an optimal buyer against the rules).
+    turn_timeout, deadline: latency budgets in seconds, with template fallback (see stream_negotiation).
+    The result's "history" is a turn_log.TurnLog: a sequence of dict-like turns
+    with columnar export (to_numpy, turn_log.to_arrow).
+    """
+    for event in stream_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                                    seller_name, seller_personality, seller_min_price,
+                                    renderer, llm, cache, stream=False, tracer=tracer,
+                                    checkpoint=checkpoint, negotiation_id=negotiation_id, pipeline=pipeline,
+                                    policy=policy, turn_timeout=turn_timeout, deadline=deadline,
+                                    buyer_policy=buyer_policy, seller_policy=seller_policy):
+        pass
+    return event["result"]
+
+# =========================
+# Pipelined mode: numeric decisions run ahead, messages are generated concurrently
+def plan_turns(state, tracer=NULL_TRACER):
+    """
+    Make every remaining decision without waiting for any message: each agent
+    observes the other's offer as a number. Returns [(round_num, agent, decision)]
+    up to the closing turn; decisions carry the counterpart offer their agent saw.
+    """
+    market_price = state.params["market_price"]
+    turn, offer, planned = state.turn, state.offer, []
+    while True:
+        round_num = turn // 2 + 1
+        agent = state.buyer if turn % 2 == 0 else state.seller
+        observe(agent, round_num, "", offer, tracer)
+        with tracer.span("decide", round_num, agent):
+            decision = agent.decide_offer(market_price) if agent is state.buyer else agent.decide_offer()
+        decision["counterpart_offer"] = counterpart_offer(agent)
+        planned.append((round_num, agent, decision))
+        turn += 1
+        offer = decision['offer']
+        if decision['action'] in ("accept", "walk_away") or turn >= 2 * MAX_ROUNDS:
+            return planned
+
+def render_turn(renderer, agent, decision, round_num, product, market_price, tracer=NULL_TRACER, after=None):
+    """Generate one planned turn's message, after the future `after` (the agent's previous turn) if given."""
+    if after is not None:
+        after.result()
+    with tracer.span("llm", round_num, agent, decision['action']) as span:
+        return renderer.render(agent, decision, round_num=round_num, product=product,
+                               market_price=market_price, stats=span.attrs)
+
+async def arender_turn(renderer, agent, decision, round_num, product, market_price, tracer=NULL_TRACER, after=None):
+    if after is not None:
+        await after
+    with tracer.span("llm", round_num, agent, decision['action']) as span:
+        return await renderer.arender(agent, decision, round_num=round_num, product=product,
+                                      market_price=market_price, stats=span.attrs)
+
+def play_pipelined(state, renderer, tracer=NULL_TRACER, workers=None):
+    """
+    play_turns for pipelined mode (no token events). All generations start at once;
+    renderers marked sequential (the chat renderer) still generate each agent's
+    turns in order, so the buyer's and seller's chains overlap with each other.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    product, market_price = state.params["product"], state.params["market_price"]
+    planned = plan_turns(state, tracer)
+    sequential = getattr(renderer, "sequential", False)
+    last = {}
+    with ThreadPoolExecutor(max_workers=workers or (2 if sequential else len(planned))) as pool:
+        futures = []
+        for round_num, agent, decision in planned:
+            futures.append(pool.submit(render_turn, renderer, agent, decision, round_num, product,
+                                       market_price, tracer, last.get(agent) if sequential else None))
+            last[agent] = futures[-1]
+        for (round_num, agent, decision), future in zip(planned, futures):
+            yield {"type": "turn_start", "round": round_num, "speaker": agent.name,
+                   "personality": agent.personality_type, "action": decision['action'], "offer": decision['offer']}
+            finish_turn(state, agent, decision, future.result())
+            yield {"type": "turn_end", "turn": state.history[-1]}
+    yield {"type": "result", "result": state.result}
+
+async def aplay_pipelined(state, renderer, tracer=NULL_TRACER):
+    """Async play_pipelined: one task per planned turn; returns the result."""
+    import asyncio
+
+    product, market_price = state.params["product"], state.params["market_price"]
+    planned = plan_turns(state, tracer)
+    sequential = getattr(renderer, "sequential", False)
+    last, tasks = {}, []
+    for round_num, agent, decision in planned:
+        tasks.append(asyncio.ensure_future(arender_turn(renderer, agent, decision, round_num, product, market_price,
+                                                        tracer, last.get(agent) if sequential else None)))
+        last[agent] = tasks[-1]
+    try:
+        for (round_num, agent, decision), task in zip(planned, tasks):
+            finish_turn(state, agent, decision, await task)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return state.result
+
+# =========================
+# Resume from a checkpoint
+def stream_resume(checkpoint, negotiation_id, renderer="llm", llm=None, cache=None, stream=True, tracer=None,
+                  turn_timeout=None, deadline=None):
+    """
+    Continue a checkpointed negotiation at its next turn, as stream_negotiation events.
+    Played turns are restored from the store, not regenerated, and so are the
+    agents' chats with the model; a finished negotiation yields its result
+    straight away. turn_timeout and deadline budget the remaining turns.
+    """
+    saved = checkpoint.load(negotiation_id)
+    if saved is None:
+        raise KeyError(f"No checkpoint for negotiation {negotiation_id!r}")
+    params = saved["params"]
+    tracer = bind_negotiation(tracer)
+    renderer, buyer, seller = setup_negotiation(params["buyer_name"], params["buyer_personality"],
+                                                params["buyer_budget"], params["seller_name"],
+                                                params["seller_personality"], params["seller_min_price"],
+                                                renderer, llm, cache)
+    state = NegotiationState(params, buyer, seller, negotiation_id, renderer).restore(saved)
+    renderer = bound_renderer(state, renderer, turn_timeout, deadline)
+    yield from play_turns(state, renderer, stream, tracer, checkpoint)
+
+def resume_negotiation(checkpoint, negotiation_id, renderer="llm", llm=None, cache=None, tracer=None,
+                       turn_timeout=None, deadline=None):
+    """run_negotiation for a checkpointed negotiation: plays only the remaining turns."""
+    for event in stream_resume(checkpoint, negotiation_id, renderer, llm, cache, stream=False, tracer=tracer,
+                               turn_timeout=turn_timeout, deadline=deadline):
+        pass
+    return event["result"]
+
+# =========================
+# Async Negotiation Loop
+async def arun_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                           seller_name, seller_personality, seller_min_price, renderer="llm", llm=None,
+                           cache=None, tracer=None, checkpoint=None, negotiation_id=None, pipeline=False,
+                           policy=None, turn_timeout=None, deadline=None, buyer_policy=None, seller_policy=None):
+    """Same as run_negotiation, but awaits each generation so many negotiations can share one loop."""
+    if pipeline and checkpoint is not None:
+        raise ValueError("checkpoint is not supported with pipeline=True")
+    tracer = bind_negotiation(tracer)
+    renderer, buyer, seller = setup_negotiation(buyer_name, buyer_personality, buyer_budget,
+                                                seller_name, seller_personality, seller_min_price,
+                                                renderer, llm, cache, policy, buyer_policy, seller_policy)
+    if checkpoint is not None and negotiation_id is None:
+        negotiation_id = uuid.uuid4().hex
+    params = negotiation_params(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                                seller_name, seller_personality, seller_min_price)
+    state = NegotiationState(params, buyer, seller, negotiation_id, renderer)
+    renderer = bound_renderer(state, renderer, turn_timeout, deadline)
+    if pipeline:
+        return await aplay_pipelined(state, renderer, tracer)
+
+    while state.result is None:
+        round_num = state.round_num
+        agent = start_turn(state, tracer)
+        if agent is buyer:
+            decision, message = await abuyer_turn(round_num, buyer, product, market_price, renderer, tracer)
+        else:
+            decision, message = await aseller_turn(seller, renderer, round_num, product, market_price, tracer)
+        finish_turn(state, agent, decision, message, checkpoint)
+    return state.result
+
+async def arun_negotiations(scenarios, renderer="llm", llm=None, max_concurrency=8, cache=None, tracer=None,
+                            pipeline=False, max_batch_size=None, max_batch_wait=0.01, turn_timeout=None,
+                            deadline=None):
+    """
+    Run many negotiations concurrently against one LLM server.
+    scenarios: iterable of dicts with run_negotiation's keyword arguments.
+    At most max_concurrency generations are in flight at any time; cache hits don't count.
+    With max_batch_size, generations requested within max_batch_wait seconds of each
+    other go to the client as one batch (BatchingLLM). That is one round trip only on a
+    server with a batch endpoint; ChatOllama sends a batch as one request per prompt, and
+    max_concurrency still counts each of them.
+    With renderer "routed" (or a routing.RoutingRenderer) each route's own client gets the
+    same limit, batching and cache, and the routes share the max_concurrency slots.
+    turn_timeout and deadline apply to each negotiation separately.
+    """
+    import asyncio
+
+    limiter = ConcurrencyLimitedLLM(None, max_concurrency)
+
+    def wrap(client):
+        client = limiter.wrap(client)
+        if max_batch_size:
+            client = BatchingLLM(client, max_batch_size, max_batch_wait)
+        if cache is not None:
+            client = CachedLLM(client, cache)
+        return client
+
+    if renderer in ("llm", "oneshot"):
+        renderer = get_renderer(renderer, wrap(llm or get_llm()))
+    else:
+        renderer = get_renderer(renderer)
+        if hasattr(renderer, "wrapped"):
+            renderer = renderer.wrapped(wrap)
+    return await asyncio.gather(*(arun_negotiation(**scenario, renderer=renderer, tracer=tracer, pipeline=pipeline,
+                                                   turn_timeout=turn_timeout, deadline=deadline)
+                                  for scenario in scenarios))
 
 # =========================
 # Streamlit UI
+def show_outcome(st, result):
+    if result["status"] == "Deal Reached":
+        st.success(f"🎉 Deal reached at ₹{int(round(result['price'])):,}!")
+    elif result["status"] == "No Deal":
+        st.warning("Negotiation ended with no deal.")
+    else:
+        st.info("No deal after max rounds.")
+    if result.get("degraded"):
+        st.caption(f"{len(result['degraded'])} message(s) used a canned line after the model overran its time budget.")
+
+def replay(st, result, seller_name):
+    """Show a stored negotiation at once, without any LLM call."""
+    for turn in result["history"]:
+        with st.chat_message("assistant" if turn['speaker'] == seller_name else "user"):
+            st.markdown(f"**{turn['speaker']} ({turn['personality']}):** {turn['message']}")
+    show_outcome(st, result)
+
 def main():
+    import streamlit as st  # only the UI needs Streamlit
+    from streamlit_cache import transcript_store
+
     st.title("🤝 AI Negotiation Simulator with LLaMA 3.1:8b")
 
     product = st.text_input("Product", "Smartphone")
@@ -138,24 +522,52 @@ def main():
     seller_personality = st.selectbox("Seller Personality", ["Aggressive Trader", "Diplomatic Seller", "Data-Driven Seller", "Creative Wildcard"])
     seller_min_price = st.number_input("Seller Minimum Price (₹)", 1000, 100000, 14000)
 
-    if st.button("Start Negotiation"):
-        result = run_negotiation(
-            product, market_price, buyer_name, buyer_personality, buyer_budget,
-            seller_name, seller_personality, seller_min_price
-        )
+    typing_delay = st.sidebar.slider("Typing delay per character (s)", 0.0, 0.06, 0.0, 0.005,
+                                     help="Artificial typing effect; off by default")
+
+    # Transcripts are stored by their inputs, so reruns replay instead of negotiating again
+    params = (product, market_price, buyer_name, buyer_personality, buyer_budget,
+              seller_name, seller_personality, seller_min_price)
+    store = transcript_store()
+    cached = store.get(params)
+
+    start_col, rerun_col = st.columns(2)
+    start = start_col.button("Start Negotiation")
+    if rerun_col.button("New run", disabled=cached is None,
+                        help="Negotiate again in the background; the stored transcript stays on screen"):
+        store.submit(params, run_negotiation, *params, turn_timeout=TURN_TIMEOUT, deadline=NEGOTIATION_DEADLINE)
+    if store.running(params):
+        st.info("A new run is in progress; showing the last transcript until it finishes.")
+        st.button("Refresh")
+    error = store.pop_error()
+    if error is not None:
+        st.error(f"The background run failed ({type(error).__name__}: {error}); the last transcript is kept.")
 
+    if cached is not None:
         st.markdown("### Negotiation History")
-        for turn in result["history"]:
-            with st.chat_message("assistant" if turn['speaker'] == seller_name else "user"):
-                stream_typing_effect(f"**{turn['speaker']} ({turn['personality']}):** {turn['message']}")
-            time.sleep(0.8)
-
-        if result["status"] == "Deal Reached":
-            st.success(f"🎉 Deal reached at ₹{int(round(result['price'])):,}!")
-        elif result["status"] == "No Deal":
-            st.warning("Negotiation ended with no deal.")
-        else:
-            st.info("No deal after max rounds.")
+        replay(st, cached, seller_name)
+    elif start:
+        st.markdown("### Negotiation History")
+        for event in stream_negotiation(*params, turn_timeout=TURN_TIMEOUT, deadline=NEGOTIATION_DEADLINE):
+            if event["type"] == "turn_start":
+                header = f"**{event['speaker']} ({event['personality']}):** "
+                with st.chat_message("assistant" if event['speaker'] == seller_name else "user"):
+                    placeholder = st.empty()
+                text = ""
+                placeholder.markdown(header + "…")
+            elif event["type"] == "token":
+                for char in (event["text"] if typing_delay else [event["text"]]):
+                    text += char
+                    placeholder.markdown(header + text)
+                    if typing_delay:
+                        time.sleep(typing_delay)
+            elif event["type"] == "turn_end":
+                placeholder.markdown(header + event["turn"]["message"])
+            elif event["type"] == "result":
+                result = event["result"]
+
+        store.put(params, result)
+        show_outcome(st, result)
 
 if __name__ == "__main__":
     main()
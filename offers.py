@@ -0,0 +1,73 @@
+"""
+Offers as data instead of prose.
+
+The engine already knows each turn's offer as a float, so it hands the
+counterpart an OfferMessage (text plus offer) and nothing is parsed. Only
+genuinely free text, such as the manual-entry Streamlit pages, goes through
+extract_offer(), a single precompiled pass that understands ₹/Rs/INR,
+Indian and Western digit grouping, and "k", "lakh" and "crore".
+"""
+import re
+
+MULTIPLIERS = {"k": 1e3, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5,
+               "crore": 1e7, "crores": 1e7, "cr": 1e7}
+
+AMOUNT_PATTERN = re.compile(r"""
+    (?: (?P<currency>₹|\brs\.?|\binr) \s* | (?<!\w) )    # currency sign, or a standalone number
+    (?<!\d\.)
+    (?P<number> \d{1,3}(?:,\d{2,3})+(?:\.\d+)? | \d+(?:\.\d+)? )
+    (?![.,]?\d)
+    (?: \s* (?P<multiplier> k|lakhs?|lacs?|crores?|cr ) \b | (?![^\W\d]) )   # "15k", not "8b"
+    (?P<unit> \s* (?: % | (?:days?|hours?|hrs?|weeks?|months?|years?|yrs?|mins?|minutes?|
+                            rounds?|units?|pieces?|pcs|gb|mb|tb|x) \b ) )?
+""", re.IGNORECASE | re.VERBOSE)
+
+# Bare numbers below this are more likely counts or versions ("llama 3.1") than prices
+MIN_BARE_AMOUNT = 100
+
+
+class OfferMessage:
+    """A turn's message text together with the offer it carries (None if no offer)."""
+
+    __slots__ = ("text", "offer")
+
+    def __init__(self, text, offer=None):
+        self.text = text
+        self.offer = offer
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"OfferMessage({self.text!r}, offer={self.offer!r})"
+
+
+def extract_offer(text):
+    """
+    The offer in a free-text message, or None.
+    Amounts marked with a currency or multiplier win over bare numbers; a bare
+    number only counts from MIN_BARE_AMOUNT up, and numbers followed by a unit
+    ("2 days", "10%") or glued to letters ("8b") are skipped.
+    """
+    bare = None
+    for match in AMOUNT_PATTERN.finditer(text):
+        if match["unit"]:
+            continue
+        value = float(match["number"].replace(",", ""))
+        multiplier = match["multiplier"]
+        if multiplier:
+            value *= MULTIPLIERS[multiplier.lower()]
+        if match["currency"] or multiplier:
+            return value
+        if bare is None and value >= MIN_BARE_AMOUNT:
+            bare = value
+    return bare
+
+
+def offer_from(message, offer=None):
+    """Offer given explicitly, carried by an OfferMessage, or else extracted from the text."""
+    if offer is not None:
+        return float(offer)
+    if isinstance(message, OfferMessage):
+        return None if message.offer is None else float(message.offer)
+    return extract_offer(message) if message else None
@@ -0,0 +1,185 @@
+"""
+Offer policies solved ahead of time by backward induction, so an agent's
+decision is one table lookup per turn.
+
+Prices are fractions of the agent's own limit (the buyer's budget, the
+seller's minimum price) snapped to a grid, so one table serves every budget.
+The other side is a CounterpartModel: its limit lies uniformly in a range of
+those fractions; it accepts an offer it can afford with a probability that
+grows towards the deadline, and otherwise answers by moving `concession` of
+the way towards it (never past its expected limit). A deal one turn later is
+worth `discount` less, the cost of one more message; with the short default
+horizon and a steep discount, two policy agents close in no more turns than
+the hand-tuned rules do. For every (turn, counterpart's
+standing offer) the table holds the action (accept, counter at a price, walk
+away) with the highest expected surplus.
+
+    python policy.py --out policies.json     precompute tables; load_policies() reads them back
+"""
+import argparse
+import json
+
+GRID_LOW, GRID_HIGH, GRID_STEP = 0.5, 2.0, 0.01
+GRID_SIZE = round((GRID_HIGH - GRID_LOW) / GRID_STEP) + 1
+DEFAULT_ROUNDS = 3
+DISCOUNT = 0.8
+
+ACTIONS = ("accept", "counter", "walk_away")
+ACCEPT, COUNTER, WALK_AWAY = range(3)
+
+
+def grid_price(index):
+    return GRID_LOW + index * GRID_STEP
+
+
+def grid_index(fraction):
+    return min(max(round((fraction - GRID_LOW) / GRID_STEP), 0), GRID_SIZE - 1)
+
+
+class CounterpartModel:
+    """What one side assumes of the other; limits are fractions of its own limit."""
+
+    __slots__ = ("limit_low", "limit_high", "concession")
+
+    def __init__(self, limit_low, limit_high, concession=0.5):
+        self.limit_low = limit_low
+        self.limit_high = limit_high
+        self.concession = concession
+
+    def to_state(self):
+        return [self.limit_low, self.limit_high, self.concession]
+
+
+DEFAULT_MODELS = {
+    # Narrow ranges: with wide ones two policy agents each hold out for a deal the other can't make
+    "buyer": CounterpartModel(0.85, 1.0),   # seller's minimum price, as a fraction of the budget
+    "seller": CounterpartModel(1.0, 1.15),  # buyer's budget, as a fraction of the minimum price
+}
+
+
+class OfferPolicy:
+    """Solved table: actions[turn][standing] and offers[turn][standing] (grid indices)."""
+
+    __slots__ = ("role", "rounds", "model", "actions", "offers")
+
+    def __init__(self, role, rounds, model, actions, offers):
+        self.role = role
+        self.rounds = rounds
+        self.model = model
+        self.actions = actions
+        self.offers = offers
+
+    def opening_index(self):
+        # No offer from the other side yet: assume it stands at the far end of its limits
+        return grid_index(self.model.limit_high if self.role == "buyer" else self.model.limit_low)
+
+    def decide(self, turn, standing, limit):
+        """
+        (action, offer) for the agent's turn-th turn (0-based), facing the counterpart's
+        standing offer (a price, or None). Accepting or walking away keeps that price.
+        """
+        if turn >= self.rounds:
+            # Past the horizon: take any deal within our limit, otherwise leave
+            if standing is not None and (standing <= limit) == (self.role == "buyer"):
+                return "accept", standing
+            return "walk_away", standing if standing is not None else limit
+        index = self.opening_index() if standing is None else grid_index(standing / limit)
+        action = self.actions[turn][index]
+        if action == COUNTER:
+            return "counter", round(grid_price(self.offers[turn][index]) * limit, 2)
+        return ACTIONS[action], standing if standing is not None else limit
+
+    def to_state(self):
+        return {"role": self.role, "rounds": self.rounds, "model": self.model.to_state(),
+                "actions": [list(row) for row in self.actions], "offers": [list(row) for row in self.offers]}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["role"], state["rounds"], CounterpartModel(*state["model"]),
+                   [bytes(row) for row in state["actions"]], state["offers"])
+
+
+def solve(role, rounds=DEFAULT_ROUNDS, model=None, discount=DISCOUNT):
+    """
+    Backward induction from the last turn: a turn's best action only needs the
+    values of the next turn, so each turn's values are computed once and reused
+    by every standing offer of the turn before.
+    """
+    model = model or DEFAULT_MODELS[role]
+    sign = 1 if role == "seller" else -1  # which way a higher price moves our surplus
+    surplus = [sign * (grid_price(i) - 1.0) for i in range(GRID_SIZE)]
+    limits = [i for i in range(GRID_SIZE) if model.limit_low - 1e-9 <= grid_price(i) <= model.limit_high + 1e-9]
+    # reach[i]: counterpart limits that allow it to take price i
+    reach = [sum(sign * (limit - i) >= 0 for limit in limits) for i in range(GRID_SIZE)]
+    expected_limit = grid_index((model.limit_low + model.limit_high) / 2)
+    # Prices we would ever propose: no worse for us than our own limit
+    candidates = [i for i in range(GRID_SIZE) if surplus[i] >= 0]
+
+    def affordable(price, standing):
+        # Its standing offer is within its limit, which rules out limits short of it
+        return reach[price] / (reach[standing] or len(limits))
+
+    next_values = [0.0] * GRID_SIZE  # after the last turn: no deal
+    actions, offers = [None] * rounds, [None] * rounds
+    for turn in reversed(range(rounds)):
+        pressure = (turn + 1) / rounds
+        values, row_actions, row_offers = [0.0] * GRID_SIZE, bytearray(GRID_SIZE), [0] * GRID_SIZE
+        for standing in range(GRID_SIZE):
+            best, action, offer = 0.0, WALK_AWAY, standing
+            if surplus[standing] >= best:
+                best, action = surplus[standing], ACCEPT
+            for i in candidates:
+                if sign * (i - standing) <= 0:
+                    continue  # accepting the standing offer is at least as good
+                accepted = affordable(i, standing) * pressure
+                target = expected_limit if sign * (i - expected_limit) > 0 else i
+                reply = standing + round(model.concession * (target - standing))
+                value = discount * (accepted * surplus[i] + (1 - accepted) * next_values[reply])
+                if value > best + 1e-12:
+                    best, action, offer = value, COUNTER, i
+            values[standing], row_actions[standing], row_offers[standing] = best, action, offer
+        next_values = values
+        actions[turn], offers[turn] = bytes(row_actions), row_offers
+    return OfferPolicy(role, rounds, model, actions, offers)
+
+# =========================
+# Precomputed tables
+_policies = {}  # (role, rounds) -> OfferPolicy
+
+
+def get_policy(role, rounds=DEFAULT_ROUNDS):
+    """Table for role and horizon: loaded by load_policies(), else solved once and kept."""
+    key = (role, rounds)
+    policy = _policies.get(key)
+    if policy is None:
+        policy = _policies[key] = solve(role, rounds)
+    return policy
+
+
+def save_policies(path, policies):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([policy.to_state() for policy in policies], f, separators=(",", ":"))
+
+
+def load_policies(path):
+    """Register the tables saved in path; get_policy() then serves them without solving."""
+    with open(path, encoding="utf-8") as f:
+        policies = [OfferPolicy.from_state(state) for state in json.load(f)]
+    for policy in policies:
+        _policies[(policy.role, policy.rounds)] = policy
+    return policies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute offer policy tables")
+    parser.add_argument("--out", default="policies.json")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[DEFAULT_ROUNDS])
+    args = parser.parse_args(argv)
+
+    policies = [solve(role, rounds) for role in ("buyer", "seller") for rounds in args.rounds]
+    save_policies(args.out, policies)
+    print(f"Saved {len(policies)} policies to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
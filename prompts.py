@@ -0,0 +1,121 @@
+"""
+Prompt library: every prompt the LLM renderers send, compiled once and keyed
+by (role, personality, turn type).
+
+Compiling bakes the role, the other side and the personality into each
+template, so a turn only fills in its numbers. Each entry also carries a
+generation budget: num_predict (Ollama's cap on generated tokens) and stop
+sequences (a blank line, or the model starting to write the other side's
+line). The prompts ask for 1–2 sentences; the caps make sure a model that
+rambles on anyway stops there. Renderers report the cap and the tokens
+actually generated in each turn's stats ("num_predict", "completion_tokens").
+"""
+import threading
+
+TURN_TYPES = ("opening", "counter", "accept", "walk_away")
+
+# Generated-token caps per turn type, sized for 1–2 sentences
+BUDGETS = {"opening": 80, "counter": 64, "accept": 48, "walk_away": 64}
+
+# One-shot prompts (LLMRenderer). {role}, {other} and {personality} are filled in when compiling
+ONESHOT = {
+    "opening": ("You are a Buyer AI with personality: {personality}.\n"
+                "You are starting negotiation for {{product}} at market price ₹{{market_price}}.\n"
+                "Generate a natural, polite, concise opening message."),
+    "accept": ("You are a {role} AI with personality: {personality}.\n"
+               "{other} offered ₹{{other_offer}}.\n"
+               "You accept the offer. Respond naturally, politely, and concisely."),
+    "walk_away": ("You are a {role} AI with personality: {personality}.\n"
+                  "{other} offered ₹{{other_offer}}.\n"
+                  "You cannot agree. Politely walk away from negotiation in 1–2 sentences."),
+    "counter": ("You are a {role} AI with personality: {personality}.\n"
+                "{other} offered ₹{{other_offer}}.\n"
+                "You counteroffer ₹{{offer}}.\n"
+                "Respond naturally, politely, and concisely in 1–2 sentences."),
+}
+
+# Multi-turn chat (ChatRenderer): one system prompt per agent, then one short user turn per message
+SYSTEM = ("You are a {role} AI with personality: {personality}. "
+          "You are negotiating for {{product}}{{market}}. "
+          "Each user message tells you the other side's offer and what you decided. "
+          "Reply in character, naturally, politely and concisely in 1–2 sentences.")
+CHAT_TURNS = {
+    "opening": "Open the negotiation. You offer ₹{{offer}}.",
+    "accept": "{other} offered ₹{{other_offer}}. You accept.",
+    "walk_away": "{other} offered ₹{{other_offer}}. You cannot agree; walk away.",
+    "counter": "{other} offered ₹{{other_offer}}. You counteroffer ₹{{offer}}.",
+}
+
+
+class Prompt:
+    """One compiled entry: templates with only the turn's numbers left to fill, plus its budget."""
+
+    __slots__ = ("role", "personality", "kind", "oneshot", "system", "turn", "num_predict", "stop")
+
+    def __init__(self, role, personality, kind, oneshot, system, turn, num_predict=None, stop=()):
+        self.role = role
+        self.personality = personality
+        self.kind = kind
+        self.oneshot = oneshot
+        self.system = system
+        self.turn = turn
+        self.num_predict = num_predict
+        self.stop = stop
+
+
+def compile_prompt(role, personality, kind, num_predict=None):
+    names = {"role": role.capitalize(), "other": "Seller" if role == "buyer" else "Buyer",
+             "personality": personality.replace("{", "{{").replace("}", "}}")}
+    return Prompt(role, personality, kind, ONESHOT[kind].format(**names), SYSTEM.format(**names),
+                  CHAT_TURNS[kind].format(**names), num_predict, ("\n\n", f"\n{names['other']}:"))
+
+
+class PromptLibrary:
+    """
+    Compiled prompts for every known personality, built up front. A personality
+    outside the lists is compiled on first use and kept. budgets maps turn type
+    to num_predict ({} for no caps).
+    """
+
+    def __init__(self, buyer_personalities=(), seller_personalities=(), budgets=None):
+        self.budgets = BUDGETS if budgets is None else budgets
+        self._entries = {}
+        self._lock = threading.Lock()
+        for role, personalities in (("buyer", buyer_personalities), ("seller", seller_personalities)):
+            for personality in personalities:
+                for kind in TURN_TYPES:
+                    self._entries[(role, personality, kind)] = self._compile(role, personality, kind)
+
+    def _compile(self, role, personality, kind):
+        return compile_prompt(role, personality, kind, self.budgets.get(kind))
+
+    def get(self, role, personality, kind):
+        key = (role, personality, kind)
+        entry = self._entries.get(key)
+        if entry is None:
+            if kind not in TURN_TYPES:
+                raise ValueError(f"Unknown turn type: {kind}")
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = self._compile(role, personality, kind)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def default_library():
+    """The shared library for the personalities the UIs offer, built on first use."""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                from agents import BUYER_PERSONALITIES, SELLER_PERSONALITIES  # agents imports the renderers
+
+                _library = PromptLibrary(BUYER_PERSONALITIES, SELLER_PERSONALITIES)
+    return _library
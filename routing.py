@@ -0,0 +1,238 @@
+"""
+Model routing: each message goes to the model (or canned template) its turn
+deserves. Openings and the decisive accept / walk-away lines stay on the large
+model; routine mid-game counters can go to a small local model or to templates.
+
+Routes and rules are plain config (a dict, or JSON via load_routing()):
+
+    {"routes": {"large": {"model": "llama3.1:8b"},
+                "small": {"model": "llama3.2:1b", "num_predict": 60},
+                "template": {"template": true}},
+     "rules": [{"turn": ["counter"], "rounds": [2, 8], "route": "small"}],
+     "default": "large"}
+
+The first rule whose turn types and round range (inclusive, either may be
+omitted) match picks the route; otherwise "default". Route settings other than
+model/template (temperature, num_predict, ...) go to the client. Every route
+counts its calls, latency and tokens; RoutingRenderer.report() sums them up,
+merge_reports() adds up reports from several processes and format_report()
+prints them. The CLIs take such a file with --routing CONFIG and print the
+report at the end of a run.
+"""
+import json
+import threading
+import time
+import weakref
+
+from llm_client import DEFAULT_MODEL, DEFAULT_TEMPERATURE, get_llm
+from message_renderer import ChatRenderer, TemplateRenderer, turn_type
+
+DEFAULT_ROUTING = {
+    "routes": {
+        "large": {"model": DEFAULT_MODEL},
+        "small": {"model": "llama3.2:1b", "num_predict": 60},
+        "template": {"template": True},
+    },
+    "rules": [
+        {"turn": ["opening", "accept", "walk_away"], "route": "large"},
+        {"turn": ["counter"], "rounds": [2, None], "route": "small"},
+    ],
+    "default": "large",
+}
+
+
+def load_routing(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_reports(reports):
+    """Add up report() results, e.g. one per worker process or negotiation."""
+    merged = {}
+    for report in reports:
+        for name, route in report.items():
+            total = merged.setdefault(name, {"model": route["model"], "calls": 0, "mean_latency_ms": 0.0,
+                                             "prompt_tokens": 0, "completion_tokens": 0})
+            calls = total["calls"] + route["calls"]
+            if calls:
+                total["mean_latency_ms"] = (total["mean_latency_ms"] * total["calls"]
+                                            + route["mean_latency_ms"] * route["calls"]) / calls
+            total["calls"] = calls
+            total["prompt_tokens"] += route["prompt_tokens"]
+            total["completion_tokens"] += route["completion_tokens"]
+    return merged
+
+
+def format_report(report):
+    """report() as a plain-text table, one line per route."""
+    lines = [f"{'route':<12} {'model':<16} {'calls':>7} {'mean ms':>9} {'prompt tok':>11} {'completion tok':>15}"]
+    for name, route in report.items():
+        lines.append(f"{name:<12} {route['model'] or '-':<16} {route['calls']:>7} {route['mean_latency_ms']:>9.1f} "
+                     f"{route['prompt_tokens']:>11} {route['completion_tokens']:>15}")
+    return "\n".join(lines)
+
+
+class Route:
+    """One model (or the templates) with its generation settings and running totals."""
+
+    __slots__ = ("name", "model", "template", "params", "calls", "latency_ms", "prompt_tokens",
+                 "completion_tokens", "_lock")
+
+    def __init__(self, name, model=None, template=False, **params):
+        self.name = name
+        self.model = model
+        self.template = template
+        self.params = params
+        self.calls = 0
+        self.latency_ms = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def account(self, stats, started):
+        with self._lock:
+            self.calls += 1
+            self.latency_ms += (time.perf_counter() - started) * 1000
+            self.prompt_tokens += stats.get("prompt_tokens") or 0
+            self.completion_tokens += stats.get("completion_tokens") or 0
+
+    def report(self):
+        return {"model": "template" if self.template else self.model, "calls": self.calls,
+                "mean_latency_ms": self.latency_ms / self.calls if self.calls else 0.0,
+                "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens}
+
+
+class RoutingRenderer:
+    """
+    Renderer that sends each turn to the route its rules pick. All model routes
+    share one chat per agent (template lines included), so switching model
+    mid-negotiation keeps the conversation. Each model route gets its own
+    model's client from llm_client.get_llm(), passed through wrap (e.g. adding a
+    cache or a concurrency limit) if given; llm, if given, is a stand-in serving
+    every model route (tests, benchmarks), also passed through wrap.
+    """
+
+    sequential = True  # the shared chats are extended turn by turn
+
+    def __init__(self, config=None, llm=None, wrap=None):
+        config = config or DEFAULT_ROUTING
+        self.llm = llm
+        self.wrap = wrap
+        self.routes = {name: Route(name, **settings) for name, settings in config["routes"].items()}
+        self.rules = config.get("rules", [])
+        self.default = self.routes[config.get("default", next(iter(self.routes)))]
+        for rule in self.rules:
+            if rule["route"] not in self.routes:
+                raise ValueError(f"Rule routes to unknown route {rule['route']!r}")
+        self._renderers = {}
+        self._chats = weakref.WeakKeyDictionary()  # shared by every route's ChatRenderer
+        self._lock = threading.Lock()
+
+    def route_for(self, kind, round_num):
+        for rule in self.rules:
+            if "turn" in rule and kind not in rule["turn"]:
+                continue
+            low, high = rule.get("rounds") or (None, None)
+            if round_num is not None and ((low is not None and round_num < low)
+                                          or (high is not None and round_num > high)):
+                continue
+            return self.routes[rule["route"]]
+        return self.default
+
+    def wrapped(self, wrap):
+        """
+        This router with wrap applied to each route's client (after any wrap it already has).
+        The copy starts its own chats but adds to the same routes, so report() covers both.
+        """
+        inner = self.wrap
+        copy = object.__new__(RoutingRenderer)
+        copy.__dict__.update(self.__dict__, wrap=wrap if inner is None else (lambda llm: wrap(inner(llm))),
+                             _renderers={}, _chats=weakref.WeakKeyDictionary(), _lock=threading.Lock())
+        return copy
+
+    def _chat_renderer(self, route):
+        llm = self.llm or get_llm(route.model or DEFAULT_MODEL,
+                                  route.params.get("temperature", DEFAULT_TEMPERATURE),
+                                  **{k: v for k, v in route.params.items() if k != "temperature"})
+        if self.wrap is not None:
+            llm = self.wrap(llm)
+        return ChatRenderer(llm, chats=self._chats)
+
+    def renderer(self, route):
+        renderer = self._renderers.get(route.name)
+        if renderer is None:
+            with self._lock:
+                renderer = self._renderers.get(route.name)
+                if renderer is None:
+                    renderer = TemplateRenderer() if route.template else self._chat_renderer(route)
+                    self._renderers[route.name] = renderer
+        return renderer
+
+    def _template_turn(self, route, agent, decision, context):
+        """Template line, also written into the agent's chat so model routes see it."""
+        text = self.renderer(route).render(agent, decision, **context)
+        self.record_fallback(agent, decision, text, **context)
+        return text
+
+    def _pick(self, agent, decision, round_num, stats):
+        route = self.route_for(turn_type(agent, decision, round_num), round_num)
+        if stats is not None:
+            stats["route"] = route.name
+        return route, {}, time.perf_counter()
+
+    def render(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        route, own, started = self._pick(agent, decision, round_num, stats)
+        if route.template:
+            text = self._template_turn(route, agent, decision, context)
+        else:
+            text = self.renderer(route).render(agent, decision, **context, stats=own)
+        route.account(own, started)
+        if stats is not None:
+            stats.update(own)
+        return text
+
+    async def arender(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        route, own, started = self._pick(agent, decision, round_num, stats)
+        if route.template:
+            text = self._template_turn(route, agent, decision, context)
+        else:
+            text = await self.renderer(route).arender(agent, decision, **context, stats=own)
+        route.account(own, started)
+        if stats is not None:
+            stats.update(own)
+        return text
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        context = dict(round_num=round_num, product=product, market_price=market_price)
+        route, own, started = self._pick(agent, decision, round_num, stats)
+        if route.template:
+            yield self._template_turn(route, agent, decision, context)
+        else:
+            for chunk in self.renderer(route).stream(agent, decision, **context, stats=own):
+                handed_over = time.perf_counter()
+                yield chunk
+                started += time.perf_counter() - handed_over  # the consumer's time is not the route's
+        route.account(own, started)
+        if stats is not None:
+            stats.update(own)
+
+    def record_fallback(self, agent, decision, text, round_num=None, product=None, market_price=None):
+        # Any model route's ChatRenderer writes to the shared chats
+        model_route = next((r for r in self.routes.values() if not r.template), None)
+        if model_route is not None:
+            self.renderer(model_route).record_fallback(agent, decision, text, round_num, product, market_price)
+
+    def forget(self, agent):
+        self._chats.pop(agent, None)
+
+    def export_chat(self, agent):
+        return ChatRenderer(chats=self._chats).export_chat(agent)
+
+    def import_chat(self, agent, state):
+        ChatRenderer(chats=self._chats).import_chat(agent, state)
+
+    def report(self):
+        """Calls, mean latency and tokens per route."""
+        return {name: route.report() for name, route in self.routes.items()}
@@ -1,12 +1,17 @@
+import argparse
+import sys
 import time
 import random
-from buyer_bot import BuyerAgent
-from seller_bot import SellerAgent
+from agents import BuyerAgent, SellerAgent
+from message_renderer import BUYER_COUNTER_TEMPLATES, SELLER_COUNTER_TEMPLATES
 
 # =========================
 # Typing simulation for realistic dialogue
-def simulate_typing(message: str, min_delay=0.01, max_delay=0.03):
-    """Simulate human typing with random speed per character."""
+def simulate_typing(message: str, min_delay=0.0, max_delay=0.0):
+    """Print a message; with a delay range set, simulate human typing speed per character."""
+    if not max_delay:
+        print(message, flush=True)
+        return
     for char in message:
         print(char, end="", flush=True)
         time.sleep(random.uniform(min_delay, max_delay))
@@ -15,7 +20,7 @@ def simulate_typing(message: str, min_delay=0.01, max_delay=0.03):
 # =========================
 # Buyer Turn
 def buyer_turn(buyer, last_seller_offer):
-    buyer.observe_seller(str(last_seller_offer))
+    buyer.observe_seller("", offer=last_seller_offer)
     start_offer = buyer.budget * 0.8
     if last_seller_offer > 0:
         increment = (last_seller_offer - start_offer) * 0.3
@@ -23,19 +28,13 @@ def buyer_turn(buyer, last_seller_offer):
     else:
         offer = start_offer
 
-    messages = [
-        f"I can give you ₹{int(offer)}, what do you say?",
-        f"My best is ₹{int(offer)}, can we agree?",
-        f"I can offer ₹{int(offer)}, take it or leave it.",
-        f"How about ₹{int(offer)}?"
-    ]
-    message = random.choice(messages)
+    message = random.choice(BUYER_COUNTER_TEMPLATES).format(offer=int(offer))
     return {"offer": offer}, message
 
 # =========================
 # Seller Turn (fixed for profit)
 def seller_turn(seller, last_buyer_offer):
-    seller.observe_buyer(str(last_buyer_offer))
+    seller.observe_buyer("", offer=last_buyer_offer)
     # Start higher than buyer's last offer or at least 20% above min_price
     start_offer = max(seller.min_price * 1.2, last_buyer_offer + 500 if last_buyer_offer else seller.min_price * 1.5)
     # Gradual decrease toward buyer, never below min_price
@@ -44,51 +43,63 @@ def seller_turn(seller, last_buyer_offer):
     else:
         offer = max(seller.min_price, start_offer - random.randint(500, 1500))
 
-    messages = [
-        f"I can do ₹{int(offer)}, that's my offer.",
-        f"₹{int(offer)} is fair, can we agree?",
-        f"My price is ₹{int(offer)}, take it or leave it.",
-        f"How about ₹{int(offer)}?"
-    ]
-    message = random.choice(messages)
+    message = random.choice(SELLER_COUNTER_TEMPLATES).format(offer=int(offer))
     return {"offer": offer}, message
 
 # =========================
 # Main Negotiation Loop
 def run_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
-                    seller_name, seller_personality, seller_min_price):
+                    seller_name, seller_personality, seller_min_price, verbose=True, max_rounds=12,
+                    typing_delay=(0.0, 0.0), round_delay=0.0):
+    """
+    Run one heuristic negotiation and return its result.
+    With verbose=False nothing is printed (used by tournament.py).
+    typing_delay (min, max seconds per character) and round_delay are opt-in presentation delays.
+    """
     buyer = BuyerAgent(buyer_name, buyer_personality, buyer_budget)
     seller = SellerAgent(seller_name, seller_personality, seller_min_price)
 
     last_buyer_offer = 0
     last_seller_offer = 0
     final_price = 0
+    history = []
 
-    print(f"\nNegotiation started for {product} (Market Price ₹{market_price})!\n")
+    if verbose:
+        print(f"\nNegotiation started for {product} (Market Price ₹{market_price})!\n")
 
-    for round_num in range(1, 13):  # Max 12 rounds
-        print(f"--- Round {round_num} ---")
+    for round_num in range(1, max_rounds + 1):
+        if verbose:
+            print(f"--- Round {round_num} ---")
 
         # Buyer Turn
         buyer_decision, buyer_message = buyer_turn(buyer, last_seller_offer)
         last_buyer_offer = buyer_decision["offer"]
-        simulate_typing(f"{buyer_name} ({buyer_personality}): {buyer_message} (Offer: ₹{int(last_buyer_offer)})")
+        history.append({"round": round_num, "speaker": buyer_name, "personality": buyer_personality,
+                        "message": buyer_message, "offer": last_buyer_offer})
+        if verbose:
+            simulate_typing(f"{buyer_name} ({buyer_personality}): {buyer_message} (Offer: ₹{int(last_buyer_offer)})", *typing_delay)
 
         # Seller Turn
         seller_decision, seller_message = seller_turn(seller, last_buyer_offer)
         last_seller_offer = seller_decision["offer"]
-        simulate_typing(f"{seller_name} ({seller_personality}): {seller_message} (Offer: ₹{int(last_seller_offer)})\n")
+        history.append({"round": round_num, "speaker": seller_name, "personality": seller_personality,
+                        "message": seller_message, "offer": last_seller_offer})
+        if verbose:
+            simulate_typing(f"{seller_name} ({seller_personality}): {seller_message} (Offer: ₹{int(last_seller_offer)})\n", *typing_delay)
 
         # Check if deal close enough
         if abs(last_seller_offer - last_buyer_offer) <= 1000:
             final_price = int((last_seller_offer + last_buyer_offer) / 2)
             break
 
-        time.sleep(0.2)  # conversation speed
+        if verbose and round_delay:
+            time.sleep(round_delay)  # conversation speed
 
     # Force deal if max rounds reached
+    status = "Deal Reached"
     if final_price == 0:
         final_price = int((last_seller_offer + last_buyer_offer) / 2)
+        status = "Deal Forced After Max Rounds"
 
     # =========================
     # Calculate profit for both
@@ -105,14 +116,38 @@ def run_negotiation(product, market_price, buyer_name, buyer_personality, buyer_
 
     # =========================
     # Final Result
-    print(f"\n✅ DEAL SUCCESS! Final Agreed Price: ₹{final_price}")
-    print(f"Buyer Profit: ₹{buyer_profit}")
-    print(f"Seller Profit: ₹{seller_profit}")
-    print(f"Winner: {winner}\n")
+    if verbose:
+        if status == "Deal Reached":
+            print(f"\n✅ DEAL SUCCESS! Final Agreed Price: ₹{final_price}")
+        else:
+            print(f"\n⚠️ {status}. Final Price: ₹{final_price}")
+        print(f"Buyer Profit: ₹{buyer_profit}")
+        print(f"Seller Profit: ₹{seller_profit}")
+        print(f"Winner: {winner}\n")
+
+    return {"status": status, "price": final_price, "rounds": round_num,
+            "buyer_profit": buyer_profit, "seller_profit": seller_profit,
+            "winner": winner, "history": history}
 
 # =========================
 # Console Input
 if __name__ == "__main__":
+    from batch import add_batch_arguments, run_batch
+
+    parser = argparse.ArgumentParser(description="Heuristic negotiation in the terminal")
+    parser.add_argument("--typing", action="store_true",
+                        help="simulate typing (0.01-0.03 s per character, 0.2 s between rounds)")
+    parser.add_argument("--batch", metavar="SOURCE",
+                        help="run scenarios from a JSONL/CSV file (- for stdin) and print JSONL results")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
+    if args.batch:
+        written, errors = run_batch(args.batch, fmt=args.format, workers=args.workers,
+                                    window=args.window, history=args.history)
+        print(f"{written} results, {errors} errors", file=sys.stderr)
+        sys.exit(1 if errors else 0)
+
     product = input("Enter product name: ")
     market_price = int(input("Enter market price (₹): "))
 
@@ -132,5 +167,7 @@ if __name__ == "__main__":
         buyer_budget=buyer_budget,
         seller_name=seller_name,
         seller_personality=seller_personality,
-        seller_min_price=seller_min_price
+        seller_min_price=seller_min_price,
+        typing_delay=(0.01, 0.03) if args.typing else (0.0, 0.0),
+        round_delay=0.2 if args.typing else 0.0
     )
@@ -1,62 +1,5 @@
 import streamlit as st
-import re
-from langchain_community.chat_models import ChatOllama
-
-# -------------------- Seller Agent --------------------
-class SellerAgent:
-    def __init__(self, name, personality_type, min_price=None, min_rounds=3):
-        self.name = name
-        self.personality_type = personality_type
-        self.min_price = min_price if min_price else cost_price * 0.8  # fallback min price
-        self.round = 0
-        self.latest_buyer_offer = None
-        self.last_offer = None
-        self.min_rounds = min_rounds     # ✅ must negotiate at least X rounds
-        self.deal_closed = False
-        self.llm = ChatOllama(model="llama3.1:8b", temperature=0.6)
-
-    def observe_buyer(self, message: str):
-        """Extract numeric offer from buyer’s message if present"""
-        matches = re.findall(r"\d+\.?\d*", message.replace(',', ''))
-        if matches:
-            self.latest_buyer_offer = float(matches[0])
-
-    def decide(self):
-        """
-        Decide seller action based on buyer offer.
-        Returns dict with action, offer, and message.
-        """
-        self.round += 1
-        offer_to_consider = self.latest_buyer_offer
-
-        # ✅ Force deal success only after min_rounds
-        if self.round >= self.min_rounds:
-            self.deal_closed = True
-            final_offer = offer_to_consider or self.cost_price
-            prompt = f"""
-            You are a {self.personality_type} seller.
-            After thoughtful negotiation, you’ve decided to close the deal at ₹{final_offer}.
-            Respond with a short, positive acceptance in 1–2 lines.
-            """
-            message = self.llm.invoke(prompt).content
-            return {"action": "accept", "offer": final_offer, "message": message}
-
-        # Otherwise → keep negotiating (counter-offer)
-        if offer_to_consider:
-            counter_offer = max(offer_to_consider * 1.1, self.min_price)
-        else:
-            counter_offer = self.cost_price * 1.2  # start a bit higher than cost
-
-        prompt = f"""
-        You are a {self.personality_type} seller.
-        Buyer offered ₹{offer_to_consider or 0}.
-        Make a counter-offer around ₹{counter_offer:.2f}.
-        Respond briefly in 1–2 lines.
-        """
-        message = self.llm.invoke(prompt).content
-        self.last_offer = counter_offer
-        return {"action": "counter", "offer": counter_offer, "message": message}
-
+from agents import SellerAgent
 
 # -------------------- Streamlit UI --------------------
 st.title("Seller Negotiation Simulator")
@@ -79,7 +22,7 @@ with st.form(key="seller_setup_form"):
     setup_submitted = st.form_submit_button("Initialize Seller Agent")
 
 if setup_submitted:
-    st.session_state.seller = SellerAgent(seller_name, seller_personality, cost_price, min_price, min_rounds)
+    st.session_state.seller = SellerAgent(seller_name, seller_personality, min_price, min_rounds, cost_price=cost_price)
     st.session_state.history = []
     st.session_state.deal_reached = False
     st.success("✅ Seller Agent initialized!")
@@ -0,0 +1,434 @@
+"""
+HTTP service hosting many negotiation sessions at once.
+
+Each session is one BuyerAgent or SellerAgent facing a human or program on
+the other side, like buyer_bot.py and seller_bot.py but without a browser tab
+holding the agent. Session state is plain JSON kept in a bounded store, so
+workers hold nothing between requests:
+
+    POST   /sessions                      {"role": "buyer", "name", "personality", "budget", ...}
+    POST   /sessions/<id>/messages        {"message": "...", "offer": 14500}   -> agent's reply
+    GET    /sessions/<id>                 session state and last reply
+    GET    /sessions/<id>/reply           last reply only
+    DELETE /sessions/<id>
+
+MemorySessionStore keeps sessions in one process (LRU plus idle TTL).
+SqliteSessionStore keeps them in a file every worker on the host can open, so
+several server processes can sit behind one load balancer. Every session has a
+version; a turn only saves if nobody else saved the session since it was read
+(compare-and-swap), so two processes can't both play the same turn. The agent's
+chat with the model (ChatRenderer) is part of the session state as well.
+
+    python server.py --port 8080 --renderer template --store sessions.db
+"""
+import argparse
+import copy
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agents import BuyerAgent, SellerAgent, agent_from_snapshot
+from message_renderer import get_renderer
+
+SESSION_PATH = re.compile(r"^/sessions/(?P<id>[0-9a-f]{32})(?P<rest>/messages|/reply)?/?$")
+
+
+class SessionError(Exception):
+    """Bad request against a session; status is the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# =========================
+# Agents
+def number_field(spec, field, required=False):
+    """spec[field] as a finite float (None if absent and not required); SessionError(400) otherwise."""
+    value = spec.get(field)
+    if value is None:
+        if required:
+            raise SessionError(400, f"missing field: {field}")
+        return None
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = float(value)
+    except (TypeError, ValueError):
+        raise SessionError(400, f"{field} must be a number") from None
+    if not math.isfinite(value):
+        raise SessionError(400, f"{field} must be a finite number")
+    return value
+
+
+def create_agent(spec, llm=None):
+    """Build the session's agent from a create request."""
+    role = spec.get("role")
+    if role not in ("buyer", "seller"):
+        raise SessionError(400, "role must be 'buyer' or 'seller'")
+    try:
+        if role == "buyer":
+            return BuyerAgent(spec["name"], spec["personality"], number_field(spec, "budget", required=True),
+                              llm=llm, policy=spec.get("policy"))
+        min_price = number_field(spec, "min_price")
+        cost_price = number_field(spec, "cost_price")
+        if min_price is None and cost_price is None:
+            raise SessionError(400, "missing field: min_price (or cost_price)")
+        min_rounds = number_field(spec, "min_rounds")
+        return SellerAgent(spec["name"], spec["personality"], min_price,
+                           3 if min_rounds is None else int(min_rounds), cost_price, llm=llm,
+                           policy=spec.get("policy"))
+    except KeyError as e:
+        raise SessionError(400, f"missing field: {e.args[0]}") from None
+    except (TypeError, ValueError) as e:
+        raise SessionError(400, str(e)) from None
+
+# =========================
+# Session stores
+class MemorySessionStore:
+    """
+    In-process session store: at most max_sessions, least recently used evicted
+    first; sessions idle for longer than ttl seconds expire.
+    """
+
+    def __init__(self, max_sessions=10_000, ttl=3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evictions = 0
+        self._sessions = OrderedDict()  # id -> (state, last_used)
+        self._lock = threading.Lock()
+
+    def _live(self, session_id, now):
+        entry = self._sessions.get(session_id)
+        if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+            del self._sessions[session_id]
+            return None
+        return entry
+
+    def get(self, session_id):
+        """A copy of the session's state (with its "version"), or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._live(session_id, now)
+            if entry is None:
+                return None
+            self._sessions[session_id] = (entry[0], now)
+            self._sessions.move_to_end(session_id)
+            return copy.deepcopy(entry[0])
+
+    def put(self, session_id, state):
+        """Store a new session at version 0."""
+        with self._lock:
+            self._store(session_id, dict(state, version=0))
+
+    def replace(self, session_id, state, version):
+        """Save state as the next version if the session is still at version; False otherwise."""
+        with self._lock:
+            entry = self._live(session_id, time.time())
+            if entry is None or entry[0]["version"] != version:
+                return False
+            self._store(session_id, dict(state, version=version + 1))
+            return True
+
+    def _store(self, session_id, state):
+        self._sessions[session_id] = (copy.deepcopy(state), time.time())
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SqliteSessionStore:
+    """
+    Session store in a SQLite file (WAL mode) shared by every worker on the host.
+    Same bounds as MemorySessionStore, counted from each session's last turn.
+    """
+
+    def __init__(self, path, max_sessions=100_000, ttl=3600):
+        import sqlite3
+
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, last_used REAL NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:  # file from before sessions were versioned
+            self._conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+        self._conn.commit()
+
+    def get(self, session_id):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT state, last_used, version FROM sessions WHERE id = ?",
+                                     (session_id,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.commit()
+                return None
+            return dict(json.loads(row[0]), version=row[2])
+
+    def put(self, session_id, state):
+        """Store a new session at version 0."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sessions (id, state, last_used, version) VALUES (?, ?, ?, 0)",
+                               (session_id, json.dumps(dict(state, version=0)), time.time()))
+            self._wrote()
+
+    def replace(self, session_id, state, version):
+        """
+        Save state as the next version if the session is still at version; False otherwise.
+        The check and the write are one UPDATE, so it holds across processes sharing the file.
+        """
+        with self._lock:
+            updated = self._conn.execute(
+                "UPDATE sessions SET state = ?, last_used = ?, version = version + 1 WHERE id = ? AND version = ?",
+                (json.dumps(dict(state, version=version + 1)), time.time(), session_id, version)).rowcount
+            self._wrote()
+            return updated == 1
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self._prune()
+        self._conn.commit()
+
+    def _prune(self):
+        if self.ttl is not None:
+            self.evictions += self._conn.execute("DELETE FROM sessions WHERE last_used < ?",
+                                                 (time.time() - self.ttl,)).rowcount
+        self.evictions += self._conn.execute(
+            "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_used DESC "
+            "LIMIT -1 OFFSET ?)", (self.max_sessions,)).rowcount
+
+    def delete(self, session_id):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            self._conn.commit()
+            return deleted > 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+# =========================
+# Sessions
+class SessionManager:
+    """Creates sessions and plays the agent's turns; all state goes through the store."""
+
+    def __init__(self, store=None, renderer="llm", llm=None):
+        self.store = store if store is not None else MemorySessionStore()
+        self.llm = llm
+        self.renderer = get_renderer(renderer, llm)
+        # Striped: turns of one session never overlap within this process (across processes, see replace())
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def _session_lock(self, session_id):
+        return self._locks[hash(session_id) % len(self._locks)]
+
+    def create(self, spec):
+        agent = create_agent(spec, self.llm)
+        market_price = number_field(spec, "market_price")
+        session_id = uuid.uuid4().hex
+        session = {
+            "id": session_id,
+            "role": agent.role,
+            "product": spec.get("product"),
+            "market_price": market_price,
+            "agent": agent.snapshot(),
+            "chat": [],
+            "turns": 0,
+            "reply": None,
+            "closed": False,
+        }
+        self.store.put(session_id, session)
+        return dict(session, version=0)
+
+    def get(self, session_id):
+        session = self.store.get(session_id)
+        if session is None:
+            raise SessionError(404, "unknown or expired session")
+        return session
+
+    def submit(self, session_id, message, offer=None):
+        """Feed the counterpart's message (and offer, if known) to the agent; returns its reply."""
+        with self._session_lock(session_id):
+            session = self.get(session_id)
+            if session["closed"]:
+                raise SessionError(409, "negotiation already closed")
+            if offer is not None:
+                offer = number_field({"offer": offer}, "offer")
+            agent = agent_from_snapshot(session["agent"], self.llm)
+            if agent.role == "buyer":
+                agent.observe_seller(message, offer)
+                decision = agent.decide_offer(session["market_price"])
+            else:
+                agent.observe_buyer(message, offer)
+                decision = agent.decide_offer()
+            chats = hasattr(self.renderer, "import_chat")  # the agent is rebuilt each turn, its chat with it
+            if chats:
+                self.renderer.import_chat(agent, session.get("chat"))
+            try:
+                text = self.renderer.render(agent, decision, round_num=agent.round,
+                                            product=session["product"], market_price=session["market_price"])
+                if chats:
+                    session["chat"] = self.renderer.export_chat(agent)
+            finally:
+                if chats:
+                    self.renderer.forget(agent)
+            version = session.pop("version")
+            session["turns"] += 1
+            session["agent"] = agent.snapshot()
+            session["reply"] = {"round": agent.round, "action": decision["action"],
+                                "offer": decision["offer"], "message": text}
+            session["closed"] = decision["action"] in ("accept", "walk_away")
+            if not self.store.replace(session_id, session, version):
+                raise SessionError(409, "session changed by a concurrent turn; retry")
+            return session["reply"]
+
+    def delete(self, session_id):
+        if not self.store.delete(session_id):
+            raise SessionError(404, "unknown or expired session")
+
+# =========================
+# HTTP front end
+def make_handler(manager):
+    class NegotiationHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for clients driving many turns
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self.close_connection = True  # can't tell where this body ends
+                raise SessionError(400, "invalid Content-Length")
+            raw = self.rfile.read(length)
+            try:
+                body = json.loads(raw or b"{}")
+            except ValueError:
+                raise SessionError(400, "body must be JSON") from None
+            if not isinstance(body, dict):
+                raise SessionError(400, "body must be a JSON object")
+            return body
+
+        def _route(self, method):
+            if self.path.rstrip("/") == "/sessions" and method == "POST":
+                return 201, manager.create(self._body())
+            match = SESSION_PATH.match(self.path)
+            if match is None:
+                raise SessionError(404, "not found")
+            session_id, rest = match["id"], match["rest"]
+            if method == "POST" and rest == "/messages":
+                body = self._body()
+                return 200, manager.submit(session_id, str(body.get("message", "")), body.get("offer"))
+            if method == "GET" and rest is None:
+                return 200, manager.get(session_id)
+            if method == "GET" and rest == "/reply":
+                return 200, manager.get(session_id)["reply"]
+            if method == "DELETE" and rest is None:
+                manager.delete(session_id)
+                return 200, {"deleted": session_id}
+            raise SessionError(405, "method not allowed")
+
+        def _handle(self, method):
+            try:
+                self._send(*self._route(method))
+            except SessionError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception as e:  # renderer / LLM failures and bugs: answer instead of dropping the connection
+                self.close_connection = True
+                self._send(500, {"error": f"internal error: {type(e).__name__}"})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_DELETE(self):
+            self._handle("DELETE")
+
+    return NegotiationHandler
+
+
+def serve(host="127.0.0.1", port=8080, manager=None, background=False):
+    """Start the session server; with background=True returns the running server."""
+    server = ThreadingHTTPServer((host, port), make_handler(manager or SessionManager()))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session negotiation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--renderer", default="llm", choices=["llm", "oneshot", "routed", "template", "none"])
+    parser.add_argument("--routing", metavar="CONFIG", help="JSON routing config for --renderer routed")
+    parser.add_argument("--store", help="SQLite file shared by workers (default: in-memory)")
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--ttl", type=float, default=3600, help="idle seconds before a session expires")
+    args = parser.parse_args(argv)
+
+    if args.store:
+        store = SqliteSessionStore(args.store, args.max_sessions, args.ttl)
+    else:
+        store = MemorySessionStore(args.max_sessions, args.ttl)
+    renderer = args.renderer
+    if renderer == "routed":
+        from routing import RoutingRenderer, load_routing
+
+        renderer = RoutingRenderer(load_routing(args.routing) if args.routing else None)
+    print(f"Negotiation server listening on http://{args.host}:{args.port}")
+    try:
+        serve(args.host, args.port, SessionManager(store, renderer))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if hasattr(renderer, "report"):
+            from routing import format_report
+
+            print(format_report(renderer.report()))
+
+
+if __name__ == "__main__":
+    main()
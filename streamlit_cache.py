@@ -0,0 +1,85 @@
+"""
+Caches shared by the Streamlit pages, so a rerun replays a stored transcript
+instead of negotiating again. Only the UIs import this module (it needs Streamlit).
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def heuristic_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                          seller_name, seller_personality, seller_min_price, max_rounds=12, run=0):
+    """Result of one heuristic negotiation, computed once per inputs; bump run for a fresh one."""
+    from run_negotiation_terminal import run_negotiation
+
+    return run_negotiation(product, market_price, buyer_name, buyer_personality, buyer_budget,
+                           seller_name, seller_personality, seller_min_price,
+                           verbose=False, max_rounds=max_rounds)
+
+
+class TranscriptStore:
+    """
+    Finished LLM negotiations keyed by their input parameters (LRU, max_entries),
+    plus new runs executing on a small thread pool. A finished background run
+    replaces the stored result for its key; a failed one leaves it and sets
+    last_error until pop_error() takes it.
+    """
+
+    def __init__(self, max_entries=256, workers=2):
+        self.max_entries = max_entries
+        self.last_error = None
+        self._results = OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="negotiation")
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def running(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def pop_error(self):
+        """The last background run's exception, if any, cleared so it is reported once."""
+        with self._lock:
+            error, self.last_error = self.last_error, None
+            return error
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the background and store its result under key."""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        def finish(future):
+            error = future.exception()
+            if error is None:
+                self.put(key, future.result())  # stored before running() turns False
+            with self._lock:
+                self._pending.discard(key)
+                if error is not None:
+                    self.last_error = error
+
+        self._executor.submit(fn, *args, **kwargs).add_done_callback(finish)
+
+
+@st.cache_resource
+def transcript_store():
+    """One TranscriptStore per server process, shared by every session and rerun."""
+    return TranscriptStore()
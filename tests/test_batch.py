@@ -0,0 +1,53 @@
+import io
+import json
+
+from batch import read_scenarios, run_one, run_stream
+
+SCENARIO = {"product": "Phone", "market_price": 50000, "buyer_personality": "Diplomatic Buyer",
+            "buyer_budget": 40000, "seller_personality": "Diplomatic Seller", "seller_min_price": 35000}
+
+
+def test_jsonl_lines_that_are_not_objects_become_error_records():
+    lines = [json.dumps(SCENARIO), "[1, 2]", "5", "", "{not json", json.dumps(dict(SCENARIO, id="x"))]
+    scenarios = list(read_scenarios(lines))
+    assert [s["id"] for s in scenarios] == [1, 2, 3, 5, "x"]
+    assert scenarios[1] == {"id": 2, "error": "scenario must be a JSON object"}
+    assert scenarios[2] == {"id": 3, "error": "scenario must be a JSON object"}
+    assert scenarios[3]["error"].startswith("invalid JSON")
+    assert "error" not in scenarios[0] and "error" not in scenarios[4]
+
+
+def test_csv_numbers_and_seed_are_converted():
+    rows = io.StringIO("product,market_price,buyer_budget,seller_min_price,seed\n"
+                       "Phone,50000,40000,35000,7\n"
+                       "Phone,abc,40000,35000,7\n"
+                       "Phone,50000,40000,35000,seven\n")
+    good, bad_price, bad_seed = read_scenarios(rows, "csv")
+    assert good == {"product": "Phone", "market_price": 50000.0, "buyer_budget": 40000.0,
+                    "seller_min_price": 35000.0, "seed": 7, "id": 1}
+    assert isinstance(good["seed"], int)
+    assert bad_price["id"] == 2 and "error" in bad_price
+    assert bad_seed["id"] == 3 and "error" in bad_seed
+
+
+def test_run_one_passes_errors_through_and_reports_failures():
+    assert run_one({"id": 4, "error": "scenario must be a JSON object"}) == {
+        "id": 4, "error": "scenario must be a JSON object"}
+    record = run_one({"id": 5, "product": "Phone"})
+    assert record["id"] == 5 and record["error"].startswith("KeyError")
+
+
+def test_run_one_with_the_same_seed_is_repeatable():
+    first = run_one(dict(SCENARIO, id=1, seed=3), history=True)
+    second = run_one(dict(SCENARIO, id=1, seed=3), history=True)
+    assert first["history"] == second["history"]
+
+
+def test_stream_writes_one_line_per_scenario_including_bad_ones():
+    lines = [json.dumps(dict(SCENARIO, seed=n)) for n in range(5)] + ["[]"]
+    out = io.StringIO()
+    written, errors = run_stream(read_scenarios(lines), out, engine="llm", renderer="template", workers=2, window=3)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert (written, errors) == (6, 1)
+    assert sorted(r["id"] for r in records) == [1, 2, 3, 4, 5, 6]
+    assert all("status" in r for r in records if r["id"] != 6)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_ollama import FakeChatModel
+from llm_client import BatchingLLM, ConcurrencyLimitedLLM
+
+
+def fake(native_batch=True):
+    return FakeChatModel(latency=0.01, tokens_per_second=0, reply_tokens=5, native_batch=native_batch)
+
+
+def test_sync_calls_are_batched_and_answered_in_order():
+    llm = fake()
+    with BatchingLLM(llm, max_batch_size=4, max_wait=0.05) as batcher:
+        with ThreadPoolExecutor(8) as pool:
+            replies = list(pool.map(batcher.invoke, [f"offer ₹{n}" for n in range(8)]))
+    assert [reply.content.split()[2] for reply in replies] == [f"₹{n}?" for n in range(8)]
+    assert batcher.stats()["prompts"] == 8
+    assert batcher.stats()["batches"] < 8
+    assert llm.round_trips == batcher.stats()["batches"]
+
+
+def test_budgeted_batchers_share_the_collector_and_close_with_it():
+    before = threading.active_count()
+    batcher = BatchingLLM(fake(), max_batch_size=4, max_wait=0.01)
+    capped = [batcher.with_budget(num_predict) for num_predict in (3, 4, 5)]
+    assert batcher.with_budget(3) is capped[0]
+    assert capped[0].with_budget(4) is capped[1]
+    with ThreadPoolExecutor(6) as pool:
+        replies = list(pool.map(lambda i: capped[i % 3].invoke(f"₹{i}"), range(6)))
+    assert [len(reply.content.split()) for reply in replies] == [3, 4, 5, 3, 4, 5]
+    assert batcher._queue is not None and all(child._queue is None for child in capped)
+    assert batcher.stats()["prompts"] == 6
+
+    batcher.close()
+    assert threading.active_count() <= before
+
+
+def test_timer_does_not_flush_a_newer_batch_early():
+    sizes = []
+
+    class Recorder(FakeChatModel):
+        async def abatch(self, prompts, **kwargs):
+            sizes.append(len(prompts))
+            return await super().abatch(prompts, **kwargs)
+
+    batcher = BatchingLLM(Recorder(latency=0, tokens_per_second=0, native_batch=True), max_batch_size=2,
+                          max_wait=0.05)
+
+    async def main():
+        first = [asyncio.ensure_future(batcher.ainvoke(f"₹{n}")) for n in range(2)]  # fills up, sent at once
+        await asyncio.sleep(0.03)
+        second = asyncio.ensure_future(batcher.ainvoke("₹3"))  # its own 50 ms window
+        await asyncio.sleep(0.03)  # the first batch's timer fires here
+        third = asyncio.ensure_future(batcher.ainvoke("₹4"))
+        await asyncio.gather(*first, second, third)
+
+    asyncio.run(main())
+    assert sizes == [2, 2]
+
+
+def test_concurrency_limit_counts_each_prompt_of_a_fallback_batch():
+    in_flight = peak = 0
+
+    class Tracking(FakeChatModel):
+        async def ainvoke(self, prompt, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                return await super().ainvoke(prompt, **kwargs)
+            finally:
+                in_flight -= 1
+
+    llm = Tracking(latency=0.01, tokens_per_second=0)  # like ChatOllama: batch = one request per prompt
+    limited = ConcurrencyLimitedLLM(llm, max_concurrency=2)
+    replies = asyncio.run(limited.abatch([f"₹{n}" for n in range(6)]))
+    assert len(replies) == 6
+    assert llm.round_trips == 6
+    assert peak == 2
@@ -0,0 +1,101 @@
+import pytest
+
+from benchmarks.fake_ollama import FakeChatModel
+from checkpoints import FileCheckpointStore, MemoryCheckpointStore, SqliteCheckpointStore, open_checkpoints
+from message_renderer import TemplateRenderer
+from negotiation_logic import resume_negotiation, stream_negotiation
+
+SCENARIO = ("Phone", 50000, "Alice", "Diplomatic Buyer", 40000, "Bob", "Diplomatic Seller", 35000)
+
+
+class CountingRenderer(TemplateRenderer):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def render(self, *args, **kwargs):
+        self.calls += 1
+        return super().render(*args, **kwargs)
+
+
+def play_until_interrupted(checkpoint, turns, **kwargs):
+    """Play the first turns of a negotiation, then drop it as a crash would."""
+    kwargs.setdefault("renderer", CountingRenderer())
+    events = stream_negotiation(*SCENARIO, stream=False, checkpoint=checkpoint, negotiation_id="n1", **kwargs)
+    played = []
+    for event in events:
+        if event["type"] == "turn_end":
+            played.append(dict(event["turn"]))
+            if len(played) == turns:
+                break
+    events.close()
+    return played
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda tmp_path: MemoryCheckpointStore(),
+    lambda tmp_path: FileCheckpointStore(str(tmp_path / "checkpoints")),
+    lambda tmp_path: SqliteCheckpointStore(str(tmp_path / "checkpoints.db")),
+])
+def test_resume_plays_only_the_remaining_turns(tmp_path, make_store):
+    store = make_store(tmp_path)
+    played = play_until_interrupted(store, 3)
+    assert store.ids() == ["n1"]
+    assert store.load("n1")["turn"] == 3
+    assert store.load("n1")["result"] is None
+
+    renderer = CountingRenderer()
+    result = resume_negotiation(store, "n1", renderer=renderer)
+    history = [dict(turn) for turn in result["history"]]
+    assert history[:3] == played
+    assert renderer.calls == len(history) - 3 > 0
+    assert result["negotiation_id"] == "n1"
+    assert store.load("n1")["result"]["status"] == result["status"]
+
+
+def test_resuming_a_finished_negotiation_renders_nothing():
+    store = MemoryCheckpointStore()
+    play_until_interrupted(store, 100)
+    saved = store.load("n1")
+    assert saved["result"] is not None
+
+    renderer = CountingRenderer()
+    result = resume_negotiation(store, "n1", renderer=renderer)
+    assert renderer.calls == 0
+    assert result["status"] == saved["result"]["status"]
+    assert len(result["history"]) == saved["turn"]
+
+
+def test_resumed_llm_negotiation_keeps_its_chats():
+    store = MemoryCheckpointStore()
+    play_until_interrupted(store, 3, renderer="llm", llm=FakeChatModel(latency=0, tokens_per_second=0))
+    before = store.load("n1")["chats"]
+    assert [kind for kind, _ in before["buyer"]] == ["system", "human", "ai", "human", "ai"]
+
+    result = resume_negotiation(store, "n1", renderer="llm", llm=FakeChatModel(latency=0, tokens_per_second=0),
+                                turn_timeout=5, deadline=30)
+    after = store.load("n1")["chats"]
+    for role in ("buyer", "seller"):
+        assert after[role][:len(before[role])] == before[role]  # continued, not started afresh
+        assert len(after[role]) > len(before[role])
+    assert result["degraded"] == []
+
+
+def test_resume_unknown_negotiation():
+    with pytest.raises(KeyError):
+        resume_negotiation(MemoryCheckpointStore(), "missing", renderer="template")
+
+
+def test_file_store_rejects_unsafe_ids(tmp_path):
+    store = FileCheckpointStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.save("../escape", {})
+    store.save("ok", {"turn": 1})
+    store.delete("ok")
+    store.delete("ok")
+    assert store.load("ok") is None
+
+
+def test_open_checkpoints_picks_by_extension(tmp_path):
+    assert isinstance(open_checkpoints(str(tmp_path / "c.db")), SqliteCheckpointStore)
+    assert isinstance(open_checkpoints(str(tmp_path / "c")), FileCheckpointStore)
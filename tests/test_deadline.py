@@ -0,0 +1,97 @@
+import threading
+import time
+
+import message_renderer
+from agents import BuyerAgent
+from benchmarks.fake_ollama import FakeChatModel
+from message_renderer import DeadlineRenderer, LLMRenderer
+
+
+class ClosableRenderer:
+    """Streams one word every 50 ms and notes whether its stream was closed early."""
+
+    def __init__(self, words=10, first_delay=0.0):
+        self.words = words
+        self.first_delay = first_delay
+        self.closed = threading.Event()
+        self.finished = threading.Event()
+
+    def stream(self, agent, decision, round_num=None, product=None, market_price=None, stats=None):
+        time.sleep(self.first_delay)
+        try:
+            for i in range(self.words):
+                time.sleep(0.05)
+                yield f"word{i} "
+            self.finished.set()
+        except GeneratorExit:
+            self.closed.set()
+            raise
+
+    def render(self, *args, **kwargs):
+        return "".join(self.stream(*args, **kwargs))
+
+
+def turn():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    return buyer, buyer.decide_offer(50000)
+
+
+def test_within_budget_returns_the_generation():
+    agent, decision = turn()
+    renderer = DeadlineRenderer(ClosableRenderer(words=2), turn_timeout=1.0)
+    assert renderer.render(agent, decision, round_num=1, product="Phone") == "word0 word1 "
+    assert renderer.degraded == []
+
+
+def test_overrun_falls_back_and_closes_the_stream():
+    agent, decision = turn()
+    inner = ClosableRenderer(words=100)
+    renderer = DeadlineRenderer(inner, turn_timeout=0.12)
+    text = renderer.render(agent, decision, round_num=1, product="Phone")
+    assert "word" not in text
+    assert renderer.degraded == [{"round": 1, "speaker": "Alice", "action": "counter", "reason": "turn_timeout"}]
+    assert inner.closed.wait(1.0)
+    assert not inner.finished.is_set()
+
+
+def test_stream_overrun_closes_the_model_stream():
+    closed = threading.Event()
+
+    class Model(FakeChatModel):
+        def stream(self, prompt, **kwargs):
+            try:
+                yield from super().stream(prompt, **kwargs)
+            except GeneratorExit:
+                closed.set()
+                raise
+
+    agent, decision = turn()
+    renderer = DeadlineRenderer(LLMRenderer(Model(latency=0, tokens_per_second=20, reply_tokens=60)),
+                                turn_timeout=0.15)
+    events = renderer.stream(agent, decision, round_num=1, product="Phone")
+    chunks = []
+    try:
+        while True:
+            chunks.append(next(events))
+    except StopIteration as stop:
+        fallback = stop.value
+    assert 0 < len(chunks) < 60
+    assert fallback and renderer.degraded[0]["reason"] == "turn_timeout"
+    assert closed.wait(1.0)
+
+
+def test_saturated_pool_falls_back_at_once(monkeypatch):
+    monkeypatch.setattr(message_renderer, "_pool_slots", threading.BoundedSemaphore(1))
+    agent, decision = turn()
+    slow = ClosableRenderer(words=1, first_delay=0.5)  # blocked before its first chunk, can't be stopped yet
+    DeadlineRenderer(slow, turn_timeout=0.05).render(agent, decision, round_num=1)
+
+    renderer = DeadlineRenderer(ClosableRenderer(words=1), turn_timeout=1.0)
+    started = time.monotonic()
+    renderer.render(agent, decision, round_num=1)
+    assert time.monotonic() - started < 0.1
+    assert renderer.degraded[0]["reason"] == "busy"
+
+    assert slow.closed.wait(1.0)  # stopped at its first chunk, freeing the thread
+    time.sleep(0.05)
+    assert DeadlineRenderer(ClosableRenderer(words=1), turn_timeout=1.0).render(agent, decision) == "word0 "
@@ -0,0 +1,34 @@
+import asyncio
+import random
+
+import pytest
+
+from negotiation_logic import arun_negotiation, run_negotiation
+
+SCENARIOS = [
+    ("Phone", 50000, "Alice", "Diplomatic Buyer", 40000, "Bob", "Diplomatic Seller", 35000),
+    ("Smartphone", 50000, "Alice", "Diplomatic Buyer", 40000, "Bob", "Aggressive Trader", 35000),
+    ("Laptop", 80000, "Carol", "Aggressive Trader", 50000, "Dan", "Data-Driven Seller", 60000),
+]
+
+ENGINES = {
+    "sync": lambda args, **kw: run_negotiation(*args, **kw),
+    "pipelined": lambda args, **kw: run_negotiation(*args, pipeline=True, **kw),
+    "async": lambda args, **kw: asyncio.run(arun_negotiation(*args, **kw)),
+    "async_pipelined": lambda args, **kw: asyncio.run(arun_negotiation(*args, pipeline=True, **kw)),
+}
+
+
+def history_rows(engine, args, policy):
+    random.seed(42)  # template phrasing
+    result = ENGINES[engine](args, renderer="template", policy=policy)
+    return result["status"], result.get("price"), [dict(turn) for turn in result["history"]]
+
+
+@pytest.mark.parametrize("policy", [None, "optimal"])
+@pytest.mark.parametrize("args", SCENARIOS)
+def test_every_engine_plays_the_same_negotiation(args, policy):
+    expected = history_rows("sync", args, policy)
+    assert expected[2]
+    for engine in ("pipelined", "async", "async_pipelined"):
+        assert history_rows(engine, args, policy) == expected, engine
@@ -0,0 +1,61 @@
+import asyncio
+
+from benchmarks.fake_ollama import FakeChatModel
+from llm_cache import CachedLLM, ResponseCache
+
+
+def test_memory_hit_after_set():
+    cache = ResponseCache()
+    key = cache.make_key("m", 0.6, "How about  ₹14000?")
+    assert cache.get(key) is None
+    cache.set(key, "Deal")
+    assert cache.get(key) == "Deal"
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_keys_ignore_whitespace_and_round_offers():
+    cache = ResponseCache(offer_granularity=100)
+    assert cache.make_key("m", 0.6, "Offer ₹14,012.5  now") == cache.make_key("m", 0.6, "Offer ₹14000 now")
+    assert cache.make_key("m", 0.6, "x") != cache.make_key("m", 0.7, "x")
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = ResponseCache(max_memory_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path)
+    cache.set("k", "stored")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get("k") == "stored"
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+
+def test_ttl_expires_entries(monkeypatch):
+    import llm_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    cache.set("k", "v")
+    now[0] += 11
+    assert cache.get("k") is None
+
+
+def test_cached_llm_answers_repeats_without_the_model():
+    llm = FakeChatModel(latency=0, tokens_per_second=0)
+    cached = CachedLLM(llm, ResponseCache())
+    first = cached.invoke("How about ₹100?").content
+    assert cached.invoke("How about ₹100?").content == first
+    assert "".join(chunk.content for chunk in cached.stream("How about ₹100?")) == first
+    assert asyncio.run(cached.ainvoke("How about ₹100?")).content == first
+    assert llm.calls == 1
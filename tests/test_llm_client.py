@@ -0,0 +1,53 @@
+import gc
+import weakref
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+import llm_client
+from benchmarks.fake_ollama import CappedChatModel, FakeChatModel
+from llm_client import with_budget
+
+
+class Client(BaseModel):
+    """Stand-in for a pydantic chat model such as ChatOllama."""
+
+    model: str = "m"
+    num_predict: Optional[int] = None
+    stop: Optional[List[str]] = None
+
+
+def test_capped_copies_are_made_once_per_budget():
+    client = Client()
+    capped = with_budget(client, 64, ("\n\n",))
+    assert capped is not client
+    assert (capped.num_predict, capped.stop) == (64, ["\n\n"])
+    assert with_budget(client, 64, ("\n\n",)) is capped
+    assert with_budget(client, 32) is not capped
+    assert client.num_predict is None
+
+
+def test_existing_caps_are_never_loosened():
+    capped = with_budget(Client(num_predict=40, stop=["END"]), 64, ("\n\n",))
+    assert capped.num_predict == 40
+    assert capped.stop == ["END", "\n\n"]
+
+
+def test_copies_do_not_keep_the_client_alive():
+    client = Client()
+    capped = with_budget(client, 64)
+    ref, key = weakref.ref(client), id(client)
+    assert key in llm_client._budgeted
+    del client
+    gc.collect()
+    assert ref() is None
+    assert key not in llm_client._budgeted
+    assert capped.num_predict == 64  # copies handed out stay usable
+
+
+def test_clients_with_their_own_with_budget_and_plain_ones():
+    fake = FakeChatModel()
+    assert isinstance(with_budget(fake, 10), CappedChatModel)
+    plain = object()
+    assert with_budget(plain, 10) is plain
+    assert with_budget(fake) is fake
@@ -0,0 +1,73 @@
+import pytest
+
+from marketplace import Marketplace, OrderBook, summarize
+
+
+def test_best_prices_match_first():
+    book = OrderBook()
+    for price in (100, 120, 110):
+        book.add("bid", f"b{price}", "Diplomatic Buyer", price)
+    for price in (105, 95, 115):
+        book.add("ask", f"a{price}", "Diplomatic Seller", price)
+
+    bid, ask = book.pop_match()
+    assert (bid.name, ask.name) == ("b120", "a95")
+    bid, ask = book.pop_match()
+    assert (bid.name, ask.name) == ("b110", "a105")
+    assert book.pop_match() is None  # 100 < 115
+    assert (book.bids(), book.asks(), len(book)) == (1, 1, 2)
+
+
+def test_near_crossing_pairs_escalate():
+    book = OrderBook()
+    book.add("bid", "b", "Diplomatic Buyer", 96)
+    book.add("ask", "a", "Diplomatic Seller", 100)
+    assert book.pop_match() is None
+    assert book.pop_match(near=0.03) is None
+    bid, ask = book.pop_match(near=0.05)
+    assert (bid.price, ask.price) == (96, 100)
+    assert len(book) == 0
+
+
+def test_cancelled_orders_are_skipped():
+    book = OrderBook()
+    best = book.add("bid", "best", "Diplomatic Buyer", 200)
+    book.add("bid", "next", "Diplomatic Buyer", 150)
+    book.add("ask", "a", "Diplomatic Seller", 100)
+    assert book.cancel(best.id)
+    assert not book.cancel(best.id)
+    assert book.best_bid().name == "next"
+    bid, _ = book.pop_match()
+    assert bid.name == "next"
+    assert book.best_bid() is None and book.pop_match() is None
+
+
+def test_equal_prices_match_in_arrival_order():
+    book = OrderBook()
+    for name in ("first", "second", "third"):
+        book.add("bid", name, "Diplomatic Buyer", 100)
+    book.add("ask", "early", "Diplomatic Seller", 90)
+    book.add("ask", "late", "Diplomatic Seller", 90)
+    assert [pair[0].name for pair in (book.pop_match(), book.pop_match())] == ["first", "second"]
+    assert book.best_bid().name == "third"
+
+
+def test_counts_and_bad_side():
+    book = OrderBook()
+    book.add("bid", "b", "Diplomatic Buyer", 100)
+    book.add("ask", "a1", "Diplomatic Seller", 150)
+    book.add("ask", "a2", "Diplomatic Seller", 160)
+    assert (book.bids(), book.asks(), len(book)) == (1, 2, 3)
+    with pytest.raises(ValueError):
+        book.add("swap", "x", "Diplomatic Buyer", 1)
+
+
+def test_marketplace_negotiates_escalated_pairs():
+    market = Marketplace("Phone", 50000, near=0.05, renderer="none")
+    market.add_buyer("Alice", "Diplomatic Buyer", 40000)
+    market.add_buyer("Carol", "Diplomatic Buyer", 20000)
+    market.add_seller("Bob", "Diplomatic Seller", 35000)
+    trades = market.run()
+    assert [(t["buyer"], t["seller"]) for t in trades] == [("Alice", "Bob")]
+    summary = summarize(trades, market.book)
+    assert summary["escalated"] == 1 and summary["resting_bids"] == 1 and summary["resting_asks"] == 0
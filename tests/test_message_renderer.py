@@ -0,0 +1,47 @@
+import random
+
+from agents import BuyerAgent, SellerAgent
+from message_renderer import TemplateRenderer, get_renderer, turn_type
+
+
+def test_buyer_first_counter_is_the_opening():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    decision = buyer.decide_offer(market_price=None)
+    assert decision["action"] == "counter"
+    assert turn_type(buyer, decision, round_num=buyer.round) == "opening"
+
+
+def test_buyer_accepting_in_round_one_is_an_accept():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    buyer.observe_seller("", offer=14000)
+    decision = buyer.decide_offer()
+    assert decision["action"] == "accept"
+    assert buyer.round == 1
+    assert turn_type(buyer, decision, round_num=buyer.round) == "accept"
+
+    text = TemplateRenderer(random.Random(0)).render(buyer, decision, round_num=buyer.round, product="Phone")
+    assert "14000" in text
+    assert "start at" not in text
+
+
+def test_buyer_counter_after_seller_offer_is_a_counter():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    buyer.observe_seller("", offer=60000)
+    decision = buyer.decide_offer()
+    assert turn_type(buyer, decision, round_num=1) == "counter"
+
+
+def test_seller_never_opens():
+    seller = SellerAgent("Bob", "Diplomatic Seller", 35000)
+    decision = seller.decide_offer()
+    assert turn_type(seller, decision, round_num=1) == "counter"
+
+
+def test_decision_can_mark_the_opening():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    assert turn_type(buyer, {"action": "counter", "offer": 1, "opening": True}, round_num=3) == "opening"
+
+
+def test_none_renderer_writes_nothing():
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    assert get_renderer("none").render(buyer, buyer.decide_offer()) == ""
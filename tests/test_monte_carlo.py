@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import run_negotiation_terminal  # noqa: E402
+from monte_carlo import simulate, summarize  # noqa: E402
+
+
+@pytest.mark.parametrize("budget, min_price", [(40000, 35000), (20000, 16000), (12000, 10000), (100000, 60000), (20000, 30000)])
+@pytest.mark.parametrize("seed", [0, 5, 8])
+def test_lanes_match_the_terminal_engine(monkeypatch, budget, min_price, seed):
+    # One lane draws one seller concession per round from default_rng(seed); give the
+    # terminal engine the same draws in place of random.randint
+    rng = np.random.default_rng(seed)
+    monkeypatch.setattr(run_negotiation_terminal.random, "randint",
+                        lambda low, high: int(rng.integers(low, high + 1, size=1)[0]))
+    expected = run_negotiation_terminal.run_negotiation("Phone", 50000, "Alice", "Diplomatic Buyer", budget,
+                                                        "Bob", "Diplomatic Seller", min_price, verbose=False)
+
+    result = simulate(budget, min_price, n=1, seed=seed)
+    assert result["final_price"][0] == expected["price"]
+    assert result["rounds"][0] == expected["rounds"]
+    assert bool(result["converged"][0]) == (expected["status"] == "Deal Reached")
+    assert result["buyer_profit"][0] == expected["buyer_profit"]
+    assert result["seller_profit"][0] == expected["seller_profit"]
+
+
+def test_parameter_sweep_broadcasts_and_summarizes():
+    result = simulate(np.array([40000, 16000]), np.array([35000, 14000]), seed=1)
+    assert result["final_price"].shape == (2,)
+    summary = summarize(simulate(40000, 35000, n=1000, seed=1))
+    assert summary["negotiations"] == 1000
+    assert 0 <= summary["convergence_rate"] <= 1
+    assert summary["price_p5"] <= summary["price_p50"] <= summary["price_p95"]
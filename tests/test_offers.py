@@ -0,0 +1,33 @@
+import pytest
+
+from offers import OfferMessage, extract_offer, offer_from
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("How about ₹14,000?", 14000),
+    ("I can do Rs. 12,50,000 for it", 1250000),
+    ("INR 9999.50 is my final", 9999.5),
+    ("Make it 15k and we have a deal", 15000),
+    ("2.5 lakh, last offer", 250000),
+    ("1 crore? No way", 1e7),
+    ("I'll take 14000", 14000),
+    ("Deliver in 2 days for 14000", 14000),
+    ("10% off, so 45000", 45000),
+    ("Running llama 3.1 on an 8b model", None),
+    ("I run llama 3.1", None),
+    ("in 2 days", None),
+    ("Give me 2 and we're done", None),
+    ("₹50 for the case", 50),
+    ("₹500 now, 14000 later", 500),
+    ("No numbers here", None),
+])
+def test_extract_offer(text, expected):
+    assert extract_offer(text) == expected
+
+
+def test_offer_from_prefers_explicit_values():
+    assert offer_from("₹100", offer=200) == 200.0
+    assert offer_from(OfferMessage("₹100", offer=300)) == 300.0
+    assert offer_from(OfferMessage("₹100")) is None
+    assert offer_from("₹100") == 100.0
+    assert offer_from("") is None
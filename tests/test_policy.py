@@ -0,0 +1,90 @@
+import pytest
+
+import policy
+from negotiation_logic import run_negotiation
+from policy import (ACCEPT, COUNTER, GRID_SIZE, CounterpartModel, OfferPolicy, get_policy, grid_index, grid_price,
+                    load_policies, save_policies, solve)
+
+
+def test_grid_round_trip_and_clamping():
+    assert grid_index(grid_price(37)) == 37
+    assert grid_index(0.0) == 0
+    assert grid_index(10.0) == GRID_SIZE - 1
+    assert grid_price(grid_index(1.0)) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("role", ["buyer", "seller"])
+def test_counters_never_cross_the_agents_own_limit(role):
+    table = solve(role, rounds=4)
+    for turn in range(4):
+        for standing in range(GRID_SIZE):
+            if table.actions[turn][standing] == COUNTER:
+                price = grid_price(table.offers[turn][standing])
+                assert price <= 1.0 + 1e-9 if role == "buyer" else price >= 1.0 - 1e-9
+
+
+def test_good_offers_are_accepted_and_bad_ones_never():
+    buyer, seller = solve("buyer", rounds=4), solve("seller", rounds=4)
+    for turn in range(4):
+        assert buyer.actions[turn][grid_index(0.6)] == ACCEPT
+        assert buyer.actions[turn][grid_index(1.5)] != ACCEPT
+        assert seller.actions[turn][grid_index(1.8)] == ACCEPT
+        assert seller.actions[turn][grid_index(0.7)] != ACCEPT
+
+
+def test_decide_scales_to_the_agents_limit():
+    table = get_policy("buyer")
+    action, offer = table.decide(0, None, 40000)
+    assert action == "counter"
+    assert 0 < offer <= 40000
+    assert table.decide(0, 20000, 40000) == ("accept", 20000)
+
+
+def test_past_the_horizon_only_deals_within_the_limit():
+    table = get_policy("seller", rounds=2)
+    assert table.decide(2, 36000, 35000) == ("accept", 36000)
+    assert table.decide(2, 30000, 35000) == ("walk_away", 30000)
+    assert table.decide(2, None, 35000) == ("walk_away", 35000)
+
+
+def test_saved_tables_load_back_and_are_served(tmp_path, monkeypatch):
+    monkeypatch.setattr(policy, "_policies", {})
+    model = CounterpartModel(0.8, 1.0, concession=0.3)
+    solved = solve("buyer", rounds=3, model=model)
+    path = str(tmp_path / "policies.json")
+    save_policies(path, [solved])
+
+    loaded, = load_policies(path)
+    assert isinstance(loaded, OfferPolicy)
+    assert loaded.actions == solved.actions and loaded.offers == solved.offers
+    assert loaded.model.to_state() == model.to_state()
+    assert get_policy("buyer", rounds=3) is loaded
+
+
+def test_two_policy_agents_reach_a_deal_inside_both_limits():
+    result = run_negotiation("Phone", 50000, "Alice", "Diplomatic Buyer", 40000, "Bob", "Diplomatic Seller", 36000,
+                             renderer="none", policy="optimal")
+    assert result["status"] == "Deal Reached"
+    assert 36000 <= result["price"] <= 40000
+
+
+SCENARIO = ("Smartphone", 50000, "Alice", "Diplomatic Buyer", 40000, "Bob", "Aggressive Trader", 35000)
+
+
+def test_policy_closes_no_slower_than_the_rules():
+    rules = run_negotiation(*SCENARIO, renderer="none")
+    optimal = run_negotiation(*SCENARIO, renderer="none", policy="optimal")
+    assert optimal["status"] == rules["status"] == "Deal Reached"
+    assert len(optimal["history"]) <= len(rules["history"])
+    assert optimal["price"] <= rules["price"]  # and the buyer does no worse for it
+
+
+def test_each_side_can_have_its_own_policy():
+    result = run_negotiation(*SCENARIO, renderer="none", buyer_policy="optimal")
+    opening, reply = result["history"][:2]
+    assert opening["offer"] < 40000  # the policy buyer opens below its budget...
+    assert reply["offer"] == pytest.approx(opening["offer"] * 1.1)  # ...and the rules seller answers it
+    assert result["status"] == "Deal Reached" and 35000 <= result["price"] <= 40000
+
+    result = run_negotiation(*SCENARIO, renderer="none", seller_policy="optimal")
+    assert [turn["action"] for turn in result["history"]] == ["counter", "accept"]
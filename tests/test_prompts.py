@@ -0,0 +1,84 @@
+import pytest
+
+from agents import BuyerAgent
+from benchmarks.fake_ollama import FakeChatModel
+from message_renderer import ChatRenderer, LLMRenderer
+from prompts import BUDGETS, TURN_TYPES, PromptLibrary
+
+DECISIONS = {
+    "opening": {"action": "counter", "offer": 36000},
+    "counter": {"action": "counter", "offer": 37000, "counterpart_offer": 45000},
+    "accept": {"action": "accept", "offer": 45000, "counterpart_offer": 45000},
+    "walk_away": {"action": "walk_away", "offer": 60000, "counterpart_offer": 60000},
+}
+
+
+class BudgetRecorder(FakeChatModel):
+    """Fake client noting the caps each turn asks for."""
+
+    def __init__(self):
+        super().__init__(latency=0, tokens_per_second=0)
+        self.budgets = []
+
+    def with_budget(self, num_predict=None, stop=()):
+        self.budgets.append((num_predict, stop))
+        return self
+
+
+@pytest.mark.parametrize("role, other", [("buyer", "Seller"), ("seller", "Buyer")])
+def test_each_turn_type_gets_its_cap_and_stops(role, other):
+    library = PromptLibrary(["Diplomatic Buyer"], ["Diplomatic Seller"])
+    personality = "Diplomatic Buyer" if role == "buyer" else "Diplomatic Seller"
+    for kind in TURN_TYPES:
+        entry = library.get(role, personality, kind)
+        assert entry.num_predict == BUDGETS[kind]
+        assert entry.stop == ("\n\n", f"\n{other}:")
+
+
+@pytest.mark.parametrize("renderer_class", [LLMRenderer, ChatRenderer])
+def test_renderers_ask_for_the_turns_budget(renderer_class):
+    client = BudgetRecorder()
+    renderer = renderer_class(client)
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    for kind, decision in DECISIONS.items():
+        stats = {}
+        renderer.render(buyer, decision, round_num=1 if kind == "opening" else 2, product="Phone",
+                        market_price=50000, stats=stats)
+        assert client.budgets[-1] == (BUDGETS[kind], ("\n\n", "\nSeller:"))
+        assert stats["num_predict"] == BUDGETS[kind]
+
+
+def test_no_caps_when_budgets_are_empty():
+    entry = PromptLibrary(budgets={}).get("seller", "Diplomatic Seller", "counter")
+    assert entry.num_predict is None
+    assert entry.stop  # the stop sequences still apply
+
+
+def test_stable_prefix_comes_first():
+    library = PromptLibrary(["Diplomatic Buyer"])
+    entries = [library.get("buyer", "Diplomatic Buyer", kind) for kind in TURN_TYPES]
+    # One system prompt per agent, whatever the turn: the chat's cached prefix
+    assert len({entry.system for entry in entries}) == 1
+    for entry in entries:
+        assert entry.oneshot.startswith("You are a Buyer AI with personality: Diplomatic Buyer.\n")
+
+    renderer = ChatRenderer(FakeChatModel(latency=0, tokens_per_second=0), prompts=library)
+    buyer = BuyerAgent("Alice", "Diplomatic Buyer", 40000)
+    first = renderer.format_prompt(buyer, DECISIONS["opening"], 1, "Phone", 50000)
+    assert first[0].type == "system" and first[0].content.startswith("You are a Buyer AI")
+    assert "Phone at market price ₹50000" in first[0].content
+    assert first[1].content == "Open the negotiation. You offer ₹36000."
+    renderer.render(buyer, DECISIONS["opening"], 1, "Phone", 50000)
+    second = renderer.format_prompt(buyer, DECISIONS["counter"], 2, "Phone", 50000)
+    assert second[:2] == first  # the next turn extends the last prompt
+    assert second[-1].content == "Seller offered ₹45000. You counteroffer ₹37000."
+
+
+def test_unlisted_personality_is_compiled_on_first_use():
+    library = PromptLibrary()
+    entry = library.get("seller", "Odd {Bargainer}", "accept")
+    assert library.get("seller", "Odd {Bargainer}", "accept") is entry
+    assert len(library) == 1
+    assert "personality: Odd {Bargainer}." in entry.oneshot.format(other_offer=1)
+    with pytest.raises(ValueError):
+        library.get("seller", "Diplomatic Seller", "haggle")
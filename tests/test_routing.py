@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+import llm_client
+from benchmarks.fake_ollama import FakeChatModel
+from llm_cache import CachedLLM, ResponseCache
+from llm_client import BatchingLLM, ConcurrencyLimitedLLM, LLMRegistry
+from message_renderer import get_renderer
+from negotiation_logic import arun_negotiations, run_negotiation
+from routing import RoutingRenderer, format_report, merge_reports
+
+SCENARIO = dict(product="Phone", market_price=50000, buyer_name="Alice", buyer_personality="Diplomatic Buyer",
+                buyer_budget=40000, seller_name="Bob", seller_personality="Diplomatic Seller",
+                seller_min_price=35000)
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """Fake client per model, as llm_client.get_llm() hands them out."""
+    def factory(model, temperature, **params):
+        return FakeChatModel(latency=0, tokens_per_second=0, model=model, temperature=temperature)
+
+    registry = LLMRegistry(factory=factory)
+    monkeypatch.setattr(llm_client, "_registry", registry)
+    return registry
+
+
+def route_clients(renderer):
+    return {name: r.llm for name, r in renderer._renderers.items() if hasattr(r, "llm")}
+
+
+def test_routed_ignores_an_injected_client(models):
+    renderer = get_renderer("routed", FakeChatModel(model="injected"))
+    run_negotiation(**SCENARIO, renderer=renderer)
+    assert {name: llm.model for name, llm in route_clients(renderer).items()} == {
+        "large": "llama3.1:8b", "small": "llama3.2:1b"}
+
+
+def test_wrap_applies_to_each_routes_own_client(models):
+    wrapped = []
+
+    def wrap(client):
+        wrapped.append(client.model)
+        return CachedLLM(client, ResponseCache())
+
+    renderer = RoutingRenderer(wrap=wrap)
+    run_negotiation(**SCENARIO, renderer=renderer)
+    assert sorted(wrapped) == ["llama3.1:8b", "llama3.2:1b"]
+    assert all(isinstance(llm, CachedLLM) for llm in route_clients(renderer).values())
+
+
+def test_wrapped_copy_adds_to_the_same_report(models):
+    renderer = RoutingRenderer()
+    copy = renderer.wrapped(lambda client: client)
+    run_negotiation(**SCENARIO, renderer=copy)
+    assert sum(route["calls"] for route in renderer.report().values()) > 0
+    assert renderer.report() == copy.report()
+
+
+def test_cache_reaches_routed_clients(models):
+    cache = ResponseCache()
+    run_negotiation(**SCENARIO, renderer="routed", cache=cache)
+    run_negotiation(**SCENARIO, renderer="routed", cache=cache)
+    assert cache.hits > 0
+
+
+def test_arun_negotiations_wraps_every_route(models):
+    renderer = RoutingRenderer()
+    asyncio.run(arun_negotiations([SCENARIO] * 3, renderer=renderer, max_concurrency=2, max_batch_size=4,
+                                  cache=ResponseCache()))
+    # arun_negotiations plays on a wrapped copy; its routes are the same objects
+    assert sum(route["calls"] for route in renderer.report().values()) > 0
+
+
+def test_arun_wrap_chain_and_shared_slots(models, monkeypatch):
+    built = []
+    original = RoutingRenderer.wrapped
+
+    def spy(self, wrap):
+        copy = original(self, wrap)
+        built.append(copy)
+        return copy
+
+    monkeypatch.setattr(RoutingRenderer, "wrapped", spy)
+    asyncio.run(arun_negotiations([SCENARIO], renderer="routed", max_concurrency=2, max_batch_size=4,
+                                  cache=ResponseCache()))
+    clients = route_clients(built[0])
+    assert set(clients) == {"large", "small"}
+    limiters = []
+    for llm in clients.values():
+        assert isinstance(llm, CachedLLM)
+        assert isinstance(llm.llm, BatchingLLM)
+        assert isinstance(llm.llm.llm, ConcurrencyLimitedLLM)
+        limiters.append(llm.llm.llm)
+    assert limiters[0]._loop_semaphores is limiters[1]._loop_semaphores
+    assert {limiter.llm.model for limiter in limiters} == {"llama3.1:8b", "llama3.2:1b"}
+
+
+def test_merge_and_format_reports():
+    one = {"large": {"model": "big", "calls": 2, "mean_latency_ms": 10.0, "prompt_tokens": 5,
+                     "completion_tokens": 7}}
+    two = {"large": {"model": "big", "calls": 1, "mean_latency_ms": 40.0, "prompt_tokens": 1,
+                     "completion_tokens": 1}}
+    merged = merge_reports([one, two])
+    assert merged["large"]["calls"] == 3
+    assert merged["large"]["mean_latency_ms"] == pytest.approx(20.0)
+    assert merged["large"]["completion_tokens"] == 8
+    assert "big" in format_report(merged).splitlines()[1]
+
+
+def test_tournament_routing_option_prints_the_report(models, tmp_path, capsys):
+    import tournament
+
+    config = {"routes": {"tiny": {"model": "tiny-model"}, "template": {"template": True}},
+              "rules": [{"turn": ["counter"], "route": "template"}], "default": "tiny"}
+    path = tmp_path / "routing.json"
+    path.write_text(json.dumps(config))
+    tournament.main(["--engine", "llm", "--renderer", "routed", "--routing", str(path), "--workers", "1"])
+    out = capsys.readouterr().out
+    assert "tiny-model" in out
+    assert "template" in out.split("route")[-1]
@@ -0,0 +1,157 @@
+import http.client
+import json
+
+import pytest
+
+from benchmarks.fake_ollama import FakeChatModel
+from server import MemorySessionStore, SessionError, SessionManager, SqliteSessionStore, serve
+
+BUYER = {"role": "buyer", "name": "Alice", "personality": "Diplomatic Buyer", "budget": 40000,
+         "product": "Phone", "market_price": 50000}
+
+
+class FailingRenderer:
+    def render(self, *args, **kwargs):
+        raise RuntimeError("model server down")
+
+
+@pytest.fixture
+def manager():
+    return SessionManager(renderer="template")
+
+
+@pytest.fixture
+def request_server(manager):
+    server = serve(port=0, manager=manager, background=True)
+
+    def request(method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        try:
+            if isinstance(body, dict):
+                body = json.dumps(body)
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_round_trip(request_server):
+    status, session = request_server("POST", "/sessions", BUYER)
+    assert status == 201
+    status, reply = request_server("POST", f"/sessions/{session['id']}/messages",
+                                   {"message": "₹60000, final", "offer": 60000})
+    assert status == 200
+    assert reply["action"] == "counter"
+    status, last = request_server("GET", f"/sessions/{session['id']}/reply")
+    assert status == 200 and last == reply
+
+
+def test_accept_in_round_one_is_not_an_opening(request_server):
+    _, session = request_server("POST", "/sessions", BUYER)
+    _, reply = request_server("POST", f"/sessions/{session['id']}/messages", {"message": "", "offer": 14000})
+    assert reply["action"] == "accept"
+    assert "14000" in reply["message"] and "start at" not in reply["message"]
+    status, _ = request_server("POST", f"/sessions/{session['id']}/messages", {"message": "", "offer": 13000})
+    assert status == 409
+
+
+@pytest.mark.parametrize("spec", [
+    dict(BUYER, market_price="abc"),
+    dict(BUYER, budget="lots"),
+    dict(BUYER, budget=float("inf")),
+    {"role": "buyer", "name": "Alice", "personality": "Diplomatic Buyer"},
+    {"role": "seller", "name": "Bob", "personality": "Diplomatic Seller"},
+    {"role": "seller", "name": "Bob", "personality": "Diplomatic Seller", "min_price": 30000, "min_rounds": "x"},
+    {"role": "auctioneer"},
+])
+def test_create_rejects_bad_fields(request_server, spec):
+    status, body = request_server("POST", "/sessions", json.dumps(spec))
+    assert status == 400
+    assert "error" in body
+
+
+def test_bad_offer_is_a_400(request_server):
+    _, session = request_server("POST", "/sessions", BUYER)
+    status, _ = request_server("POST", f"/sessions/{session['id']}/messages", {"message": "", "offer": "cheap"})
+    assert status == 400
+
+
+def test_bad_content_length_is_a_400(request_server):
+    status, body = request_server("POST", "/sessions", "{}", headers={"Content-Length": "abc"})
+    assert status == 400
+    assert body == {"error": "invalid Content-Length"}
+
+
+def test_unknown_session_is_a_404(request_server):
+    status, _ = request_server("GET", "/sessions/" + "0" * 32)
+    assert status == 404
+
+
+def test_renderer_failure_is_a_json_500(manager, request_server):
+    _, session = request_server("POST", "/sessions", BUYER)
+    manager.renderer = FailingRenderer()
+    status, body = request_server("POST", f"/sessions/{session['id']}/messages", {"message": "", "offer": 60000})
+    assert status == 500
+    assert body == {"error": "internal error: RuntimeError"}
+    # the failed turn was not saved
+    assert request_server("GET", f"/sessions/{session['id']}")[1]["turns"] == 0
+
+
+def test_memory_store_returns_copies():
+    store = MemorySessionStore()
+    store.put("s", {"turns": 0, "agent": {"round": 0}})
+    got = store.get("s")
+    got["turns"] = 5
+    got["agent"]["round"] = 5
+    assert store.get("s") == {"turns": 0, "agent": {"round": 0}, "version": 0}
+
+
+@pytest.mark.parametrize("make_store", [MemorySessionStore, lambda: SqliteSessionStore(":memory:")])
+def test_store_replace_is_compare_and_swap(make_store):
+    store = make_store()
+    store.put("s", {"turns": 0})
+    first, second = store.get("s"), store.get("s")
+    assert store.replace("s", dict(first, turns=1), first["version"])
+    assert not store.replace("s", dict(second, turns=1), second["version"])
+    assert store.get("s") == {"turns": 1, "version": 1}
+    assert not store.replace("missing", {}, 0)
+
+
+def test_turn_lost_to_another_process_is_a_409(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    here, there = SessionManager(SqliteSessionStore(path), "template"), SqliteSessionStore(path)
+    session = here.create(BUYER)
+    stale = there.get(session["id"])
+    here.submit(session["id"], "", 60000)
+    assert not there.replace(session["id"], dict(stale, turns=1), stale["version"])
+
+    real_get = here.store.get
+
+    def get_then_lose_race(session_id):
+        state = real_get(session_id)
+        there.replace(session_id, dict(there.get(session_id)), state["version"])
+        return state
+
+    here.store.get = get_then_lose_race
+    with pytest.raises(SessionError) as exc:
+        here.submit(session["id"], "", 59000)
+    assert exc.value.status == 409
+    assert real_get(session["id"])["turns"] == 1
+
+
+def test_chat_history_survives_between_requests():
+    llm = FakeChatModel(latency=0, tokens_per_second=0)
+    manager = SessionManager(renderer="llm", llm=llm)
+    session = manager.create(BUYER)
+    manager.submit(session["id"], "I want ₹60000", 60000)
+    manager.submit(session["id"], "₹58000 then", 58000)
+
+    chat = manager.get(session["id"])["chat"]
+    assert [kind for kind, _ in chat] == ["system", "human", "ai", "human", "ai"]
+    assert "58000" in chat[3][1]
+    assert "60000" in chat[1][1]  # round 1, kept across the agent being rebuilt
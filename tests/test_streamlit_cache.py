@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from streamlit_cache import TranscriptStore  # noqa: E402
+
+
+def wait_for(store, key):
+    deadline = time.monotonic() + 5
+    while store.running(key):
+        assert time.monotonic() < deadline, "background run did not finish"
+        time.sleep(0.01)
+
+
+def test_submit_stores_the_result_for_replay():
+    store = TranscriptStore(max_entries=2)
+    release = threading.Event()
+
+    def negotiate(price):
+        release.wait(5)
+        return {"status": "Deal Reached", "price": price}
+
+    store.submit("a", negotiate, 100)
+    store.submit("a", negotiate, 999)  # already running: ignored
+    assert store.running("a") and store.get("a") is None
+    release.set()
+    wait_for(store, "a")
+    assert store.get("a") == {"status": "Deal Reached", "price": 100}
+    assert store.pop_error() is None
+
+
+def test_oldest_transcript_is_evicted():
+    store = TranscriptStore(max_entries=2)
+    store.put("a", 1)
+    store.put("b", 2)
+    store.get("a")  # a is now the most recent
+    store.put("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1 and store.get("c") == 3
+
+
+def test_failed_run_keeps_the_transcript_and_reports_once():
+    store = TranscriptStore()
+    store.put("a", {"status": "Deal Reached"})
+
+    def fail():
+        raise RuntimeError("model server down")
+
+    store.submit("a", fail)
+    wait_for(store, "a")
+    assert store.get("a") == {"status": "Deal Reached"}
+    error = store.pop_error()
+    assert isinstance(error, RuntimeError) and str(error) == "model server down"
+    assert store.pop_error() is None
@@ -0,0 +1,30 @@
+import random
+
+from run_negotiation_terminal import run_negotiation
+from tournament import aggregate, build_scenarios, run_scenario, run_tournament
+
+ARGS = ("Phone", 50000, "Buyer", "Diplomatic Buyer", 40000, "Seller", "Diplomatic Seller", 35000)
+
+
+def test_forced_deal_is_not_reported_as_success(capsys):
+    random.seed(0)
+    result = run_negotiation(*ARGS, max_rounds=1)
+    assert result["status"] == "Deal Forced After Max Rounds"
+    out = capsys.readouterr().out
+    assert "DEAL SUCCESS" not in out
+    assert "Deal Forced After Max Rounds" in out
+
+
+def test_forced_deal_counts_as_no_deal():
+    scenario = build_scenarios([40000], [35000], [50000])[0]
+    record = run_scenario(scenario)
+    assert record["deal"] == (record["status"] == "Deal Reached")
+    if not record["deal"]:
+        assert record["buyer_surplus"] == record["seller_surplus"] == 0.0
+
+
+def test_tournament_runs_every_matchup_in_order():
+    scenarios = build_scenarios([40000], [35000], [50000])
+    records = run_tournament(scenarios, workers=1)
+    assert [r["id"] for r in records] == [s["id"] for s in scenarios]
+    assert len(aggregate(records)) == 16
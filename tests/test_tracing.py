@@ -0,0 +1,48 @@
+import time
+
+from benchmarks.fake_ollama import FakeChatModel
+from negotiation_logic import run_negotiation, stream_negotiation
+from tracing import MemorySink, PrometheusSink, Tracer
+
+SCENARIO = dict(product="Phone", market_price=50000, buyer_name="Alice", buyer_personality="Diplomatic Buyer",
+                buyer_budget=40000, seller_name="Bob", seller_personality="Diplomatic Seller",
+                seller_min_price=35000)
+
+
+def test_llm_spans_carry_tokens_and_attrs():
+    sink = MemorySink()
+    run_negotiation(**SCENARIO, renderer="oneshot", llm=FakeChatModel(latency=0, tokens_per_second=0),
+                    tracer=Tracer(sink))
+    llm_spans = [r for r in sink.records if r["name"] == "llm"]
+    assert llm_spans
+    for record in llm_spans:
+        assert record["completion_tokens"] > 0
+        assert record["role"] in ("buyer", "seller")
+        assert "round" in record and "action" in record
+
+
+def test_consumer_time_is_not_llm_time():
+    sink = MemorySink()
+    tracer = Tracer(sink)
+    pause = 0.01
+    paced = 0.0
+    for event in stream_negotiation(**SCENARIO, renderer="oneshot", tracer=tracer,
+                                    llm=FakeChatModel(latency=0, tokens_per_second=0, reply_tokens=5)):
+        if event["type"] == "token":
+            with tracer.span("pacing", kind="typing"):
+                time.sleep(pause)
+            paced += pause
+    llm_spans = [r for r in sink.records if r["name"] == "llm"]
+    pacing = sum(r["duration_ms"] for r in sink.records if r["name"] == "pacing")
+    assert pacing >= paced * 1000 * 0.9
+    assert sum(r["duration_ms"] for r in llm_spans) < pacing / 5
+    assert sum(r["llm_latency_ms"] for r in llm_spans) < pacing / 5
+
+
+def test_prometheus_sink_renders_histograms_and_tokens():
+    sink = PrometheusSink()
+    run_negotiation(**SCENARIO, renderer="oneshot", llm=FakeChatModel(latency=0, tokens_per_second=0),
+                    tracer=Tracer(sink))
+    text = sink.render()
+    assert 'negotiation_phase_seconds_count{phase="llm",role="buyer"}' in text
+    assert "negotiation_completion_tokens_total" in text
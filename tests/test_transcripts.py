@@ -0,0 +1,64 @@
+import pytest
+
+from negotiation_logic import negotiation_params, run_negotiation
+from transcripts import SqliteTranscriptStore, main
+
+AGGRESSIVE = ("Phone", 50000, "Alice", "Aggressive Trader", 40000, "Bob", "Diplomatic Seller", 35000)
+DIPLOMATIC = ("Laptop", 80000, "Carol", "Diplomatic Buyer", 60000, "Dan", "Aggressive Trader", 58000)
+NO_DEAL = {"status": "Buyer Walked Away", "history": []}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteTranscriptStore(str(tmp_path / "transcripts.db"))
+    yield store
+    store.close()
+
+
+def fill(store):
+    results = [run_negotiation(*args, renderer="none") for args in (AGGRESSIVE, DIPLOMATIC)]
+    negotiations = [(negotiation_params(*args), result) for args, result in zip((AGGRESSIVE, DIPLOMATIC), results)]
+    negotiations.append((negotiation_params(*AGGRESSIVE), NO_DEAL))
+    return store.add_many(negotiations), results
+
+
+def test_round_trip(store):
+    ids, results = fill(store)
+    assert len(store) == len(ids) == 3
+
+    session = store.sessions(product="Phone", status="Deal Reached")[0]
+    assert session["id"] == ids[0]
+    assert session["price"] == results[0]["price"]
+    assert session["budget_ratio"] == pytest.approx(40000 / 35000)
+    assert session["turns"] == len(results[0]["history"])
+
+    turns = store.turns(ids[0])
+    assert [(t["speaker"], t["action"], t["offer"], t["message"]) for t in turns] == [
+        (t["speaker"], t["action"], t["offer"], t["message"]) for t in results[0]["history"]]
+    assert store.turns(ids[2]) == []
+    assert store.sessions(limit=1)[0]["id"] == ids[2]  # newest first
+
+
+def test_filtered_summaries(store):
+    fill(store)
+    everything = store.summary()
+    assert (everything["negotiations"], everything["deals"]) == (3, 2)
+    assert everything["deal_rate"] == pytest.approx(2 / 3)
+
+    pair = store.summary(buyer_personality="Aggressive Trader", seller_personality="Diplomatic Seller")
+    assert (pair["negotiations"], pair["deals"]) == (2, 1)
+    assert store.summary(max_budget_ratio=1.1)["negotiations"] == 1  # 60000 / 58000
+    assert store.summary(product="Tablet") == {"negotiations": 0, "deals": 0, "deal_rate": None,
+                                               "mean_price": None, "mean_rounds": None}
+    with pytest.raises(ValueError):
+        store.summary(colour="red")
+
+
+def test_cli_prints_the_summary(store, capsys):
+    fill(store)
+    main([store.path, "--buyer", "Aggressive Trader", "--status", "Deal Reached"])
+    out = capsys.readouterr().out
+    lines = dict(line.split(None, 1) for line in out.splitlines()[:-1])
+    assert lines["negotiations"] == "1" and lines["deals"] == "1"
+    assert lines["deal_rate"] == "1.000"
+    assert "over 3 negotiations" in out.splitlines()[-1]
@@ -0,0 +1,69 @@
+import json
+import math
+
+import pytest
+
+from turn_log import TurnLog, concat_numpy
+
+
+def sample_log(n=3):
+    log = TurnLog()
+    for i in range(n):
+        speaker = "Alice" if i % 2 == 0 else "Bob"
+        log.append_turn(i // 2 + 1, speaker, "Diplomatic", f"message {i}", "counter", 1000.0 + i)
+    return log
+
+
+def test_views_behave_like_turn_dicts():
+    log = sample_log()
+    assert len(log) == 3
+    assert log[-1]["round"] == 2
+    assert log[1]["speaker"] == "Bob"
+    assert dict(log[0]) == {"round": 1, "speaker": "Alice", "personality": "Diplomatic",
+                            "message": "message 0", "action": "counter", "offer": 1000.0}
+    with pytest.raises(IndexError):
+        log[3]
+
+
+def test_append_takes_dicts_and_strings_are_interned():
+    log = TurnLog([{"round": 1, "speaker": "A", "personality": "P", "message": "m", "action": "accept",
+                    "offer": None}])
+    log.append({"round": 1, "speaker": "A", "personality": "P", "message": "n", "action": "accept",
+                "offer": 5.0})
+    assert log[0]["offer"] is None
+    assert log[1]["offer"] == 5.0
+    assert log.columns()["strings"] == ["A", "P", "accept"]
+
+
+def test_message_and_offer_can_be_updated_other_fields_cannot():
+    log = sample_log(1)
+    log[0]["message"] = "edited"
+    log[0]["offer"] = None
+    assert log[0]["message"] == "edited"
+    assert log[0]["offer"] is None
+    with pytest.raises(KeyError):
+        log[0]["speaker"] = "Mallory"
+
+
+def test_state_round_trips_through_json():
+    log = sample_log()
+    log[0]["offer"] = None
+    restored = TurnLog.from_state(json.loads(json.dumps(log.to_state())))
+    assert restored.to_dicts() == log.to_dicts()
+    restored.append_turn(3, "Alice", "Diplomatic", "again", "accept", 1.0)
+    assert restored.columns()["strings"].count("Alice") == 1
+
+
+def test_concat_numpy_accepts_a_generator():
+    np = pytest.importorskip("numpy")
+    columns = concat_numpy(sample_log(n) for n in (2, 3))
+    assert columns["negotiation"].tolist() == [0, 0, 1, 1, 1]
+    assert columns["offer"].dtype == np.float64
+    assert list(columns["speaker"][:2]) == ["Alice", "Bob"]
+
+
+def test_to_numpy_keeps_missing_offers_as_nan():
+    pytest.importorskip("numpy")
+    log = sample_log(1)
+    log[0]["offer"] = None
+    assert math.isnan(log.to_numpy()["offer"][0])
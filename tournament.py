@@ -0,0 +1,213 @@
+import argparse
+import csv
+import functools
+import itertools
+import os
+import random
+from agents import BUYER_PERSONALITIES, SELLER_PERSONALITIES
+
+ENGINES = ["heuristic", "llm"]
+
+# =========================
+# Scenario grid
+def build_scenarios(budgets, min_prices, market_prices,
+                    buyer_personalities=None, seller_personalities=None,
+                    product="Smartphone", repeats=1, seed=0):
+    """Cartesian product of personalities and prices, one dict per matchup."""
+    buyer_personalities = buyer_personalities or BUYER_PERSONALITIES
+    seller_personalities = seller_personalities or SELLER_PERSONALITIES
+
+    grid = itertools.product(buyer_personalities, seller_personalities,
+                             budgets, min_prices, market_prices, range(repeats))
+    scenarios = []
+    for i, (bp, sp, budget, min_price, market_price, rep) in enumerate(grid):
+        scenarios.append({
+            "id": i,
+            "product": product,
+            "market_price": market_price,
+            "buyer_personality": bp,
+            "buyer_budget": budget,
+            "seller_personality": sp,
+            "seller_min_price": min_price,
+            "repeat": rep,
+            "seed": seed + i,
+        })
+    return scenarios
+
+# =========================
+# Worker
+def run_scenario(scenario, engine="heuristic", renderer="none", cache_path=None, keep_history=False, routing=None):
+    """
+    Run one matchup and flatten the outcome into a result record (plus its turns under "history" if keep_history).
+    With renderer "routed", routing is its config (routing.DEFAULT_ROUTING if None) and the
+    record carries the negotiation's per-route report under "routes".
+    """
+    random.seed(scenario["seed"])
+    args = (scenario["product"], scenario["market_price"],
+            "Buyer", scenario["buyer_personality"], scenario["buyer_budget"],
+            "Seller", scenario["seller_personality"], scenario["seller_min_price"])
+
+    # Engines are imported here so each worker only loads what it runs
+    if engine == "heuristic":
+        from run_negotiation_terminal import run_negotiation
+        result = run_negotiation(*args, verbose=False)
+    elif engine == "llm":
+        from negotiation_logic import run_negotiation
+        from llm_cache import open_cache
+        cache = open_cache(cache_path) if cache_path else None
+        if renderer == "routed":
+            from routing import RoutingRenderer
+            renderer = RoutingRenderer(routing)
+        result = run_negotiation(*args, renderer=renderer, cache=cache)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    history = result["history"]
+    price = result.get("price")
+    deal = result["status"] == "Deal Reached"
+
+    record = dict(scenario)
+    record.update({
+        "status": result["status"],
+        "deal": deal,
+        "price": price,
+        "rounds": history[-1]["round"] if history else 0,
+        "buyer_surplus": scenario["buyer_budget"] - price if deal else 0.0,
+        "seller_surplus": price - scenario["seller_min_price"] if deal else 0.0,
+    })
+    if keep_history:
+        record["history"] = [dict(turn) for turn in history]
+    if hasattr(renderer, "report"):
+        record["routes"] = renderer.report()
+    return record
+
+
+# =========================
+# Tournament
+def run_tournament(scenarios, engine="heuristic", renderer="none", workers=None, chunksize=None,
+                   cache_path=None, keep_history=False, routing=None):
+    """
+    Run every scenario on a process pool and return the records in scenario order.
+    renderer, routing and cache_path (SQLite response cache shared by workers) only apply to the "llm" engine.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    worker = functools.partial(run_scenario, engine=engine, renderer=renderer, cache_path=cache_path,
+                               keep_history=keep_history, routing=routing)
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(scenarios) // (workers * 8))
+
+    if workers == 1:
+        return [worker(s) for s in scenarios]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, scenarios, chunksize=chunksize))
+
+
+def aggregate(records, by=("buyer_personality", "seller_personality")):
+    """Deal rate, mean price, surplus split and rounds-to-close per group."""
+    groups = {}
+    for r in records:
+        groups.setdefault(tuple(r[k] for k in by), []).append(r)
+
+    rows = []
+    for key, group in sorted(groups.items()):
+        deals = [r for r in group if r["deal"]]
+        n_deals = len(deals)
+        buyer_surplus = sum(r["buyer_surplus"] for r in deals)
+        seller_surplus = sum(r["seller_surplus"] for r in deals)
+        total_surplus = buyer_surplus + seller_surplus
+
+        row = dict(zip(by, key))
+        row.update({
+            "negotiations": len(group),
+            "deal_rate": n_deals / len(group),
+            "mean_price": sum(r["price"] for r in deals) / n_deals if n_deals else None,
+            "buyer_surplus_share": buyer_surplus / total_surplus if total_surplus > 0 else None,
+            "mean_rounds_to_close": sum(r["rounds"] for r in deals) / n_deals if n_deals else None,
+        })
+        rows.append(row)
+    return rows
+
+
+def format_table(rows):
+    """Render aggregated rows as a plain-text table."""
+    if not rows:
+        return "(no results)"
+
+    def fmt(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        return str(value)
+
+    headers = list(rows[0].keys())
+    cells = [[fmt(row[h]) for h in headers] for row in rows]
+    widths = [max(len(h), *(len(c[i]) for c in cells)) for i, h in enumerate(headers)]
+
+    lines = ["  ".join(h.ljust(w) for h, w in zip(headers, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(c.ljust(w) for c, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def write_records(records, path):
+    """Write per-scenario records to CSV."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0].keys()))
+        writer.writeheader()
+        writer.writerows(records)
+
+# =========================
+# Command line
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every buyer/seller matchup over a scenario grid.")
+    parser.add_argument("--engine", choices=ENGINES, default="heuristic")
+    parser.add_argument("--renderer", choices=["none", "template", "llm", "oneshot", "routed"], default="none",
+                        help="message generation for the llm engine")
+    parser.add_argument("--routing", metavar="CONFIG", help="JSON routing config for --renderer routed")
+    parser.add_argument("--cache", help="SQLite file for the LLM response cache (llm engine)")
+    parser.add_argument("--product", default="Smartphone")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[40000])
+    parser.add_argument("--min-prices", type=float, nargs="+", default=[35000])
+    parser.add_argument("--market-prices", type=float, nargs="+", default=[50000])
+    parser.add_argument("--repeats", type=int, default=1, help="runs per matchup (different seeds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="optional CSV file for per-scenario records")
+    parser.add_argument("--transcripts", help="optional SQLite transcript store to append every negotiation to")
+    args = parser.parse_args(argv)
+
+    scenarios = build_scenarios(args.budgets, args.min_prices, args.market_prices,
+                                product=args.product, repeats=args.repeats, seed=args.seed)
+    routing = None
+    if args.routing:
+        from routing import load_routing
+        routing = load_routing(args.routing)
+    records = run_tournament(scenarios, engine=args.engine, renderer=args.renderer,
+                             workers=args.workers, cache_path=args.cache,
+                             keep_history=bool(args.transcripts), routing=routing)
+    route_reports = [record.pop("routes") for record in records if "routes" in record]
+    if args.transcripts:
+        from transcripts import SqliteTranscriptStore
+
+        store = SqliteTranscriptStore(args.transcripts)
+        store.add_many((record, {"status": record["status"], "price": record["price"],
+                                 "history": record.pop("history")}) for record in records)
+        store.close()
+
+    print(format_table(aggregate(records)))
+    if route_reports:
+        from routing import format_report, merge_reports
+        print("\n" + format_report(merge_reports(route_reports)))
+    if args.output:
+        write_records(records, args.output)
+        print(f"\nWrote {len(records)} records to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
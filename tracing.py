@@ -0,0 +1,235 @@
+"""
+Per-turn tracing for the negotiation engine.
+
+The engine opens a span for each phase of a turn ("parse", "decide", "llm",
+and "pacing" for UI delays) tagged with round, speaker and role; LLM spans
+also carry action, latency and prompt/completion token counts. Finished spans go to a sink:
+
+    tracer = Tracer(JsonlSink("trace.jsonl"))
+    run_negotiation(..., tracer=tracer)
+
+With no tracer the engine uses NULL_TRACER, whose span() hands back one shared
+no-op object, so disabled tracing costs next to nothing.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "_started", "_paused", "_pause_started")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self._paused = 0.0
+        self._pause_started = None
+
+    def __setitem__(self, key, value):
+        self.attrs[key] = value
+
+    def pause(self):
+        """Stop the clock, e.g. while a streamed token is with the UI; resume() restarts it."""
+        self._pause_started = time.perf_counter()
+
+    def resume(self):
+        if self._pause_started is not None:
+            self._paused += time.perf_counter() - self._pause_started
+            self._pause_started = None
+
+
+class _ActiveSpan:
+    """Context manager returned by Tracer.span()."""
+
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self):
+        self.span.start = time.time()
+        self.span._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.resume()  # closed while paused (the consumer stopped reading)
+        duration = time.perf_counter() - self.span._started - self.span._paused
+        record = {"name": self.span.name, "start": self.span.start, "duration_ms": duration * 1000}
+        record.update(self.span.attrs)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.tracer.sink.record(record)
+        return False
+
+
+class Tracer:
+    enabled = True
+
+    def __init__(self, sink, **base_attrs):
+        self.sink = sink
+        self.base_attrs = base_attrs
+
+    def span(self, name, round_num=None, agent=None, action=None, **attrs):
+        """Span tagged with round, the agent's name/role and action; attrs are passed positionally
+        from the engine's hot loop so a disabled tracer never builds a dict."""
+        if self.base_attrs:
+            attrs = {**self.base_attrs, **attrs}
+        if round_num is not None:
+            attrs["round"] = round_num
+        if agent is not None:
+            attrs["speaker"] = agent.name
+            attrs["role"] = agent.role
+        if action is not None:
+            attrs["action"] = action
+        return _ActiveSpan(self, Span(name, attrs))
+
+    def bind(self, **attrs):
+        """Tracer writing to the same sink whose spans all carry attrs (e.g. a negotiation id)."""
+        return Tracer(self.sink, **self.base_attrs, **attrs)
+
+    def new_trace_id(self):
+        return uuid.uuid4().hex[:16]
+
+
+class _NullSpan:
+    __slots__ = ()
+    attrs = None  # renderers skip filling stats when this is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    enabled = False
+
+    def span(self, name, round_num=None, agent=None, action=None, **attrs):
+        return _NULL_SPAN
+
+    def bind(self, **attrs):
+        return self
+
+    def new_trace_id(self):
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+# =========================
+# Sinks
+class MemorySink:
+    """Keeps span records in a list (tests, notebooks, the benchmark)."""
+
+    def __init__(self):
+        self.records = []
+
+    def record(self, record):
+        self.records.append(record)
+
+
+class JsonlSink:
+    """One JSON object per finished span."""
+
+    def __init__(self, path_or_file):
+        self._owns_file = isinstance(path_or_file, str)
+        self.file = open(path_or_file, "a", encoding="utf-8") if self._owns_file else path_or_file
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.file.write(line)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+
+
+class PrometheusSink:
+    """
+    Aggregates spans into Prometheus text-format metrics:
+      negotiation_phase_seconds{phase,role}         histogram of span durations
+      negotiation_prompt_tokens_total{role}         counters from LLM spans
+      negotiation_completion_tokens_total{role}
+    render() returns the exposition text; write() saves it (e.g. for a textfile collector).
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._histograms = {}  # (phase, role) -> [bucket counts..., count, sum]
+        self._tokens = {}      # (kind, role) -> total
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        seconds = record["duration_ms"] / 1000
+        key = (record["name"], record.get("role", ""))
+        with self._lock:
+            hist = self._histograms.setdefault(key, [0] * len(self.buckets) + [0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += 1
+            hist[-1] += seconds
+            for kind in ("prompt_tokens", "completion_tokens"):
+                if record.get(kind):
+                    token_key = (kind, record.get("role", ""))
+                    self._tokens[token_key] = self._tokens.get(token_key, 0) + record[kind]
+
+    def render(self):
+        lines = ["# HELP negotiation_phase_seconds Time spent per negotiation phase.",
+                 "# TYPE negotiation_phase_seconds histogram"]
+        with self._lock:
+            for (phase, role), hist in sorted(self._histograms.items()):
+                labels = f'phase="{phase}",role="{role}"'
+                for bound, count in zip(self.buckets, hist):
+                    lines.append(f'negotiation_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'negotiation_phase_seconds_bucket{{{labels},le="+Inf"}} {hist[-2]}')
+                lines.append(f"negotiation_phase_seconds_count{{{labels}}} {hist[-2]}")
+                lines.append(f"negotiation_phase_seconds_sum{{{labels}}} {hist[-1]:.6f}")
+            for kind in ("prompt_tokens", "completion_tokens"):
+                name = f"negotiation_{kind}_total"
+                lines.append(f"# HELP {name} LLM {kind.replace('_', ' ')} generated for negotiation turns.")
+                lines.append(f"# TYPE {name} counter")
+                for (token_kind, role), total in sorted(self._tokens.items()):
+                    if token_kind == kind:
+                        lines.append(f'{name}{{role="{role}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+class MultiSink:
+    """Fan out each record to several sinks."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def record(self, record):
+        for sink in self.sinks:
+            sink.record(record)
@@ -0,0 +1,193 @@
+"""
+Append-only archive of finished negotiations in SQLite, for analysis without
+paying for the LLM again.
+
+Each negotiation is a row of `sessions` (settings and outcome) plus one row
+per turn in `turns`. Sessions are indexed by personality pair, product, price
+band, status and round count; the personality-pair index also covers the
+budget ratio and outcome columns, so a question like
+
+    store.summary(buyer_personality="Aggressive Trader",
+                  seller_personality="Diplomatic Seller", max_budget_ratio=1.1)
+
+("deal rate when budget < min_price * 1.1") is one index range scan, however
+many turns are stored.
+
+    python transcripts.py transcripts.db --buyer "Aggressive Trader" --seller "Diplomatic Seller" --max-budget-ratio 1.1
+"""
+import argparse
+import math
+import threading
+import time
+
+PRICE_BAND = 1000  # width of a price band, in ₹
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    product TEXT,
+    market_price REAL,
+    buyer_personality TEXT,
+    seller_personality TEXT,
+    buyer_budget REAL,
+    seller_min_price REAL,
+    budget_ratio REAL,
+    status TEXT NOT NULL,
+    price REAL,
+    price_band INTEGER,
+    rounds INTEGER NOT NULL,
+    turns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    round INTEGER,
+    speaker TEXT,
+    personality TEXT,
+    action TEXT,
+    offer REAL,
+    message TEXT,
+    PRIMARY KEY (session_id, turn)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_pair ON sessions
+    (buyer_personality, seller_personality, budget_ratio, status, rounds, price);
+CREATE INDEX IF NOT EXISTS sessions_product ON sessions (product, status);
+CREATE INDEX IF NOT EXISTS sessions_price_band ON sessions (price_band);
+CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status, rounds);
+CREATE INDEX IF NOT EXISTS sessions_rounds ON sessions (rounds);
+"""
+
+# Query filters: keyword -> SQL condition on sessions
+FILTERS = {
+    "buyer_personality": "buyer_personality = ?",
+    "seller_personality": "seller_personality = ?",
+    "product": "product = ?",
+    "status": "status = ?",
+    "price_band": "price_band = ?",
+    "rounds": "rounds = ?",
+    "min_rounds": "rounds >= ?",
+    "max_rounds": "rounds <= ?",
+    "min_price": "price >= ?",
+    "max_price": "price < ?",
+    "min_budget_ratio": "budget_ratio >= ?",
+    "max_budget_ratio": "budget_ratio < ?",
+}
+
+
+def _number(value):
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+class SqliteTranscriptStore:
+    """Sessions and turns in a SQLite file (WAL mode); add() and add_many() only ever append."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def add(self, params, result):
+        """Store one negotiation: params as for run_negotiation, result as it returned. Returns its id."""
+        return self.add_many([(params, result)])[0]
+
+    def add_many(self, negotiations):
+        """Store (params, result) pairs in one transaction; returns their ids."""
+        now = time.time()
+        ids = []
+        with self._lock, self._conn:
+            for params, result in negotiations:
+                history = result.get("history") or ()
+                price = _number(result.get("price")) if result["status"] == "Deal Reached" else None
+                budget, min_price = params.get("buyer_budget"), params.get("seller_min_price")
+                cursor = self._conn.execute(
+                    "INSERT INTO sessions (created_at, product, market_price, buyer_personality, "
+                    "seller_personality, buyer_budget, seller_min_price, budget_ratio, status, price, "
+                    "price_band, rounds, turns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (now, params.get("product"), params.get("market_price"), params.get("buyer_personality"),
+                     params.get("seller_personality"), budget, min_price,
+                     budget / min_price if budget and min_price else None, result["status"], price,
+                     int(price // PRICE_BAND) if price is not None else None,
+                     history[-1]["round"] if history else 0, len(history)))
+                session_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO turns (session_id, turn, round, speaker, personality, action, offer, message) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(session_id, i, turn["round"], turn["speaker"], turn["personality"], turn.get("action"),
+                      _number(turn["offer"]), turn["message"]) for i, turn in enumerate(history)])
+                ids.append(session_id)
+        return ids
+
+    def _where(self, filters):
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {sorted(unknown)}; expected some of {sorted(FILTERS)}")
+        given = [(FILTERS[key], value) for key, value in filters.items() if value is not None]
+        if not given:
+            return "", ()
+        return " WHERE " + " AND ".join(condition for condition, _ in given), tuple(v for _, v in given)
+
+    def summary(self, **filters):
+        """Negotiations, deals, deal rate, mean price and mean rounds of the sessions matching filters."""
+        where, args = self._where(filters)
+        with self._lock:
+            n, deals, mean_price, mean_rounds = self._conn.execute(
+                "SELECT COUNT(*), SUM(status = 'Deal Reached'), AVG(price), AVG(rounds) FROM sessions" + where,
+                args).fetchone()
+        return {"negotiations": n, "deals": deals or 0, "deal_rate": (deals or 0) / n if n else None,
+                "mean_price": mean_price, "mean_rounds": mean_rounds}
+
+    def sessions(self, limit=100, **filters):
+        """Matching sessions as dicts, newest first."""
+        where, args = self._where(filters)
+        with self._lock:
+            cursor = self._conn.execute(f"SELECT * FROM sessions{where} ORDER BY id DESC LIMIT ?", args + (limit,))
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor]
+
+    def turns(self, session_id):
+        """The turns of one session, as dicts in order."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT round, speaker, personality, action, offer, message FROM turns "
+                                        "WHERE session_id = ? ORDER BY turn", (session_id,))
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query stored negotiations")
+    parser.add_argument("path", help="SQLite transcript store")
+    parser.add_argument("--buyer", dest="buyer_personality")
+    parser.add_argument("--seller", dest="seller_personality")
+    parser.add_argument("--product")
+    parser.add_argument("--status")
+    parser.add_argument("--min-budget-ratio", type=float)
+    parser.add_argument("--max-budget-ratio", type=float, help="only budgets below min_price times this")
+    parser.add_argument("--max-rounds", type=int)
+    args = parser.parse_args(argv)
+
+    filters = {key: value for key, value in vars(args).items() if key != "path"}
+    store = SqliteTranscriptStore(args.path)
+    started = time.perf_counter()
+    summary = store.summary(**filters)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for name, value in summary.items():
+        print(f"{name:<14} {'-' if value is None else f'{value:,.3f}' if isinstance(value, float) else value}")
+    print(f"({elapsed_ms:.1f} ms over {len(store):,} negotiations)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Compact, column-oriented negotiation history.
+
+run_negotiation used to keep one dict per turn, repeating the keys and the
+speaker/personality/action strings every time. TurnLog stores each field as a
+column instead: rounds and string codes in typed arrays, offers as float64,
+and speaker/personality/action interned once per log. Indexing or iterating
+still gives dict-like views, so code written for the old list of dicts
+(`turn['speaker']`, `history[-1]['round']`) keeps working.
+"""
+from array import array
+from collections.abc import Mapping
+
+FIELDS = ("round", "speaker", "personality", "message", "action", "offer")
+NO_OFFER = float("nan")
+
+
+class TurnView(Mapping):
+    """Read-only dict-like view of one turn (message and offer can be updated)."""
+
+    __slots__ = ("_log", "_index")
+
+    def __init__(self, log, index):
+        self._log = log
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._log._field(key, self._index)
+
+    def __setitem__(self, key, value):
+        self._log.update(self._index, key, value)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TurnLog:
+    __slots__ = ("_rounds", "_speakers", "_personalities", "_actions", "_offers", "_messages",
+                 "_strings", "_codes")
+
+    def __init__(self, turns=()):
+        self._rounds = array("H")
+        self._speakers = array("H")
+        self._personalities = array("H")
+        self._actions = array("H")
+        self._offers = array("d")
+        self._messages = []
+        self._strings = []  # code -> string
+        self._codes = {}    # string -> code
+        for turn in turns:
+            self.append(turn)
+
+    def _intern(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    # ---- writing ----
+    def append_turn(self, round_num, speaker, personality, message, action, offer):
+        self._rounds.append(round_num)
+        self._speakers.append(self._intern(speaker))
+        self._personalities.append(self._intern(personality))
+        self._actions.append(self._intern(action))
+        self._offers.append(NO_OFFER if offer is None else offer)
+        self._messages.append(message)
+
+    def append(self, turn):
+        """list.append compatibility: take a turn dict."""
+        self.append_turn(turn["round"], turn["speaker"], turn["personality"],
+                         turn["message"], turn["action"], turn["offer"])
+
+    def update(self, index, key, value):
+        if key == "message":
+            self._messages[index] = value
+        elif key == "offer":
+            self._offers[index] = NO_OFFER if value is None else value
+        else:
+            raise KeyError(f"{key} is read-only")
+
+    # ---- reading ----
+    def _field(self, key, index):
+        if key == "round":
+            return self._rounds[index]
+        if key == "speaker":
+            return self._strings[self._speakers[index]]
+        if key == "personality":
+            return self._strings[self._personalities[index]]
+        if key == "message":
+            return self._messages[index]
+        if key == "action":
+            return self._strings[self._actions[index]]
+        if key == "offer":
+            offer = self._offers[index]
+            return None if offer != offer else offer
+        raise KeyError(key)
+
+    def __len__(self):
+        return len(self._rounds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TurnView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("turn index out of range")
+        return TurnView(self, index)
+
+    def __iter__(self):
+        return (TurnView(self, i) for i in range(len(self)))
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return f"TurnLog({len(self)} turns)"
+
+    def to_dicts(self):
+        """Plain list of turn dicts (JSON-serializable)."""
+        return [dict(view) for view in self]
+
+    def to_state(self):
+        """Compact JSON-ready columns (string table plus codes), for checkpoints."""
+        return {
+            "round": self._rounds.tolist(),
+            "speaker": self._speakers.tolist(),
+            "personality": self._personalities.tolist(),
+            "action": self._actions.tolist(),
+            "offer": [None if offer != offer else offer for offer in self._offers],
+            "message": list(self._messages),
+            "strings": list(self._strings),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        log = cls()
+        log._rounds.extend(state["round"])
+        log._speakers.extend(state["speaker"])
+        log._personalities.extend(state["personality"])
+        log._actions.extend(state["action"])
+        log._offers.extend(NO_OFFER if offer is None else offer for offer in state["offer"])
+        log._messages.extend(state["message"])
+        log._strings.extend(state["strings"])
+        log._codes.update((string, code) for code, string in enumerate(log._strings))
+        return log
+
+    # ---- columnar export ----
+    def columns(self):
+        """Dictionary-encoded columns: codes arrays plus the string table."""
+        return {
+            "round": self._rounds,
+            "speaker": self._speakers,
+            "personality": self._personalities,
+            "action": self._actions,
+            "offer": self._offers,
+            "message": self._messages,
+            "strings": self._strings,
+        }
+
+    def to_numpy(self):
+        """Dict of NumPy arrays; string columns decoded through the string table."""
+        import numpy as np
+
+        strings = np.array(self._strings, dtype=object)
+        return {
+            "round": np.frombuffer(self._rounds, dtype=np.uint16).copy(),
+            "speaker": strings[np.frombuffer(self._speakers, dtype=np.uint16)] if self else np.array([], object),
+            "personality": strings[np.frombuffer(self._personalities, dtype=np.uint16)] if self else np.array([], object),
+            "action": strings[np.frombuffer(self._actions, dtype=np.uint16)] if self else np.array([], object),
+            "offer": np.frombuffer(self._offers, dtype=np.float64).copy(),
+            "message": np.array(self._messages, dtype=object),
+        }
+
+
+# =========================
+# Bulk export of many logs
+def concat_numpy(logs):
+    """One set of NumPy columns for many logs, with a 'negotiation' index column."""
+    import numpy as np
+
+    parts = [log.to_numpy() for log in logs]
+    if not parts:
+        return {}
+    columns = {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+    columns["negotiation"] = np.repeat(np.arange(len(parts)), [len(p["round"]) for p in parts])
+    return columns
+
+
+def to_arrow(logs):
+    """pyarrow Table of many logs; speaker/personality/action are dictionary-encoded."""
+    import pyarrow as pa
+
+    negotiation, rounds, offers, messages = [], array("H"), array("d"), []
+    string_columns = {"speaker": [], "personality": [], "action": []}
+    for i, log in enumerate(logs):
+        negotiation.extend([i] * len(log))
+        rounds.extend(log._rounds)
+        offers.extend(log._offers)
+        messages.extend(log._messages)
+        for name, codes in (("speaker", log._speakers), ("personality", log._personalities),
+                            ("action", log._actions)):
+            string_columns[name].extend(log._strings[c] for c in codes)
+
+    return pa.table({
+        "negotiation": pa.array(negotiation, pa.uint32()),
+        "round": pa.array(rounds, pa.uint16()),
+        "speaker": pa.array(string_columns["speaker"]).dictionary_encode(),
+        "personality": pa.array(string_columns["personality"]).dictionary_encode(),
+        "action": pa.array(string_columns["action"]).dictionary_encode(),
+        "offer": pa.array(offers, pa.float64(), from_pandas=True),
+        "message": pa.array(messages, pa.string()),
+    })
+
+
+def write_parquet(logs, path):
+    """Write many logs to one Parquet file (see to_arrow for the schema)."""
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow(logs), path)